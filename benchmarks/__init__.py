@@ -0,0 +1,3 @@
+"""
+Offline benchmarks for the AI Agent-Based Deep Research System.
+"""
@@ -0,0 +1,98 @@
+# benchmarks/bench_extraction.py
+"""
+Compare HTML text extraction engines on synthetic pages of several sizes.
+
+The baseline is the previous WebCrawler approach (a full BeautifulSoup tree
+with html.parser, scripts and styles removed, all text kept); the candidate is
+src.tools.html_extractor.extract_main_content with the crawler's default
+character limit.
+
+Usage:
+    python -m benchmarks.bench_extraction --sizes 20000 200000 2000000 --output bench_extraction.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bs4 import BeautifulSoup
+
+from benchmarks.fakes import make_page
+from src.tools.html_extractor import extract_main_content
+
+
+def soup_extract(html: str) -> str:
+    """Baseline: the extraction WebCrawler used before the streaming extractor."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.extract()
+    return ' '.join(soup.get_text(separator=' ', strip=True).split())
+
+
+def _time(fn: Callable[[str], Any], html: str, repeats: int) -> List[float]:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(html)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench_extraction(sizes: List[int], repeats: int = 3, max_chars: int = 10000) -> Dict[str, Any]:
+    """
+    Time both extraction engines on pages of each size.
+
+    Returns:
+        Dictionary with per-size timings (seconds) and speedups
+    """
+    results = []
+    for size in sizes:
+        html = make_page(f"Extraction benchmark {size}", size).decode("utf-8")
+        baseline = _time(soup_extract, html, repeats)
+        candidate = _time(lambda doc: extract_main_content(doc, max_chars=max_chars), html, repeats)
+
+        baseline_mean = statistics.mean(baseline)
+        candidate_mean = statistics.mean(candidate)
+        results.append({
+            "page_bytes": size,
+            "beautifulsoup_s": round(baseline_mean, 5),
+            "main_content_s": round(candidate_mean, 5),
+            "speedup": round(baseline_mean / candidate_mean, 2) if candidate_mean else 0.0
+        })
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "repeats": repeats,
+        "max_chars": max_chars,
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare HTML extraction engines')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20000, 200000, 2000000],
+                        help='Page sizes in bytes')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed runs per engine and size')
+    parser.add_argument('--max-chars', type=int, default=10000, help='Character limit of the extractor')
+    parser.add_argument('--output', '-o', type=str, default='bench_extraction.json', help='Results file')
+    args = parser.parse_args()
+
+    results = bench_extraction(args.sizes, repeats=args.repeats, max_chars=args.max_chars)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    for row in results["results"]:
+        print(f"{row['page_bytes']:>9} bytes: BeautifulSoup {row['beautifulsoup_s'] * 1000:.1f} ms, "
+              f"main content {row['main_content_s'] * 1000:.1f} ms ({row['speedup']:.1f}x)")
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
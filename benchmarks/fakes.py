@@ -0,0 +1,324 @@
+# benchmarks/fakes.py
+"""
+Local stand-ins for Gemini, Tavily and web pages with configurable latency and
+payload sizes, used to run the full research workflow offline.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from unittest.mock import patch
+
+LOREM = (
+    "Researchers report steady progress in the field, with new studies measuring outcomes "
+    "across several domains. Independent reviews highlight both benefits and open questions, "
+    "and practitioners describe practical constraints that shape adoption. "
+)
+
+
+def _filler(chars: int, seed: Optional[str] = None) -> str:
+    """
+    Deterministic prose of roughly the requested length.
+
+    Without a seed the same text is returned every time. With one, the words of
+    LOREM are drawn in a seed-dependent order, so texts with different seeds
+    share few word shingles and are not near-duplicates of each other.
+    """
+    if seed is None:
+        repeats = chars // len(LOREM) + 1
+        return (LOREM * repeats)[:chars]
+
+    rng = random.Random(seed)
+    vocabulary = re.findall(r"[a-z]+", LOREM.lower())
+    sentences = []
+    length = 0
+    while length < chars:
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(8, 16))]
+        sentence = " ".join(words).capitalize() + ". "
+        sentences.append(sentence)
+        length += len(sentence)
+    return "".join(sentences)[:chars]
+
+
+class FakeUsage:
+    def __init__(self, prompt_tokens: int, response_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = response_tokens
+
+
+class FakeResponse:
+    """
+    Response object shaped like google.generativeai's GenerateContentResponse.
+    """
+
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        self.usage_metadata = FakeUsage((len(prompt) + 3) // 4, (len(text) + 3) // 4)
+
+
+class FakeGeminiModel:
+    """
+    Stand-in for genai.GenerativeModel that answers each pipeline prompt with a
+    well-formed response after a fixed latency.
+    """
+
+    def __init__(self, model_name: str = "fake-gemini", latency: float = 0.0, answer_chars: int = 3000,
+                 draft_score: float = 6.0):
+        self.model_name = model_name
+        self.latency = latency
+        self.answer_chars = answer_chars
+        self.draft_score = draft_score
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, prompt: str) -> str:
+        if '"search_queries"' in prompt:
+            return json.dumps({
+                "topic": "benchmark topic",
+                "search_queries": ["benchmark topic overview", "benchmark topic data", "benchmark topic debate"]
+            })
+        if "Format your response as a Python list" in prompt:
+            return '["benchmark topic overview", "benchmark topic data", "benchmark topic debate"]'
+        if '"main_findings"' in prompt:
+            extracted = {
+                "main_findings": [f"Finding {i}: {_filler(120)}" for i in range(1, 5)],
+                "data_points": [f"Data point {i}" for i in range(1, 4)],
+                "perspectives": ["Optimistic view", "Cautious view"],
+                "information_gaps": ["Long-term effects"]
+            }
+            if '"summary"' in prompt:
+                extracted["summary"] = _filler(1500)
+            return json.dumps(extracted)
+        if "extract the main research topic" in prompt:
+            return "benchmark topic"
+        if "provide a concise research summary" in prompt:
+            return _filler(1500)
+        if "Evaluate this draft" in prompt:
+            return json.dumps({
+                "score": self.draft_score,
+                "issues": ["Add more data", "Cite sources more clearly"],
+                "feedback": "Improve the structure."
+            })
+
+        if "SECTION TO REVISE" in prompt:
+            match = re.search(r'unchanged heading line "([^"]*)"', prompt)
+            heading = f"{match.group(1)}\n\n" if match else ""
+            return f"{heading}{_filler(max(200, self.answer_chars // 4))}\n"
+
+        # Drafts and refinements: markdown with several sections
+        section_chars = max(200, self.answer_chars // 4)
+        sections = [f"## Section {i}\n\n{_filler(section_chars)}\n" for i in range(1, 5)]
+        return "# Benchmark Topic\n\n" + "\n".join(sections)
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs: Any) -> Any:
+        with self._lock:
+            self.calls += 1
+        if stream:
+            return self._stream(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeResponse(self._respond(prompt), prompt)
+
+    def _stream(self, prompt: str, chunk_chars: int = 200) -> Iterator[FakeResponse]:
+        """
+        Yield the response in chunks like a streamed generation: the first after a
+        tenth of the latency, the rest spread over the remaining time.
+        """
+        text = self._respond(prompt)
+        pieces = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)] or [""]
+        first_delay = self.latency * 0.1
+        delay = (self.latency - first_delay) / max(1, len(pieces) - 1)
+
+        for index, piece in enumerate(pieces):
+            if self.latency:
+                time.sleep(first_delay if index == 0 else delay)
+            chunk = FakeResponse(piece, prompt)
+            if index < len(pieces) - 1:
+                # Usage counts arrive with the last chunk
+                chunk.usage_metadata = None
+            else:
+                chunk.usage_metadata = FakeUsage((len(prompt) + 3) // 4, (len(text) + 3) // 4)
+            yield chunk
+
+
+class FakeTavilyClient:
+    """
+    Stand-in for tavily.TavilyClient returning results that point at a local page server.
+    """
+
+    def __init__(self, api_key: str = "fake", latency: float = 0.0, content_chars: int = 800,
+                 raw_content_chars: int = 5000, base_url: str = "http://127.0.0.1:9"):
+        self.latency = latency
+        self.content_chars = content_chars
+        self.raw_content_chars = raw_content_chars
+        self.base_url = base_url
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, search_depth: str = "basic", max_results: int = 5,
+               include_answer: bool = False, include_raw_content: bool = False,
+               include_images: bool = False, **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")
+        results = []
+        for i in range(max_results):
+            url = f"{self.base_url}/page/{slug}-{i + 1}"
+            # Distinct text per result, so deduplication keeps every source
+            result = {
+                "title": f"{query} - result {i + 1}",
+                "url": url,
+                "content": f"{query}. {_filler(self.content_chars, seed=url)}",
+                "score": round(1.0 - i * 0.1, 2)
+            }
+            if include_raw_content:
+                result["raw_content"] = f"{query}. {_filler(self.raw_content_chars, seed=url)}"
+            results.append(result)
+
+        return {
+            "query": query,
+            "answer": f"Answer about {query}" if include_answer else None,
+            "results": results
+        }
+
+
+def make_page(title: str, page_bytes: int) -> bytes:
+    """
+    Build an HTML page of roughly page_bytes with navigation, scripts and article text.
+    """
+    head = f"<html><head><title>{title}</title><script>var tracking = {{}};</script>" \
+           f"<style>body {{ font-family: sans-serif; }}</style></head><body>"
+    nav = "<nav><ul>" + "".join(f"<li><a href='/page/{i}'>Link {i}</a></li>" for i in range(20)) + "</ul></nav>"
+    footer = "<footer><p>Copyright, privacy policy, terms of service.</p></footer></body></html>"
+
+    paragraph = f"<p>{LOREM}</p>"
+    budget = max(0, page_bytes - len(head) - len(nav) - len(footer) - 40)
+    body = f"<article><h1>{title}</h1>" + paragraph * (budget // len(paragraph) + 1) + "</article>"
+
+    return (head + nav + body + footer).encode("utf-8")
+
+
+class LocalPageServer:
+    """
+    Threaded local HTTP server serving synthetic HTML pages for WebCrawler.
+
+    Every path under /page/ returns a page of ``page_bytes`` after ``latency``
+    seconds; /robots.txt allows everything.
+    """
+
+    def __init__(self, page_bytes: int = 50000, latency: float = 0.0):
+        self.page_bytes = page_bytes
+        self.latency = latency
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                if self.path == "/robots.txt":
+                    body, content_type = b"User-agent: *\nAllow: /\n", "text/plain"
+                elif self.path.startswith("/page/"):
+                    if server.latency:
+                        time.sleep(server.latency)
+                    body, content_type = make_page(self.path.rsplit("/", 1)[-1], server.page_bytes), "text/html"
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalPageServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "LocalPageServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+@contextmanager
+def fake_environment(gemini_latency: float = 0.0, tavily_latency: float = 0.0, answer_chars: int = 3000,
+                     content_chars: int = 800, raw_content_chars: int = 5000,
+                     base_url: str = "http://127.0.0.1:9", draft_score: float = 6.0) -> Iterator[Dict[str, Any]]:
+    """
+    Patch the Gemini and Tavily clients with fakes while research components are built.
+
+    Components created inside the block keep their fake clients afterwards.
+    On-disk caches are disabled so every run measures the full pipeline. Drafts
+    get ``draft_score`` from analyze_draft; the default is below the quality
+    threshold, so drafts are refined.
+
+    Yields:
+        Dictionary with the list of created "models" and "tavily_clients"
+    """
+    created: Dict[str, List[Any]] = {"models": [], "tavily_clients": []}
+
+    def make_model(model_name: str, *args: Any, **kwargs: Any) -> FakeGeminiModel:
+        model = FakeGeminiModel(model_name, latency=gemini_latency, answer_chars=answer_chars,
+                                draft_score=draft_score)
+        created["models"].append(model)
+        return model
+
+    def make_tavily(api_key: str = "fake", *args: Any, **kwargs: Any) -> FakeTavilyClient:
+        client = FakeTavilyClient(api_key, latency=tavily_latency, content_chars=content_chars,
+                                  raw_content_chars=raw_content_chars, base_url=base_url)
+        created["tavily_clients"].append(client)
+        return client
+
+    env = {"GOOGLE_API_KEY": "fake", "TAVILY_API_KEY": "fake", "RESEARCH_CACHE_PATH": ""}
+    with patch.dict(os.environ, env), \
+            patch("google.generativeai.configure"), \
+            patch("google.generativeai.GenerativeModel", side_effect=make_model), \
+            patch("src.tools.tavily_search.TavilyClient", side_effect=make_tavily):
+        yield created
+
+
+def build_fake_coordinator(gemini_latency: float = 0.0, tavily_latency: float = 0.0,
+                           base_url: str = "http://127.0.0.1:9", **coordinator_options: Any):
+    """
+    Build a ResearchCoordinator whose Gemini and Tavily clients are local fakes.
+
+    Args:
+        gemini_latency: Seconds each fake model call takes
+        tavily_latency: Seconds each fake search takes
+        base_url: Base URL of the page server the fake search results point to
+        **coordinator_options: Options passed to ResearchCoordinator
+
+    Returns:
+        The coordinator
+    """
+    from src.agents.coordinator import ResearchCoordinator
+
+    with fake_environment(gemini_latency=gemini_latency, tavily_latency=tavily_latency, base_url=base_url):
+        return ResearchCoordinator(**coordinator_options)
@@ -0,0 +1,252 @@
+# benchmarks/run_benchmarks.py
+"""
+Offline end-to-end benchmark of the research workflow.
+
+Runs ResearchCoordinator against the local fakes in benchmarks.fakes and writes
+per-step latency, end-to-end latency, throughput under concurrency and peak
+memory to a JSON file so regressions can be tracked between commits.
+
+Usage:
+    python -m benchmarks.run_benchmarks --runs 5 --concurrency 4 --output bench_results.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.fakes import LocalPageServer, build_fake_coordinator
+from src.tools.web_crawler import WebCrawler
+from src.utils.tracing import Tracer, use_tracer
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(percentile / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _latency_stats(values: List[float]) -> Dict[str, float]:
+    return {
+        "mean": round(statistics.mean(values), 4) if values else 0.0,
+        "p50": round(_percentile(values, 50), 4),
+        "p95": round(_percentile(values, 95), 4),
+        "max": round(max(values), 4) if values else 0.0
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def bench_pipeline(coordinator, runs: int) -> Dict[str, Any]:
+    """
+    Run the workflow sequentially and collect end-to-end and per-step latency.
+    """
+    end_to_end = []
+    steps: Dict[str, List[float]] = {}
+    calls: Dict[str, List[int]] = {}
+    sources: List[int] = []
+    removed: List[int] = []
+
+    for i in range(runs):
+        tracer = Tracer()
+        started = time.perf_counter()
+        for event in coordinator.iter_research(f"benchmark query {i}", tracer=tracer):
+            if event.step == "conduct_research" and event.kind == "step_completed":
+                research_results = event.data.get("research_results", {})
+                sources.append(len(research_results.get("sources", [])))
+                removed.append(len(research_results.get("removed_sources", [])))
+        end_to_end.append(time.perf_counter() - started)
+
+        summary = tracer.summary()
+        for node, duration_ms in summary["nodes"].items():
+            steps.setdefault(node, []).append(duration_ms / 1000)
+        for kind, totals in summary["calls"].items():
+            calls.setdefault(kind, []).append(totals["count"])
+
+    # The fake search results are all distinct; if deduplication removes any, the
+    # run measures a smaller pipeline than the one configured
+    if any(removed):
+        raise RuntimeError(f"Deduplication removed fake sources ({removed} per run); "
+                           f"the benchmark would not measure the configured pipeline")
+
+    return {
+        "runs": runs,
+        "sources_per_run": statistics.mean(sources) if sources else 0,
+        "end_to_end_s": _latency_stats(end_to_end),
+        "steps_s": {node: _latency_stats(values) for node, values in steps.items()},
+        "calls_per_run": {kind: statistics.mean(counts) for kind, counts in calls.items()}
+    }
+
+
+def bench_concurrency(coordinator, queries: int, concurrency: int) -> Dict[str, Any]:
+    """
+    Run many queries through a shared coordinator and measure throughput.
+    """
+    latencies = []
+
+    def run_one(i):
+        started = time.perf_counter()
+        coordinator.execute_research(f"concurrent benchmark query {i}", tracer=Tracer())
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(run_one, range(queries)))
+    wall_time = time.perf_counter() - started
+
+    return {
+        "queries": queries,
+        "concurrency": concurrency,
+        "wall_time_s": round(wall_time, 4),
+        "throughput_per_s": round(queries / wall_time, 4) if wall_time else 0.0,
+        "latency_s": _latency_stats(latencies)
+    }
+
+
+def bench_crawler(server: LocalPageServer, pages: int, concurrency: int = 8,
+                  parse_workers: int = 0) -> Dict[str, Any]:
+    """
+    Crawl pages from the local server and measure fetch and parse throughput.
+
+    Politeness delays are disabled and the per-host limit matches the global
+    one, since every page comes from the same local host. With parse_workers
+    set, pages are parsed in a process pool that is warmed up before timing.
+    """
+    urls = [f"{server.base_url}/page/bench-{i}" for i in range(pages)]
+    crawler = WebCrawler(max_concurrency=concurrency, per_host_concurrency=concurrency,
+                         min_host_delay=0, max_host_delay=0, parse_workers=parse_workers, min_pool_batch=1,
+                         use_cache=False)
+    if parse_workers:
+        crawler.crawl_urls([f"{server.base_url}/page/warmup-{i}" for i in range(parse_workers)])
+    tracer = Tracer()
+
+    started = time.perf_counter()
+    try:
+        with use_tracer(tracer):
+            results = crawler.crawl_urls(urls)
+    finally:
+        crawler.close()
+    wall_time = time.perf_counter() - started
+
+    http = tracer.summary()["calls"].get("http", {})
+    return {
+        "pages": pages,
+        "concurrency": concurrency,
+        "parse_workers": parse_workers,
+        "crawled": len(results),
+        "wall_time_s": round(wall_time, 4),
+        "pages_per_s": round(len(results) / wall_time, 4) if wall_time else 0.0,
+        "bytes": http.get("bytes", 0)
+    }
+
+
+def run_benchmarks(runs: int = 5, concurrency: int = 4, concurrent_queries: int = 16,
+                   gemini_latency: float = 0.05, tavily_latency: float = 0.02,
+                   page_bytes: int = 100000, page_latency: float = 0.01, crawl_pages: int = 20,
+                   parse_workers: int = 0,
+                   coordinator_options: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Run the whole benchmark suite and return machine-readable results.
+    """
+    coordinator_options = coordinator_options or {}
+
+    with LocalPageServer(page_bytes=page_bytes, latency=page_latency) as server:
+        coordinator = build_fake_coordinator(
+            gemini_latency=gemini_latency, tavily_latency=tavily_latency,
+            base_url=server.base_url, **coordinator_options
+        )
+
+        tracemalloc.start()
+        pipeline = bench_pipeline(coordinator, runs)
+        concurrent = bench_concurrency(coordinator, concurrent_queries, concurrency)
+        crawler = bench_crawler(server, crawl_pages, parse_workers=parse_workers)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "runs": runs,
+            "concurrency": concurrency,
+            "concurrent_queries": concurrent_queries,
+            "gemini_latency_s": gemini_latency,
+            "tavily_latency_s": tavily_latency,
+            "page_bytes": page_bytes,
+            "page_latency_s": page_latency,
+            "crawl_pages": crawl_pages,
+            "parse_workers": parse_workers,
+            "coordinator_options": coordinator_options
+        },
+        "pipeline": pipeline,
+        "concurrency": concurrent,
+        "crawler": crawler,
+        "peak_memory_mb": round(peak / (1024 * 1024), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the research workflow')
+    parser.add_argument('--runs', type=int, default=5, help='Sequential pipeline runs')
+    parser.add_argument('--concurrency', type=int, default=4, help='Worker threads for the throughput test')
+    parser.add_argument('--concurrent-queries', type=int, default=16, help='Queries in the throughput test')
+    parser.add_argument('--gemini-latency', type=float, default=0.05, help='Seconds per fake Gemini call')
+    parser.add_argument('--tavily-latency', type=float, default=0.02, help='Seconds per fake Tavily search')
+    parser.add_argument('--page-bytes', type=int, default=100000, help='Size of each served HTML page')
+    parser.add_argument('--page-latency', type=float, default=0.01, help='Seconds per served page')
+    parser.add_argument('--crawl-pages', type=int, default=20, help='Pages in the crawler test')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='Processes parsing pages in the crawler test (0 = parse in-process)')
+    parser.add_argument('--pipeline', choices=['standard', 'fused'], default='standard', help='Pipeline mode')
+    parser.add_argument('--output', '-o', type=str, default='bench_results.json', help='Results file')
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        runs=args.runs,
+        concurrency=args.concurrency,
+        concurrent_queries=args.concurrent_queries,
+        gemini_latency=args.gemini_latency,
+        tavily_latency=args.tavily_latency,
+        page_bytes=args.page_bytes,
+        page_latency=args.page_latency,
+        crawl_pages=args.crawl_pages,
+        parse_workers=args.parse_workers,
+        coordinator_options={"pipeline_mode": args.pipeline}
+    )
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    pipeline = results["pipeline"]["end_to_end_s"]
+    print(f"End-to-end: p50 {pipeline['p50']:.3f}s, p95 {pipeline['p95']:.3f}s")
+    for node, stats in results["pipeline"]["steps_s"].items():
+        print(f"  {node}: mean {stats['mean']:.3f}s")
+    print(f"Throughput: {results['concurrency']['throughput_per_s']:.2f} queries/s "
+          f"at concurrency {results['concurrency']['concurrency']}")
+    print(f"Crawler: {results['crawler']['pages_per_s']:.2f} pages/s")
+    print(f"Peak memory: {results['peak_memory_mb']:.1f} MB")
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
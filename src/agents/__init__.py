@@ -5,5 +5,6 @@ AI agents for performing research tasks and drafting answers.
 from .researcher import ResearcherAgent
 from .drafter import DrafterAgent
 from .coordinator import ResearchCoordinator
+from .progress import ProgressEvent
 
-__all__ = ["ResearcherAgent", "DrafterAgent", "ResearchCoordinator"]
\ No newline at end of file
+__all__ = ["ResearcherAgent", "DrafterAgent", "ResearchCoordinator", "ProgressEvent"]
\ No newline at end of file
@@ -1,6 +1,13 @@
 # src/agents/coordinator.py
-from typing import Dict, List, Any, Tuple
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Any, Optional, Tuple
+import asyncio
+import contextvars
 import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
 from dotenv import load_dotenv
 from langchain.schema import Document
 from langchain_core.messages import HumanMessage, AIMessage
@@ -10,19 +17,87 @@ import google.generativeai as genai
 from typing import TypedDict
 from .researcher import ResearcherAgent
 from .drafter import DrafterAgent
+from .progress import (
+    ANSWER_CHUNK, ANSWER_STARTED, RUN_COMPLETED, RUN_STARTED, STEP_COMPLETED, ProgressEvent, ResearchCancelled
+)
+from src.utils.checkpoints import CheckpointStore
+from src.utils.hedging import HedgingPolicy
+from src.utils.helpers import parse_json_response
+from src.utils.llm import LLMClient
+from src.utils.tracing import Tracer, bind_context, get_current_tracer, trace_span, use_tracer
 
 load_dotenv()
 
+# Workflow nodes in the order they run
+NODE_ORDER = ["parse_query", "conduct_research", "generate_draft", "analyze_draft", "refine_answer"]
+
+# Runs speculative searches for every coordinator in the process; its threads are
+# started on demand and reused, so coordinators built per run do not leak them
+_speculative_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculative-search")
+
+# Put on a run's event queue after its last event
+_RUN_DONE = object()
+
+# Event set when the current run is cancelled
+_run_cancelled: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "run_cancelled", default=None
+)
+
+# Callback of the current run receiving (step, text) as answers are generated
+_answer_stream: contextvars.ContextVar[Optional[Callable[[str, str], None]]] = contextvars.ContextVar(
+    "answer_stream", default=None
+)
+
+# Callback of the current run receiving the step each time a new answer starts streaming
+_answer_started: contextvars.ContextVar[Optional[Callable[[str], None]]] = contextvars.ContextVar(
+    "answer_started", default=None
+)
+
 
 class ResearchCoordinator:
     """
     Coordinator that orchestrates the research process using LangGraph.
     """
 
-    def __init__(self):
+    def __init__(self, pipeline_mode: str = "standard", speculative_search: bool = False,
+                 speculative_timeout: float = 5.0, research_depth: str = "basic",
+                 checkpoint_store: Optional[CheckpointStore] = None,
+                 hedging: Optional[HedgingPolicy] = None, quality_threshold: float = 8.0,
+                 max_refinements: int = 1, refine_mode: Optional[str] = None):
+        """
+        Args:
+            pipeline_mode: "standard", or "fused" to combine topic parsing with query
+                generation and extraction with summarization, saving two LLM round trips
+            speculative_search: Search the raw query while the topic is being parsed
+            speculative_timeout: Seconds to keep waiting for the speculative search
+                once parsing has finished before ignoring it
+            research_depth: "basic", or "advanced" to search deeper and work from the
+                full text of every source
+            checkpoint_store: Store receiving the workflow state after every step, so
+                interrupted runs can be resumed (None disables checkpoints)
+            hedging: Policy hedging the drafter's slow LLM calls (None uses the environment's)
+            quality_threshold: Quality score (1-10) from analyze_draft at which a draft is
+                final without refinement; above 10 the draft is always refined
+            max_refinements: Refinements a draft may get; above 1, each refinement is
+                analyzed again and refined once more while it scores below the threshold
+            refine_mode: "full" or "sections" refinement in the drafter (None uses
+                DRAFT_REFINE_MODE)
+        """
+        if pipeline_mode not in ("standard", "fused"):
+            raise ValueError(f"Unknown pipeline mode: {pipeline_mode}")
+        if research_depth not in ("basic", "advanced"):
+            raise ValueError(f"Unknown research depth: {research_depth}")
+        self.research_depth = research_depth
+        self.quality_threshold = quality_threshold
+        self.max_refinements = max_refinements
+        self.checkpoint_store = checkpoint_store
+        self.pipeline_mode = pipeline_mode
+        self.speculative_search = speculative_search
+        self.speculative_timeout = speculative_timeout
+
         # Initialize agents
         self.researcher = ResearcherAgent()
-        self.drafter = DrafterAgent()
+        self.drafter = DrafterAgent(hedging=hedging, refine_mode=refine_mode)
 
         # Set up Google API for analysis
         api_key = os.getenv("GOOGLE_API_KEY")
@@ -31,11 +106,63 @@ class ResearchCoordinator:
 
         # Configure the Gemini model for coordination
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-pro')
+        model_name = 'gemini-1.5-pro'
+        self.model = LLMClient(genai.GenerativeModel(model_name), model_name)
 
         # Create the research workflow graph
         self.workflow = self._create_workflow()
 
+    def _start_speculative_search(self, query: str) -> Future:
+        """
+        Start searching the raw user query in the background.
+
+        Args:
+            query: The user's research query
+
+        Returns:
+            Future resolving to the list of sources found
+        """
+        def search():
+            sources = self.researcher.search_tool.get_sources(query)
+            for source in sources:
+                source["query"] = query
+            return sources
+
+        return _speculative_executor.submit(bind_context(search))
+
+    def _finish_speculative_search(self, future: Future) -> List[Dict[str, Any]]:
+        """
+        Collect the result of a speculative search, giving up if it is too slow.
+
+        Args:
+            future: Future returned by _start_speculative_search
+
+        Returns:
+            Sources found, or an empty list if the search failed or timed out
+        """
+        try:
+            return future.result(timeout=self.speculative_timeout)
+        except TimeoutError:
+            future.cancel()
+            print("Speculative search timed out, continuing without it")
+        except Exception as e:
+            print(f"Speculative search failed: {e}")
+        return []
+
+    def close(self) -> None:
+        """
+        Release the resources the agents keep between runs, such as the
+        crawler's parsing process pool. The coordinator can still be used
+        afterwards; the resources are recreated on demand.
+        """
+        self.researcher.close()
+
+    def __enter__(self) -> "ResearchCoordinator":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
     def _create_workflow(self) -> StateGraph:
         """
         Create the research workflow graph using LangGraph.
@@ -52,8 +179,11 @@ class ResearchCoordinator:
             draft_answer: Dict[str, Any]
             feedback: str
             final_answer: Dict[str, Any]
+            quality: Dict[str, Any]
+            refinements: int
             current_step: str
             complete: bool
+            resume_node: str
 
         # Create the workflow graph
         workflow = StateGraph(State)
@@ -61,9 +191,7 @@ class ResearchCoordinator:
         # Define the nodes (steps) in our workflow
 
         # 1. Parse Query - Analyzes the user query and extracts the research topic
-        def parse_query(state: State) -> State:
-            query = state["research_query"]
-
+        def extract_topic(query: str) -> str:
             prompt = f"""
             Analyze the following research query and extract the main research topic or question:
 
@@ -72,26 +200,60 @@ class ResearchCoordinator:
             Provide just the main research topic as a concise phrase or question.
             """
 
-            response = self.model.generate_content(prompt)
-            topic = response.text.strip()
+            response = self.model.generate_content(prompt, step="parse_query")
+            return response.text.strip()
+
+        def parse_query(state: State) -> State:
+            query = state["research_query"]
+
+            # Search I/O for the raw query overlaps with the LLM call below
+            speculative = self._start_speculative_search(query) if self.speculative_search else None
+
+            if self.pipeline_mode == "fused":
+                # Topic and search queries come from one structured response; the
+                # planned queries ride along in research_results until research runs
+                plan = self.researcher.plan_research(query)
+                update = {
+                    "topic": plan["topic"],
+                    "research_results": {"queries": plan["queries"]},
+                    "current_step": "parse_query"
+                }
+            else:
+                update = {"topic": extract_topic(query), "current_step": "parse_query"}
+
+            if speculative is not None:
+                pending = dict(update.get("research_results", {}))
+                pending["speculative_sources"] = self._finish_speculative_search(speculative)
+                update["research_results"] = pending
 
-            return {"topic": topic, "current_step": "parse_query"}
+            return update
 
         # 2. Conduct Research - Uses the researcher agent to gather information
         def conduct_research(state: State) -> State:
             topic = state["topic"]
-            results = self.researcher.research(topic)
+            pending = state.get("research_results", {})
+
+            options = {}
+            if self.pipeline_mode == "fused":
+                options["queries"] = pending.get("queries")
+                options["fused"] = True
+            if pending.get("speculative_sources"):
+                options["extra_sources"] = pending["speculative_sources"]
+            if self.research_depth != "basic":
+                options["depth"] = self.research_depth
+
+            results = self.researcher.research(topic, **options)
 
             return {"research_results": results, "current_step": "conduct_research"}
 
         # 3. Draft Answer - Uses the drafter agent to create an initial draft
         def draft_answer(state: State) -> State:
             research_results = state["research_results"]
-            draft = self.drafter.draft_answer(research_results)
+            draft = self.drafter.draft_answer(research_results, **self._stream_options("draft_answer"))
 
             return {"draft_answer": draft, "current_step": "draft_answer"}
 
-        # 4. Analyze Draft - Analyzes the draft for quality and suggests improvements
+        # 4. Analyze Draft - Scores the draft and suggests improvements
         def analyze_draft(state: State) -> State:
             draft = state["draft_answer"]
             answer_text = draft.get("answer", "")
@@ -109,69 +271,429 @@ class ResearchCoordinator:
             3. Clarity and readability
             4. Use of evidence and sources
 
-            Provide concise, actionable feedback that can be used to improve the draft.
+            Respond with a JSON object in this format:
+            {{
+                "score": <overall quality from 1 to 10, where 8 or more means no significant problems>,
+                "issues": ["significant problem 1", "significant problem 2", ...],
+                "feedback": "concise, actionable feedback that can be used to improve the draft"
+            }}
             """
 
-            response = self.model.generate_content(prompt)
-            feedback = response.text.strip()
+            response = self.model.generate_content(prompt, step="analyze_draft")
+            quality = self._parse_quality(response.text)
+
+            update = {"feedback": quality.pop("feedback"), "quality": quality, "current_step": "analyze_draft"}
+
+            refinements = state.get("refinements", 0)
+            if self._draft_is_final(quality, refinements):
+                # Good enough (or out of refinements): the draft is the final answer
+                update["final_answer"] = dict(draft, quality=quality, refinements=refinements)
+                update["complete"] = True
 
-            return {"feedback": feedback, "current_step": "analyze_draft"}
+            return update
 
         # 5. Refine Answer - Refines the draft based on feedback
         def refine_answer(state: State) -> State:
             draft = state["draft_answer"]
             feedback = state["feedback"]
+            refinements = state.get("refinements", 0) + 1
 
-            refined = self.drafter.refine_answer(draft, feedback)
+            refined = self.drafter.refine_answer(draft, feedback, **self._stream_options("refine_answer"))
+            # The refined answer has not been scored; keep the score of the draft it replaced
+            # under its own key, so it is not mistaken for the answer's quality
+            refined = dict(refined, draft_quality=state.get("quality", {}), refinements=refinements)
+            refined.pop("quality", None)
 
-            return {"final_answer": refined, "current_step": "refine_answer", "complete": True}
+            update = {"draft_answer": refined, "refinements": refinements, "current_step": "refine_answer"}
+            if refinements >= self.max_refinements:
+                update["final_answer"] = refined
+                update["complete"] = True
 
-        # Add all nodes to the graph
-        workflow.add_node("parse_query", parse_query)
-        workflow.add_node("conduct_research", conduct_research)
-        workflow.add_node("generate_draft", draft_answer)
-        workflow.add_node("analyze_draft", analyze_draft)
-        workflow.add_node("refine_answer", refine_answer)
+            return update
+
+        # Add all nodes to the graph, each timed as a span of the run's trace
+        workflow.add_node("parse_query", self._traced_node("parse_query", parse_query))
+        workflow.add_node("conduct_research", self._traced_node("conduct_research", conduct_research))
+        workflow.add_node("generate_draft", self._traced_node("generate_draft", draft_answer))
+        workflow.add_node("analyze_draft", self._traced_node("analyze_draft", analyze_draft))
+        workflow.add_node("refine_answer", self._traced_node("refine_answer", refine_answer))
 
         # Define the edges (transitions) between nodes
         workflow.add_edge("parse_query", "conduct_research")
         workflow.add_edge("conduct_research", "generate_draft")
         workflow.add_edge("generate_draft", "analyze_draft")
-        workflow.add_edge("analyze_draft", "refine_answer")
-        workflow.add_edge("refine_answer", END)
 
-        # Set the entry point
-        workflow.set_entry_point("parse_query")
+        # Refine only drafts scoring below the threshold, re-analyzing while refinements remain
+        workflow.add_conditional_edges(
+            "analyze_draft",
+            lambda state: self._next_node("analyze_draft", state) or END,
+            {"refine_answer": "refine_answer", END: END}
+        )
+        workflow.add_conditional_edges(
+            "refine_answer",
+            lambda state: self._next_node("refine_answer", state) or END,
+            {"analyze_draft": "analyze_draft", END: END}
+        )
+
+        # Start at the first node, or at the node after the last checkpointed one
+        workflow.set_conditional_entry_point(
+            lambda state: state.get("resume_node") or "parse_query",
+            {node: node for node in NODE_ORDER}
+        )
 
         # Compile the workflow
         return workflow.compile()
 
-    def execute_research(self, query: str) -> Dict[str, Any]:
+    @staticmethod
+    def _traced_node(name: str, node):
         """
-        Execute the research process for a given query.
+        Wrap a graph node so each execution is recorded as a span, and so
+        cancelled runs do not start it.
 
         Args:
-            query: The research query or topic
+            name: Name of the node in the graph
+            node: The node function
 
         Returns:
-            Dictionary containing the complete research results
+            Wrapped node function
+        """
+        def run(state):
+            # A cancelled run starts no further steps
+            cancelled = _run_cancelled.get()
+            if cancelled is not None and cancelled.is_set():
+                raise ResearchCancelled()
+
+            with trace_span(name, "node"):
+                return node(state)
+
+        return run
+
+    @staticmethod
+    def _stream_options(step: str) -> Dict[str, Any]:
         """
-        # Initial state
-        initial_state = {
+        Get the drafter options streaming a step's answer to the run's callback.
+
+        Called once per answer, right before it is generated, so it also reports
+        the start of the answer: every refinement round replaces the previous answer.
+
+        Args:
+            step: Name of the drafting step
+
+        Returns:
+            {"on_chunk": callback} if the run streams its answers, otherwise {}
+        """
+        callback = _answer_stream.get()
+        if callback is None:
+            return {}
+        started = _answer_started.get()
+        if started is not None:
+            started(step)
+        return {"on_chunk": lambda text: callback(step, text)}
+
+    @staticmethod
+    def _parse_quality(text: str) -> Dict[str, Any]:
+        """
+        Read the score, issues and feedback from analyze_draft's response.
+
+        Args:
+            text: Raw response text
+
+        Returns:
+            Dictionary with score (None if the response had none), issues and feedback;
+            a response that is not JSON is used as the feedback as a whole
+        """
+        parsed = parse_json_response(text) or {}
+        try:
+            score = float(parsed["score"])
+        except (KeyError, TypeError, ValueError):
+            return {"score": None, "issues": [], "feedback": text.strip()}
+
+        issues = [str(issue) for issue in parsed.get("issues") or []]
+        feedback = str(parsed.get("feedback") or "").strip()
+        if issues:
+            feedback = "\n".join([feedback] + [f"- {issue}" for issue in issues]).strip()
+
+        return {"score": score, "issues": issues, "feedback": feedback}
+
+    def _draft_is_final(self, quality: Dict[str, Any], refinements: int) -> bool:
+        """Whether a draft needs no (further) refinement."""
+        if refinements >= self.max_refinements:
+            return True
+        # Without a score the draft is refined, as before scores existed
+        return quality.get("score") is not None and quality["score"] >= self.quality_threshold
+
+    @staticmethod
+    def _next_node(node: str, state: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the node that runs after a completed one.
+
+        The steps up to analyze_draft run in order. After that, the workflow
+        alternates between refine_answer and analyze_draft until a step marks
+        the state complete.
+
+        Args:
+            node: Name of the completed node
+            state: Workflow state after the node
+
+        Returns:
+            Name of the next node, or None if the workflow is finished
+        """
+        if node == "analyze_draft":
+            return None if state.get("complete") else "refine_answer"
+        if node == "refine_answer":
+            return None if state.get("complete") else "analyze_draft"
+
+        position = NODE_ORDER.index(node)
+        return NODE_ORDER[position + 1] if position + 1 < len(NODE_ORDER) else None
+
+    @staticmethod
+    def _initial_state(query: str) -> Dict[str, Any]:
+        """Workflow state of a new run for a query."""
+        return {
             "topic": "",
             "research_query": query,
             "research_results": {},
             "draft_answer": {},
             "feedback": "",
             "final_answer": {},
+            "quality": {},
+            "refinements": 0,
             "current_step": "",
-            "complete": False
+            "complete": False,
+            "resume_node": "parse_query"
         }
 
-        # Execute the workflow
+    def execute_research(self, query: str, tracer: Optional[Tracer] = None, run_id: Optional[str] = None,
+                         on_chunk: Optional[Callable[[str, str], None]] = None,
+                         on_answer_start: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Execute the research process for a given query.
+
+        Args:
+            query: The research query or topic
+            tracer: Tracer recording per-step and per-call timings for this run
+            run_id: Id the run is checkpointed under (defaults to the tracer's run id)
+            on_chunk: Callback receiving (step, text) as the draft and refined answers
+                are generated, for showing them before the run finishes
+            on_answer_start: Callback receiving the step each time a new answer (the
+                draft, then every refinement round) starts streaming and replaces the last
+
+        Returns:
+            Dictionary containing the complete research results
+        """
+        events = self.iter_research(query, tracer=tracer, run_id=run_id, stream_answers=on_chunk is not None)
+        return self._consume(events, on_chunk, on_answer_start)
+
+    def iter_research(self, query: str, tracer: Optional[Tracer] = None, run_id: Optional[str] = None,
+                      stream_answers: bool = False) -> Iterator[ProgressEvent]:
+        """
+        Run the research process, yielding progress events as it goes.
+
+        The workflow runs on a background thread. Closing the iterator (or
+        breaking out of the loop) cancels the run: no further step starts, and
+        an answer being streamed stops at its next chunk. Completed steps stay
+        checkpointed, so a cancelled run can be resumed.
+
+        Args:
+            query: The research query or topic
+            tracer: Tracer recording per-step and per-call timings for this run
+            run_id: Id the run is checkpointed under (defaults to the tracer's run id)
+            stream_answers: Also yield an "answer_started" event when each draft or refined
+                answer begins, then "answer_chunk" events while it is generated
+
+        Yields:
+            ProgressEvent for the start, every completed step, answer chunks and the end
+
+        Raises:
+            Exception: Any error that stopped the workflow
+        """
+        tracer = tracer or get_current_tracer()
+        run_id = run_id or (tracer.run_id if tracer is not None else uuid.uuid4().hex[:12])
+        return self._iter_workflow(self._initial_state(query), run_id, tracer, stream_answers)
+
+    async def aiter_research(self, query: str, tracer: Optional[Tracer] = None, run_id: Optional[str] = None,
+                             stream_answers: bool = False) -> AsyncIterator[ProgressEvent]:
+        """
+        Async version of iter_research for event loops.
+
+        Cancelling the consuming task or closing the generator cancels the run.
+
+        Args:
+            query: The research query or topic
+            tracer: Tracer recording per-step and per-call timings for this run
+            run_id: Id the run is checkpointed under (defaults to the tracer's run id)
+            stream_answers: Also yield "answer_started" and "answer_chunk" events
+
+        Yields:
+            ProgressEvent for the start, every completed step, answer chunks and the end
+        """
+        tracer = tracer or get_current_tracer()
+        run_id = run_id or (tracer.run_id if tracer is not None else uuid.uuid4().hex[:12])
+        events, cancelled = self._start_workflow(self._initial_state(query), run_id, tracer, stream_answers)
+        try:
+            while True:
+                event = await asyncio.to_thread(events.get)
+                if event is _RUN_DONE:
+                    return
+                if isinstance(event, BaseException):
+                    raise event
+                yield event
+        finally:
+            cancelled.set()
+
+    def resume_research(self, run_id: str, tracer: Optional[Tracer] = None,
+                        on_chunk: Optional[Callable[[str, str], None]] = None,
+                        on_answer_start: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Continue an interrupted run from the step after its last checkpoint.
+
+        Completed steps are not run again, so their searches and model calls are
+        not repeated. Resuming a finished run returns its results.
+
+        Args:
+            run_id: Id of the run to resume
+            tracer: Tracer recording the remaining steps
+            on_chunk: Callback receiving (step, text) as answers are generated
+            on_answer_start: Callback receiving the step each time a new answer starts streaming
+
+        Returns:
+            Dictionary containing the complete research results
+        """
+        if self.checkpoint_store is None:
+            raise ValueError("Resuming a run requires a checkpoint store")
+
+        checkpoint = self.checkpoint_store.load(run_id)
+        if checkpoint is None:
+            raise ValueError(f"No checkpoint found for run {run_id}")
+
+        if checkpoint["next_node"] is None:
+            print(f"Run {run_id} already completed")
+            return checkpoint["last_event"]
+
+        print(f"Resuming run {run_id} at step: {checkpoint['next_node']}")
+        state = dict(checkpoint["state"], resume_node=checkpoint["next_node"])
+        events = self._iter_workflow(state, run_id, tracer or get_current_tracer(), on_chunk is not None)
+        return self._consume(events, on_chunk, on_answer_start)
+
+    @staticmethod
+    def _consume(events: Iterator[ProgressEvent], on_chunk: Optional[Callable[[str, str], None]],
+                 on_answer_start: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Run a workflow to the end, printing its steps and passing answer chunks on.
+
+        Returns:
+            The last workflow event (the final step's output)
+        """
         results = {}
-        for event in self.workflow.stream(initial_state):
-            results = event
-            print(f"Completed step: {results.get('current_step', 'unknown')}")
+        for event in events:
+            if event.kind == STEP_COMPLETED:
+                print(f"Completed step: {event.step}")
+            elif event.kind == ANSWER_STARTED and on_answer_start is not None:
+                on_answer_start(event.step)
+            elif event.kind == ANSWER_CHUNK:
+                on_chunk(event.step, event.text)
+            elif event.kind == RUN_COMPLETED:
+                results = event.data
+        return results
+
+    def _iter_workflow(self, state: Dict[str, Any], run_id: str, tracer: Optional[Tracer],
+                       stream_answers: bool = False) -> Iterator[ProgressEvent]:
+        """
+        Run the workflow from the state's resume node, yielding its progress events.
 
-        return results
\ No newline at end of file
+        The run is cancelled when the generator is closed before the end.
+        """
+        events, cancelled = self._start_workflow(state, run_id, tracer, stream_answers)
+        try:
+            while True:
+                event = events.get()
+                if event is _RUN_DONE:
+                    return
+                if isinstance(event, BaseException):
+                    raise event
+                yield event
+        finally:
+            cancelled.set()
+
+    def _start_workflow(self, state: Dict[str, Any], run_id: str, tracer: Optional[Tracer],
+                        stream_answers: bool = False) -> Tuple["queue.Queue", threading.Event]:
+        """
+        Start the workflow on a background thread, checkpointing after every step.
+
+        Args:
+            state: Workflow state to start from
+            run_id: Id the run is checkpointed under
+            tracer: Tracer recording the run
+            stream_answers: Report answer chunks while the answers are generated
+
+        Returns:
+            Tuple of (queue receiving ProgressEvents, then an exception if the run failed,
+            then _RUN_DONE; event that cancels the run when set)
+        """
+        state = dict(state)
+        query = state["research_query"]
+        events: "queue.Queue" = queue.Queue()
+        cancelled = threading.Event()
+        started = time.perf_counter()
+
+        def emit(kind: str, **fields: Any) -> None:
+            events.put(ProgressEvent(kind, run_id, round(time.perf_counter() - started, 3), **fields))
+
+        def on_chunk(step: str, text: str) -> None:
+            if cancelled.is_set():
+                raise ResearchCancelled()
+            emit(ANSWER_CHUNK, step=step, text=text)
+
+        def on_answer_start(step: str) -> None:
+            if cancelled.is_set():
+                raise ResearchCancelled()
+            emit(ANSWER_STARTED, step=step)
+
+        def run() -> None:
+            stream_token = _answer_stream.set(on_chunk if stream_answers else None)
+            started_token = _answer_started.set(on_answer_start if stream_answers else None)
+            _run_cancelled.set(cancelled)
+            try:
+                emit(RUN_STARTED, data={"query": query, "resume_node": state.get("resume_node")})
+                results = {}
+                with use_tracer(tracer):
+                    with trace_span("execute_research", "run", query=query, run_id=run_id):
+                        step_started = time.perf_counter()
+                        for event in self.workflow.stream(state):
+                            results = event
+                            step = next(iter(event), "unknown")
+
+                            if self.checkpoint_store is not None and step in NODE_ORDER:
+                                state.update(event[step] or {})
+                                next_node = self._next_node(step, state)
+                                checkpoint = {
+                                    "query": query,
+                                    "completed_step": step,
+                                    "next_node": next_node,
+                                    "last_event": event
+                                }
+                                # A finished run only needs its results; the workflow
+                                # state (sources, drafts) is kept only while it can resume
+                                if next_node is not None:
+                                    checkpoint["state"] = state
+                                self.checkpoint_store.save(run_id, checkpoint)
+                                if next_node is None:
+                                    self.checkpoint_store.prune()
+
+                            now = time.perf_counter()
+                            emit(STEP_COMPLETED, step=step, data=event[step] or {},
+                                 step_s=round(now - step_started, 3))
+                            step_started = now
+
+                emit(RUN_COMPLETED, data=results)
+            except ResearchCancelled:
+                print(f"Run {run_id} cancelled")
+            except Exception as e:
+                events.put(e)
+            finally:
+                _answer_stream.reset(stream_token)
+                _answer_started.reset(started_token)
+                events.put(_RUN_DONE)
+
+        threading.Thread(target=bind_context(run), name=f"research-{run_id}", daemon=True).start()
+        return events, cancelled
@@ -1,8 +1,15 @@
 # src/agents/drafter.py
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional, Tuple
 import google.generativeai as genai
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from src.utils.context_packer import ContextPacker
+from src.utils.hedging import HedgingPolicy, default_hedging_policy
+from src.utils.helpers import split_markdown_sections
+from src.utils.llm import LLMClient
+from src.utils.tracing import bind_context
 
 load_dotenv()
 
@@ -12,7 +19,24 @@ class DrafterAgent:
     An agent responsible for drafting answers and responses based on research data.
     """
 
-    def __init__(self):
+    def __init__(self, hedging: Optional[HedgingPolicy] = None, refine_mode: Optional[str] = None,
+                 max_refine_workers: int = 4):
+        """
+        Args:
+            hedging: Policy hedging slow draft and refine calls (None uses the
+                environment's policy, which is off unless LLM_HEDGE_STEPS is set)
+            refine_mode: "full" to regenerate the whole answer when refining, or
+                "sections" to rewrite only the sections the feedback is about
+                (None reads DRAFT_REFINE_MODE, default "full")
+            max_refine_workers: Sections rewritten at once in "sections" mode
+        """
+        if refine_mode is None:
+            refine_mode = os.getenv("DRAFT_REFINE_MODE", "full") or "full"
+        if refine_mode not in ("full", "sections"):
+            raise ValueError(f"Unknown refine mode: {refine_mode}")
+        self.refine_mode = refine_mode
+        self.max_refine_workers = max_refine_workers
+
         # Set up Google API key
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
@@ -20,7 +44,10 @@ class DrafterAgent:
 
         # Configure the Gemini model
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash-preview-04-17')
+        model_name = 'gemini-2.5-flash-preview-04-17'
+        if hedging is None:
+            hedging = default_hedging_policy()
+        self.model = LLMClient(genai.GenerativeModel(model_name), model_name, hedging=hedging)
 
     def _format_research_data(self, research_data: Dict[str, Any]) -> str:
         """
@@ -84,13 +111,15 @@ class DrafterAgent:
 
         return formatted_text
 
-    def draft_answer(self, research_data: Dict[str, Any], output_format: str = "markdown") -> Dict[str, Any]:
+    def draft_answer(self, research_data: Dict[str, Any], output_format: str = "markdown",
+                     on_chunk: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Draft a comprehensive answer based on research data.
 
         Args:
             research_data: The research data from the researcher agent
             output_format: The desired output format (markdown, plain_text, etc.)
+            on_chunk: Callback receiving the answer text as it is generated
 
         Returns:
             Dictionary containing the drafted answer and metadata
@@ -121,7 +150,7 @@ class DrafterAgent:
         """
 
         # Generate the answer
-        response = self.model.generate_content(prompt)
+        response = self.model.generate_content(prompt, step="draft_answer", on_chunk=on_chunk)
 
         # Return the drafted answer with metadata
         result = {
@@ -134,17 +163,60 @@ class DrafterAgent:
 
         return result
 
-    def refine_answer(self, draft_answer: Dict[str, Any], feedback: str) -> Dict[str, Any]:
+    def refine_answer(self, draft_answer: Dict[str, Any], feedback: str,
+                      on_chunk: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Refine a drafted answer based on feedback.
 
+        In "sections" mode only the sections the feedback is about are rewritten;
+        the whole answer is regenerated when the draft has a single section or
+        no feedback item can be tied to a section.
+
         Args:
             draft_answer: The draft answer to refine
             feedback: Feedback for improvement
+            on_chunk: Callback receiving the refined text as it is generated; sections
+                are rewritten in parallel, so in "sections" mode it gets the spliced
+                answer in one piece
 
         Returns:
             Dictionary containing the refined answer and metadata
         """
+        refined_text = None
+        refined_sections = None
+        if self.refine_mode == "sections":
+            refined = self._refine_sections(draft_answer, feedback)
+            if refined is not None:
+                refined_text, refined_sections = refined
+                if on_chunk is not None:
+                    on_chunk(refined_text)
+
+        if refined_text is None:
+            refined_text = self._refine_full(draft_answer, feedback, on_chunk)
+
+        # Update the draft answer with the refined version
+        refined_answer = draft_answer.copy()
+        refined_answer["answer"] = refined_text
+        refined_answer["refined"] = True
+        refined_answer["feedback"] = feedback
+        if refined_sections is not None:
+            refined_answer["refined_sections"] = refined_sections
+
+        return refined_answer
+
+    def _refine_full(self, draft_answer: Dict[str, Any], feedback: str,
+                     on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Regenerate the whole answer with the feedback applied.
+
+        Args:
+            draft_answer: The draft answer to refine
+            feedback: Feedback for improvement
+            on_chunk: Callback receiving the refined text as it is generated
+
+        Returns:
+            The refined answer text
+        """
         topic = draft_answer.get("topic", "Unknown Topic")
         original_answer = draft_answer.get("answer", "")
         output_format = draft_answer.get("format", "markdown")
@@ -171,12 +243,154 @@ class DrafterAgent:
         """
 
         # Generate the refined answer
-        response = self.model.generate_content(prompt)
+        response = self.model.generate_content(prompt, step="refine_answer", on_chunk=on_chunk)
+        return response.text
 
-        # Update the draft answer with the refined version
-        refined_answer = draft_answer.copy()
-        refined_answer["answer"] = response.text
-        refined_answer["refined"] = True
-        refined_answer["feedback"] = feedback
+    @staticmethod
+    def _split_feedback(feedback: str) -> List[str]:
+        """
+        Split feedback into items: one per bullet or numbered point, or per line
+        when the feedback has no list markers.
+
+        Args:
+            feedback: Feedback text
+
+        Returns:
+            List of feedback items
+        """
+        items: List[str] = []
+        for line in feedback.splitlines():
+            text = line.strip()
+            if not text:
+                continue
+            marker = re.match(r'^(?:[-*+]|\d+[.)])\s+', text)
+            if marker or not items or not line[:1].isspace():
+                items.append(text[marker.end():] if marker else text)
+            else:
+                # Indented continuation of the previous point
+                items[-1] = f"{items[-1]} {text}"
+        return items
+
+    @staticmethod
+    def _map_feedback(sections: List[str], items: List[str]) -> Dict[int, List[str]]:
+        """
+        Tie each feedback item to the section it is most about, by BM25 score.
+
+        Args:
+            sections: Sections of the draft
+            items: Feedback items
+
+        Returns:
+            Dictionary of section index to its feedback items; items matching
+            no section are listed under -1
+        """
+        packer = ContextPacker()
+        mapping: Dict[int, List[str]] = {}
+        for item in items:
+            scores = packer.score(sections, item)
+            best = int(scores.argmax()) if len(scores) and scores.max() > 0 else -1
+            mapping.setdefault(best, []).append(item)
+        return mapping
+
+    def _refine_sections(self, draft_answer: Dict[str, Any], feedback: str) -> Optional[Tuple[str, List[str]]]:
+        """
+        Rewrite only the sections the feedback is about, in parallel, and splice
+        them back in order. Untouched sections are kept byte for byte.
+
+        Args:
+            draft_answer: The draft answer to refine
+            feedback: Feedback for improvement
+
+        Returns:
+            Tuple of (refined answer text, headings of the rewritten sections), or
+            None if the draft cannot be refined section by section
+        """
+        original_answer = draft_answer.get("answer", "")
+        sections = split_markdown_sections(original_answer)
+        if len(sections) < 2:
+            return None
+
+        mapping = self._map_feedback(sections, self._split_feedback(feedback))
+        general = mapping.pop(-1, [])
+        if not mapping:
+            return None
+
+        outline = "\n".join(section.splitlines()[0] for section in sections if section.startswith("#"))
+
+        def rewrite(index: int) -> str:
+            return self._refine_section(draft_answer, sections[index], mapping[index], general, outline)
+
+        targets = sorted(mapping)
+        with ThreadPoolExecutor(max_workers=min(self.max_refine_workers, len(targets))) as executor:
+            rewritten = list(executor.map(bind_context(rewrite), targets))
+
+        refined = list(sections)
+        for index, text in zip(targets, rewritten):
+            refined[index] = text
+
+        headings = [sections[index].splitlines()[0].lstrip("#").strip() if sections[index].startswith("#")
+                    else "" for index in targets]
+        return "".join(refined), headings
+
+    def _refine_section(self, draft_answer: Dict[str, Any], section: str, items: List[str],
+                        general: List[str], outline: str) -> str:
+        """
+        Rewrite one section of the draft with its feedback applied.
+
+        Args:
+            draft_answer: The draft answer being refined
+            section: Text of the section
+            items: Feedback items about this section
+            general: Feedback items not tied to any section
+            outline: Headings of the whole draft
+
+        Returns:
+            The rewritten section, with the original heading line and trailing whitespace
+        """
+        topic = draft_answer.get("topic", "Unknown Topic")
+        output_format = draft_answer.get("format", "markdown")
+        heading = section.splitlines()[0] if section.startswith("#") else None
+
+        section_feedback = "\n".join(f"- {item}" for item in items)
+        general_feedback = "\n".join(f"- {item}" for item in general) or "- None"
+        heading_rule = (f'Start with the unchanged heading line "{heading}"' if heading
+                        else "Do not add a heading")
+
+        prompt = f"""
+        You are an expert at refining and improving one section of a drafted answer.
+
+        TOPIC: {topic}
+
+        OUTLINE OF THE FULL ANSWER:
+        {outline}
+
+        SECTION TO REVISE:
+        {section}
+
+        FEEDBACK FOR THIS SECTION:
+        {section_feedback}
+
+        GENERAL FEEDBACK ON THE ANSWER:
+        {general_feedback}
+
+        Your task:
+        1. Revise this section only, making the improvements requested in its feedback
+        2. {heading_rule}
+        3. Keep the content accurate and consistent with the rest of the answer
+        4. Do not repeat content that belongs in other sections of the outline
+
+        Return only the revised section in {output_format}.
+        """
 
-        return refined_answer
\ No newline at end of file
+        # Own step: section latencies are much shorter than full refinements and must not share their hedging window
+        response = self.model.generate_content(prompt, step="refine_section")
+        text = response.text.strip()
+
+        # Keep the original heading and the whitespace separating it from the next section
+        if heading and not text.startswith(heading):
+            if text.startswith("#"):
+                # The model changed the heading; drop its version
+                text = text.split("\n", 1)[1].lstrip("\n") if "\n" in text else ""
+            text = f"{heading}\n{text}"
+        trailing = section[len(section.rstrip()):]
+        return text.rstrip() + trailing
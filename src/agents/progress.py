@@ -0,0 +1,41 @@
+# src/agents/progress.py
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+# Kinds of progress events, in the order a run produces them
+RUN_STARTED = "started"
+STEP_COMPLETED = "step_completed"
+ANSWER_STARTED = "answer_started"
+ANSWER_CHUNK = "answer_chunk"
+RUN_COMPLETED = "completed"
+
+
+@dataclass
+class ProgressEvent:
+    """
+    Something that happened during a research run.
+
+    Attributes:
+        kind: "started", "step_completed", "answer_started", "answer_chunk" or "completed"
+        run_id: Id of the run
+        elapsed_s: Seconds since the run started
+        step: Workflow step the event belongs to (for step and answer events)
+        data: Partial state: the step's output for "step_completed" (e.g. the
+            sources found by conduct_research or the draft of generate_draft),
+            and the final workflow event for "completed"
+        step_s: Seconds the step took (for "step_completed")
+        text: Piece of the answer being generated (for "answer_chunk")
+    """
+    kind: str
+    run_id: str
+    elapsed_s: float
+    step: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    step_s: Optional[float] = None
+    text: Optional[str] = None
+
+
+class ResearchCancelled(Exception):
+    """
+    Raised inside a run whose consumer stopped listening, to abandon the work in progress.
+    """
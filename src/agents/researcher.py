@@ -1,20 +1,39 @@
 # src/agents/researcher.py
 from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import google.generativeai as genai
+import json
 import os
+import re
 from dotenv import load_dotenv
 from src.tools.tavily_search import TavilySearchTool
 from src.tools.web_crawler import WebCrawler
+from src.utils.context_packer import ContextPacker
+from src.utils.dedupe import dedupe_sources
+from src.utils.helpers import parse_json_response
+from src.utils.llm import LLMClient
+from src.utils.tracing import bind_context
 
 load_dotenv()
 
+# Keys of the structured information extracted from sources
+EXTRACTION_KEYS = ["main_findings", "data_points", "perspectives", "information_gaps"]
+
+# Words ignored when judging whether a source is relevant to a topic
+STOPWORDS = {
+    "the", "and", "for", "with", "from", "that", "this", "what", "which", "about", "into",
+    "how", "are", "was", "were", "its", "their", "does", "current", "recent", "latest"
+}
+
 
 class ResearcherAgent:
     """
     An agent responsible for conducting research and collecting data.
     """
 
-    def __init__(self):
+    def __init__(self, max_search_workers: int = 4, extraction_batch_size: int = 8,
+                 max_extraction_workers: int = 8, max_merged_items: int = 8):
         # Set up Google API key
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
@@ -22,12 +41,26 @@ class ResearcherAgent:
 
         # Configure the Gemini model
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash-preview-04-17')
+        model_name = 'gemini-2.5-flash-preview-04-17'
+        self.model = LLMClient(genai.GenerativeModel(model_name), model_name)
 
         # Initialize tools
         self.search_tool = TavilySearchTool()
         self.web_crawler = WebCrawler()
 
+        # Maximum number of searches run at once (1 = run them one after another)
+        self.max_search_workers = max_search_workers
+
+        # Advanced research with more sources than one batch extracts each batch in
+        # parallel and merges the results (map-reduce) instead of one long prompt
+        self.extraction_batch_size = extraction_batch_size
+        self.max_extraction_workers = max_extraction_workers
+        # Merged lists longer than this are condensed by one consolidation call
+        self.max_merged_items = max_merged_items
+
+        # Source passages in extraction prompts are ranked and capped at a token budget
+        self.context_packer = ContextPacker(token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000")))
+
     def _generate_search_queries(self, topic: str, num_queries: int = 3) -> List[str]:
         """
         Generate search queries based on the research topic.
@@ -51,7 +84,7 @@ class ResearcherAgent:
         Format your response as a Python list of strings. Example: ["query 1", "query 2", "query 3"]
         """
 
-        response = self.model.generate_content(prompt)
+        response = self.model.generate_content(prompt, step="generate_search_queries")
 
         try:
             # Extract the list of queries from the response
@@ -72,22 +105,159 @@ class ResearcherAgent:
             # Return a default query if parsing fails
             return [f"comprehensive information about {topic}"]
 
-    def _extract_relevant_info(self, sources: List[Dict[str, str]], topic: str) -> Dict[str, Any]:
+    def plan_research(self, query: str, num_queries: int = 3) -> Dict[str, Any]:
+        """
+        Extract the research topic and generate search queries in a single model call.
+
+        This fuses the coordinator's topic parsing with _generate_search_queries
+        to save one LLM round trip.
+
+        Args:
+            query: The user's research query
+            num_queries: Number of search queries to generate
+
+        Returns:
+            Dictionary with the "topic" and a list of search "queries"
+            (empty if they could not be parsed)
+        """
+        prompt = f"""
+        Analyze the following research query:
+
+        QUERY: {query}
+
+        1. Extract the main research topic as a concise phrase or question.
+        2. Generate {num_queries} specific search queries that would help gather comprehensive information on this topic.
+           Each query should focus on a different aspect of the topic, be specific enough to yield relevant results
+           and be phrased as an actual search query (not a question).
+
+        Respond with JSON only, in this format: {{"topic": "main topic", "search_queries": ["query 1", "query 2"]}}
+        """
+
+        response = self.model.generate_content(prompt, step="plan_research")
+        plan = parse_json_response(response.text)
+
+        if not plan or not plan.get("topic"):
+            print("Error parsing research plan, falling back to the raw query")
+            return {"topic": query.strip(), "queries": []}
+
+        queries = [str(q) for q in plan.get("search_queries", []) if str(q).strip()]
+        return {"topic": str(plan["topic"]).strip(), "queries": queries[:num_queries]}
+
+    def _collect_sources(self, queries: List[str], depth: str = "basic") -> List[Dict[str, Any]]:
+        """
+        Run the search for every query and collect the sources in query order.
+
+        Searches are fanned out over a thread pool bounded by
+        ``max_search_workers``; results are gathered in the order of ``queries``
+        so deduplication downstream stays stable.
+
+        Args:
+            queries: List of search queries
+            depth: Research depth; "advanced" searches deeper and asks for each page's full text
+
+        Returns:
+            List of sources, each tagged with the query that found it
+        """
+        get_sources = self.search_tool.get_sources
+        if depth == "advanced":
+            get_sources = partial(get_sources, search_depth="advanced", include_raw_content=True)
+
+        if self.max_search_workers > 1 and len(queries) > 1:
+            workers = min(self.max_search_workers, len(queries))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(bind_context(get_sources), queries))
+        else:
+            results = [get_sources(query) for query in queries]
+
+        all_sources = []
+        for query, sources in zip(queries, results):
+            # Track which query found which sources
+            for source in sources:
+                source["query"] = query
+                all_sources.append(source)
+
+        return all_sources
+
+    def _crawl_missing_content(self, sources: List[Dict[str, Any]]) -> None:
+        """
+        Fetch the full text of sources the search did not return it for.
+
+        Sources that already carry raw_content are not fetched again; crawled
+        text is stored on the source as raw_content.
+
+        Args:
+            sources: Sources to complete in place
+        """
+        missing = [source["url"] for source in sources if source.get("url") and not source.get("raw_content")]
+        if not missing:
+            return
+
+        pages = {page["url"]: page["content"] for page in self.web_crawler.crawl_urls(missing)}
+        for source in sources:
+            if not source.get("raw_content") and pages.get(source.get("url")):
+                source["raw_content"] = pages[source["url"]]
+
+    def _format_sources(self, sources: List[Dict[str, Any]], topic: str,
+                        queries: Optional[List[str]] = None) -> str:
+        """
+        Combine the passages most relevant to the topic into the context block of an extraction prompt.
+
+        Args:
+            sources: List of sources with title, url and content (and optionally raw_content)
+            topic: The research topic
+            queries: Search queries used for the research
+
+        Returns:
+            Text with the selected passages of each source, within the context token budget
+        """
+        return self.context_packer.pack(sources, topic, queries)
+
+    def _filter_relevant(self, sources: List[Dict[str, str]], topic: str) -> List[Dict[str, str]]:
+        """
+        Keep only sources whose title or content mention the topic's key terms.
+
+        Used for sources found before the topic was known (e.g. a speculative
+        search on the raw user query).
+
+        Args:
+            sources: Candidate sources
+            topic: The research topic
+
+        Returns:
+            Sources sharing enough key terms with the topic
+        """
+        terms = {
+            word for word in re.findall(r"[a-z0-9]+", topic.lower())
+            if len(word) > 2 and word not in STOPWORDS
+        }
+        if not terms:
+            return sources
+
+        required = min(2, len(terms))
+        relevant = []
+        for source in sources:
+            text = f"{source.get('title', '')} {source.get('content', '')}".lower()
+            words = set(re.findall(r"[a-z0-9]+", text))
+            if len(terms & words) >= required:
+                relevant.append(source)
+
+        return relevant
+
+    def _extract_relevant_info(self, sources: List[Dict[str, str]], topic: str,
+                               queries: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Extract and summarize relevant information from sources.
 
         Args:
             sources: List of sources with title, url and content
             topic: The research topic
+            queries: Search queries used for the research
 
         Returns:
             Dictionary with extracted information
         """
-        # Combine all source content for analysis
-        combined_content = "\n\n".join([
-            f"Source: {source['title']}\nURL: {source['url']}\n{source['content'][:1000]}..."
-            for source in sources
-        ])
+        # Combine the most relevant source passages for analysis
+        combined_content = self._format_sources(sources, topic, queries)
 
         prompt = f"""
         Research Topic: {topic}
@@ -105,7 +275,7 @@ class ResearcherAgent:
         Present this as structured JSON with these keys: "main_findings", "data_points", "perspectives", "information_gaps"
         """
 
-        response = self.model.generate_content(prompt)
+        response = self.model.generate_content(prompt, step="extract_relevant_info")
 
         try:
             # Parse the JSON response
@@ -143,13 +313,173 @@ class ResearcherAgent:
                 "information_gaps": ["Complete information could not be extracted"]
             }
 
-    def research(self, topic: str, depth: str = "basic") -> Dict[str, Any]:
+    def _map_reduce_extract(self, sources: List[Dict[str, Any]], topic: str,
+                            queries: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Extract information from many sources batch by batch and merge the results.
+
+        Each batch of ``extraction_batch_size`` sources is extracted in a
+        parallel model call; the partial results are merged and deduplicated
+        locally, and only merged lists longer than ``max_merged_items`` are
+        condensed by a final consolidation call.
+
+        Args:
+            sources: List of sources with title, url and content
+            topic: The research topic
+            queries: Search queries used for the research
+
+        Returns:
+            Dictionary with extracted information
+        """
+        batches = [
+            sources[start:start + self.extraction_batch_size]
+            for start in range(0, len(sources), self.extraction_batch_size)
+        ]
+
+        extract = bind_context(lambda batch: self._extract_relevant_info(batch, topic, queries))
+        workers = min(self.max_extraction_workers, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            partials = list(executor.map(extract, batches))
+
+        merged = self._merge_extractions(partials)
+        if any(len(merged[key]) > self.max_merged_items for key in EXTRACTION_KEYS):
+            merged = self._consolidate_extraction(merged, topic)
+
+        return merged
+
+    @staticmethod
+    def _merge_extractions(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge extraction results, dropping items that repeat an earlier one.
+
+        Items are compared on their lowercased words; an item is a repeat when it
+        mentions the same numbers as an item already kept and the two share at
+        least 80% of their combined words.
+
+        Args:
+            partials: Extraction results of the individual batches
+
+        Returns:
+            Dictionary with the merged lists for every extraction key
+        """
+        merged = {key: [] for key in EXTRACTION_KEYS}
+        for key in EXTRACTION_KEYS:
+            kept_words = []
+            for extraction in partials:
+                items = extraction.get(key, [])
+                if not isinstance(items, list):
+                    items = [items]
+                for item in items:
+                    words = set(re.findall(r"[a-z0-9]+", str(item).lower()))
+                    if not words:
+                        continue
+                    numbers = {word for word in words if any(char.isdigit() for char in word)}
+                    if any(numbers == other_numbers and len(words & other) >= 0.8 * len(words | other)
+                           for other, other_numbers in kept_words):
+                        continue
+                    kept_words.append((words, numbers))
+                    merged[key].append(item)
+
+        return merged
+
+    def _consolidate_extraction(self, merged: Dict[str, Any], topic: str) -> Dict[str, Any]:
+        """
+        Condense merged extraction results with one model call.
+
+        Args:
+            merged: Merged extraction results
+            topic: The research topic
+
+        Returns:
+            Consolidated results, or the merged lists cut to ``max_merged_items``
+            if the response could not be parsed
+        """
+        prompt = f"""
+        Research Topic: {topic}
+
+        The following information was extracted from several batches of sources and may overlap:
+
+        {json.dumps(merged, ensure_ascii=False, indent=2)}
+
+        Consolidate it: combine overlapping items, keep the most important and specific ones,
+        and keep at most {self.max_merged_items} items per list.
+
+        Present this as structured JSON with these keys: "main_findings", "data_points", "perspectives", "information_gaps"
+        """
+
+        response = self.model.generate_content(prompt, step="consolidate_findings")
+        consolidated = parse_json_response(response.text)
+
+        if consolidated is None or not all(isinstance(consolidated.get(key), list) for key in EXTRACTION_KEYS):
+            print("Error parsing consolidated findings, keeping the merged lists")
+            return {key: merged[key][:self.max_merged_items] for key in EXTRACTION_KEYS}
+
+        return {key: consolidated[key] for key in EXTRACTION_KEYS}
+
+    def _extract_and_summarize(self, sources: List[Dict[str, str]], topic: str,
+                               queries: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Extract relevant information and write the research summary in a single model call.
+
+        Args:
+            sources: List of sources with title, url and content
+            topic: The research topic
+            queries: Search queries used for the research
+
+        Returns:
+            Dictionary with "extracted_info" and "summary"
+        """
+        combined_content = self._format_sources(sources, topic, queries)
+
+        prompt = f"""
+        Research Topic: {topic}
+
+        Below are excerpts from various sources. Extract the most relevant information related to the research topic.
+
+        {combined_content}
+
+        Extract and organize the key information as follows:
+        1. Main findings (3-5 key points)
+        2. Important data or statistics
+        3. Different perspectives or approaches
+        4. Gaps in information that need further research
+        5. A concise research summary (about 250 words) that synthesizes what we know about this topic
+
+        Present this as structured JSON with these keys: "main_findings", "data_points", "perspectives", "information_gaps", "summary"
+        """
+
+        response = self.model.generate_content(prompt, step="extract_and_summarize")
+        parsed = parse_json_response(response.text)
+
+        if parsed is None:
+            print("Error parsing fused extraction, using the raw response as findings")
+            response_text = response.text
+            return {
+                "extracted_info": {
+                    "main_findings": [line.strip() for line in response_text.split("\n") if line.strip()],
+                    "data_points": [],
+                    "perspectives": [],
+                    "information_gaps": []
+                },
+                "summary": ""
+            }
+
+        summary = parsed.pop("summary", "")
+        return {"extracted_info": parsed, "summary": summary if isinstance(summary, str) else str(summary)}
+
+    def research(self, topic: str, depth: str = "basic", queries: Optional[List[str]] = None,
+                 fused: bool = False, extra_sources: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
         """
         Perform comprehensive research on a topic.
 
         Args:
             topic: The research topic
-            depth: Research depth (basic, advanced)
+            depth: Research depth (basic, advanced); advanced research also uses
+                the full text of every source, crawling pages the search did not return it for
+            queries: Search queries to use instead of generating them
+            fused: Extract information and summarize in one model call (unless
+                advanced research extracts the sources in batches)
+            extra_sources: Sources gathered ahead of time; irrelevant ones are dropped
 
         Returns:
             Dictionary containing research results
@@ -158,38 +488,56 @@ class ResearcherAgent:
             "topic": topic,
             "queries": [],
             "sources": [],
+            "removed_sources": [],
             "extracted_info": {},
             "summary": ""
         }
 
-        # Generate search queries
-        queries = self._generate_search_queries(topic)
+        # Generate search queries unless they were planned already
+        if not queries:
+            queries = self._generate_search_queries(topic)
         research_results["queries"] = queries
 
         # Collect sources from all queries
-        all_sources = []
-        for query in queries:
-            # Search using Tavily
-            sources = self.search_tool.get_sources(query)
-
-            # Track which query found which sources
-            for source in sources:
-                source["query"] = query
-                all_sources.append(source)
+        all_sources = self._collect_sources(queries, depth)
+
+        # Merge sources found ahead of time if they turn out to match the topic
+        if extra_sources:
+            relevant = self._filter_relevant(extra_sources, topic)
+            if len(relevant) < len(extra_sources):
+                print(f"Ignoring {len(extra_sources) - len(relevant)} speculative sources unrelated to the topic")
+            all_sources.extend(relevant)
+
+        # Drop URL variants and near-duplicate copies of the same text
+        unique_sources, removed = dedupe_sources(all_sources)
+
+        if depth == "advanced":
+            self._crawl_missing_content(unique_sources)
+            # Crawled full text can reveal copies the snippets did not
+            unique_sources, removed_after_crawl = dedupe_sources(unique_sources)
+            removed.extend(removed_after_crawl)
+
+        if removed:
+            print(f"Removed {len(removed)} duplicate sources")
+        research_results["sources"] = unique_sources
+        research_results["removed_sources"] = removed
 
-        # Deduplicate sources based on URL
-        seen_urls = set()
-        unique_sources = []
-        for source in all_sources:
-            if source["url"] not in seen_urls:
-                seen_urls.add(source["url"])
-                unique_sources.append(source)
+        # Many sources in advanced research are extracted batch by batch; the
+        # fused single-prompt extraction would be slow and truncated
+        map_reduce = depth == "advanced" and len(unique_sources) > self.extraction_batch_size
 
-        research_results["sources"] = unique_sources
+        # Extract relevant information and summarize in one call
+        if unique_sources and fused and not map_reduce:
+            fused_results = self._extract_and_summarize(unique_sources, topic, queries)
+            research_results["extracted_info"] = fused_results["extracted_info"]
+            research_results["summary"] = fused_results["summary"]
+            return research_results
 
         # Extract relevant information
-        if unique_sources:
-            research_results["extracted_info"] = self._extract_relevant_info(unique_sources, topic)
+        if unique_sources and map_reduce:
+            research_results["extracted_info"] = self._map_reduce_extract(unique_sources, topic, queries)
+        elif unique_sources:
+            research_results["extracted_info"] = self._extract_relevant_info(unique_sources, topic, queries)
 
         # Generate a research summary
         if unique_sources and research_results["extracted_info"]:
@@ -212,7 +560,11 @@ class ResearcherAgent:
             Based on the above information, provide a concise research summary (about 250 words) that synthesizes what we know about this topic.
             """
 
-            summary_response = self.model.generate_content(summary_prompt)
+            summary_response = self.model.generate_content(summary_prompt, step="summarize_research")
             research_results["summary"] = summary_response.text
 
-        return research_results
\ No newline at end of file
+        return research_results
+
+    def close(self) -> None:
+        """Release the crawler's parsing process pool, if one was started."""
+        self.web_crawler.close()
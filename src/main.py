@@ -2,11 +2,34 @@
 import argparse
 import os
 import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from typing import Any, Dict, List
 from dotenv import load_dotenv
 from src.agents.coordinator import ResearchCoordinator
+from src.utils.cassette import Cassette, use_cassette
+from src.utils.checkpoints import default_checkpoint_store
+from src.utils.hedging import HedgingPolicy
+from src.utils.llm import configure_llm_cache, llm_cache_stats
+from src.utils.tracing import JSONFileSink, OpenTelemetrySink, Tracer
 
-def save_results(results, output_dir="./output"):
+def get_final_answer(results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Find the final answer in a run's results.
+
+    The results are the last workflow event, keyed by the node that finished
+    the run: refine_answer, or analyze_draft when the draft needed no refinement.
+    """
+    for update in results.values():
+        if isinstance(update, dict) and update.get("final_answer"):
+            return update["final_answer"]
+    return results.get("final_answer", {})
+
+
+def save_results(results, output_dir="./output", label=None, tracer=None, basename=None):
     """Save research results to a file."""
     # Create output directory if it doesn't exist
     if not os.path.exists(output_dir):
@@ -15,28 +38,197 @@ def save_results(results, output_dir="./output"):
     # Generate timestamp for filename
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    # Create filename based on topic
+    # Create filename based on topic, unless the files were named when the run started
     topic = results.get("topic", "research")
     topic_slug = topic.lower().replace(" ", "_")[:30]
-    filename = f"{output_dir}/{timestamp}_{topic_slug}.json"
+    if label:
+        # Keep files from runs finishing in the same second apart
+        topic_slug = f"{topic_slug}_{label}"
+    basename = basename or f"{timestamp}_{topic_slug}"
+    filename = f"{output_dir}/{basename}.json"
 
     # Save full results as JSON
     with open(filename, 'w') as f:
         json.dump(results, f, indent=2)
 
     # Also save the final answer as markdown
-    # final_answer = results.get("final_answer", {}).get("answer", "")
-    final_answer = results.get("refine_answer", {}).get("final_answer", {}).get("answer", "")
+    final_answer = get_final_answer(results).get("answer", "")
 
-    md_filename = f"{output_dir}/{timestamp}_{topic_slug}.md"
+    md_filename = f"{output_dir}/{basename}.md"
 
     with open(md_filename, 'w') as f:
         f.write(final_answer)
 
     print(f"Results saved to {filename} and {md_filename}")
+
+    # Write the run's trace next to the results and export it to any other sinks
+    if tracer is not None:
+        trace_filename = f"{output_dir}/{basename}.trace.json"
+        tracer.export(extra_sinks=[JSONFileSink(trace_filename)])
+        print(f"Trace saved to {trace_filename}")
+
     return filename, md_filename
 
 
+class AnswerStreamWriter:
+    """
+    Shows the draft and refined answers while they are generated.
+
+    Text is printed to stdout and appended to the run's markdown file as it
+    arrives, so the file can be followed with ``tail -f``. Each new answer
+    (every refinement after the draft) replaces the previous one in the file.
+    """
+
+    def __init__(self, md_filename: str):
+        self.md_filename = md_filename
+        self.step = None
+        self.answers = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def start_answer(self, step: str) -> None:
+        """Start a new answer, replacing the previous one in the file."""
+        with self._lock:
+            self.step = step
+            self.answers += 1
+            if step == "draft_answer":
+                title = "Draft"
+            elif self.answers > 2:
+                title = f"Refined answer (round {self.answers - 1})"
+            else:
+                title = "Refined answer"
+            print(f"\n--- {title} ---\n", flush=True)
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.md_filename, 'w')
+
+    def __call__(self, step: str, text: str) -> None:
+        if self._file is None or step != self.step:
+            # Callers that do not report answer starts get one answer per step
+            self.start_answer(step)
+
+        with self._lock:
+            print(text, end="", flush=True)
+            self._file.write(text)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self.step is not None:
+                print()
+
+
+def print_trace_summary(tracer) -> None:
+    """Print where the time of a traced run went."""
+    summary = tracer.summary()
+    print(f"\nTotal time: {summary['total_ms'] / 1000:.1f}s")
+    for node, duration_ms in summary["nodes"].items():
+        print(f"  {node}: {duration_ms / 1000:.1f}s")
+    for kind, totals in summary["calls"].items():
+        print(f"  {kind} calls: {totals['count']} ({totals['duration_ms'] / 1000:.1f}s, "
+              f"{totals['prompt_tokens']} prompt / {totals['response_tokens']} response tokens, "
+              f"{totals['bytes']} bytes, {totals['cache_hits']} cache hits, {totals['retries']} retries)")
+
+
+def read_batch_file(path: str) -> List[str]:
+    """
+    Read research queries from a batch file.
+
+    Each non-empty line is either a plain query or a JSON object with a "query" key.
+    """
+    queries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                queries.append(json.loads(line)["query"])
+            else:
+                queries.append(line)
+    return queries
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(percentile / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_batch(coordinator, queries: List[str], output_dir: str = "./output", workers: int = 4,
+              trace_sinks=None) -> Dict[str, Any]:
+    """
+    Research many queries with a bounded worker pool sharing one coordinator.
+
+    Results are saved as soon as each query finishes.
+
+    Returns:
+        Summary with throughput and latency statistics for the batch
+    """
+    def run_one(index, query):
+        started = time.perf_counter()
+        tracer = Tracer(sinks=trace_sinks)
+        results = coordinator.execute_research(query, tracer=tracer)
+        save_results(results, output_dir, label=f"{index:04d}", tracer=tracer)
+        return time.perf_counter() - started
+
+    latencies = []
+    failures = []
+    batch_started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(run_one, index, query): (index, query)
+            for index, query in enumerate(queries, 1)
+        }
+        for future in as_completed(futures):
+            index, query = futures[future]
+            try:
+                latency = future.result()
+                latencies.append(latency)
+                print(f"[{len(latencies) + len(failures)}/{len(queries)}] Finished #{index} in {latency:.1f}s: {query}")
+            except Exception as e:
+                failures.append({"index": index, "query": query, "error": str(e)})
+                print(f"[{len(latencies) + len(failures)}/{len(queries)}] Failed #{index}: {query} ({e})")
+
+    wall_time = time.perf_counter() - batch_started
+    return {
+        "queries": len(queries),
+        "completed": len(latencies),
+        "failed": len(failures),
+        "failures": failures,
+        "workers": workers,
+        "wall_time_s": wall_time,
+        "throughput_per_min": len(latencies) / wall_time * 60 if wall_time else 0.0,
+        "latency_s": {
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "max": max(latencies) if latencies else 0.0
+        }
+    }
+
+
+def print_batch_summary(summary: Dict[str, Any]) -> None:
+    """Print the throughput/latency summary of a batch run."""
+    latency = summary["latency_s"]
+    print("\nBatch complete!")
+    print(f"Queries: {summary['completed']} completed, {summary['failed']} failed "
+          f"({summary['workers']} workers)")
+    print(f"Wall time: {summary['wall_time_s']:.1f}s, throughput: {summary['throughput_per_min']:.2f} queries/min")
+    print(f"Latency: mean {latency['mean']:.1f}s, p50 {latency['p50']:.1f}s, "
+          f"p95 {latency['p95']:.1f}s, max {latency['max']:.1f}s")
+    for step, stats in summary.get("hedging", {}).items():
+        print(f"Hedging {step}: {stats['hedged']} of {stats['calls']} calls hedged, "
+              f"{stats['hedge_wins']} won by the hedge")
+
+
 def main():
     """Main function to run the research system."""
     # Load environment variables
@@ -46,30 +238,169 @@ def main():
     parser = argparse.ArgumentParser(description='AI Deep Research System')
     parser.add_argument('--query', '-q', type=str, help='Research query')
     parser.add_argument('--output', '-o', type=str, default='./output', help='Output directory')
+    parser.add_argument('--batch', '-b', type=str, metavar='FILE',
+                        help='File with one query per line (plain text or JSON lines with a "query" key)')
+    parser.add_argument('--workers', '-w', type=int, default=4, help='Concurrent queries in batch mode')
+    parser.add_argument('--pipeline', choices=['standard', 'fused'], default='standard',
+                        help='Pipeline mode; "fused" merges LLM steps to cut two round trips')
+    parser.add_argument('--depth', choices=['basic', 'advanced'], default='basic',
+                        help='Research depth; "advanced" searches deeper and reads the full text of every source')
+    parser.add_argument('--quality-threshold', type=float, default=8.0,
+                        help='Draft quality score (1-10) at which refinement is skipped')
+    parser.add_argument('--max-refinements', type=int, default=1,
+                        help='Refinement rounds a draft may get while it scores below the threshold')
+    parser.add_argument('--refine-mode', choices=['full', 'sections'], default=None,
+                        help='"sections" rewrites only the sections the feedback is about, in parallel')
+    parser.add_argument('--speculative-search', action='store_true',
+                        help='Search the raw query while the topic is being parsed')
+    parser.add_argument('--hedge', action='store_true',
+                        help='Send a duplicate request when a draft or refine call is slower than its p95 latency')
+    parser.add_argument('--stream', action='store_true',
+                        help='Print the draft and refined answers and write the markdown file while they are generated')
+    parser.add_argument('--otel', action='store_true',
+                        help='Also export run traces as OpenTelemetry spans (needs opentelemetry-api)')
+    parser.add_argument('--cache-llm', action='store_true',
+                        help='Cache Gemini responses on disk so repeated or resumed runs reuse them')
+    parser.add_argument('--no-cache-step', action='append', default=[], metavar='STEP',
+                        help='Pipeline step that always calls the model, e.g. refine_answer (repeatable)')
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument('--record', type=str, metavar='CASSETTE',
+                                help='Record every Gemini, Tavily and page response of the run to a file')
+    cassette_group.add_argument('--replay', type=str, metavar='CASSETTE',
+                                help='Replay a recorded run without any network access')
+    parser.add_argument('--replay-latency', action='store_true',
+                        help='When replaying, wait for the latency each response originally took')
+    parser.add_argument('--resume', type=str, metavar='RUN_ID',
+                        help='Continue an interrupted run from its last completed step')
     args = parser.parse_args()
 
-    # Get query from arguments or prompt user
-    query = args.query
-    if not query:
-        query = input("Enter your research query: ")
+    if args.cache_llm:
+        configure_llm_cache(uncached_steps=args.no_cache_step)
+
+    cassette = None
+    if args.record:
+        cassette = Cassette(args.record, mode="record")
+    elif args.replay:
+        cassette = Cassette(args.replay, mode="replay", replay_latency=args.replay_latency)
+        # Replays make no API calls, but the clients still expect keys to be configured
+        os.environ.setdefault("GOOGLE_API_KEY", "replay")
+        os.environ.setdefault("TAVILY_API_KEY", "replay")
+    use_cassette(cassette)
+
+    try:
+        run(args)
+    finally:
+        if cassette is not None and not cassette.replaying:
+            cassette.save()
+            print(f"Recorded interactions saved to {cassette.path}")
 
-    print(f"Starting research on: {query}")
 
-    # Initialize coordinator and execute research
-    coordinator = ResearchCoordinator()
-    results = coordinator.execute_research(query)
+def run(args):
+    """Run research for the parsed command line arguments."""
+    trace_sinks = [OpenTelemetrySink()] if args.otel else []
+    hedging = HedgingPolicy() if args.hedge else None
+
+    if args.batch:
+        queries = read_batch_file(args.batch)
+        print(f"Starting batch research on {len(queries)} queries with {args.workers} workers")
+
+        # One coordinator (and its API clients) is shared by every worker
+        coordinator = ResearchCoordinator(pipeline_mode=args.pipeline,
+                                          speculative_search=args.speculative_search,
+                                          research_depth=args.depth,
+                                          checkpoint_store=default_checkpoint_store(),
+                                          hedging=hedging,
+                                          quality_threshold=args.quality_threshold,
+                                          max_refinements=args.max_refinements,
+                                          refine_mode=args.refine_mode)
+        try:
+            summary = run_batch(coordinator, queries, args.output, args.workers, trace_sinks)
+        finally:
+            coordinator.close()
+        if coordinator.drafter.model.hedging is not None:
+            summary["hedging"] = coordinator.drafter.model.hedging.stats()
+        print_batch_summary(summary)
+
+        if not os.path.exists(args.output):
+            os.makedirs(args.output)
+        summary_file = f"{args.output}/{datetime.now().strftime('%Y%m%d_%H%M%S')}_batch_summary.json"
+        with open(summary_file, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Batch summary saved to {summary_file}")
+        return
+
+    # Initialize coordinator
+    coordinator = ResearchCoordinator(pipeline_mode=args.pipeline,
+                                      speculative_search=args.speculative_search,
+                                      research_depth=args.depth,
+                                      checkpoint_store=default_checkpoint_store(),
+                                      hedging=hedging,
+                                      quality_threshold=args.quality_threshold,
+                                      max_refinements=args.max_refinements,
+                                      refine_mode=args.refine_mode)
+
+    # With --stream the markdown file is named up front and filled while the answer is generated
+    basename = None
+    writer = None
+    if args.stream:
+        if not os.path.exists(args.output):
+            os.makedirs(args.output)
+        basename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_research"
+        writer = AnswerStreamWriter(f"{args.output}/{basename}.md")
+        print(f"Streaming the answer to {writer.md_filename}")
+    on_answer_start = writer.start_answer if writer is not None else None
+
+    try:
+        if args.resume:
+            # Continue an interrupted run under its original id
+            tracer = Tracer(run_id=args.resume, sinks=trace_sinks)
+            results = coordinator.resume_research(args.resume, tracer=tracer, on_chunk=writer,
+                                                 on_answer_start=on_answer_start)
+        else:
+            # Get query from arguments or prompt user
+            query = args.query
+            if not query:
+                query = input("Enter your research query: ")
+
+            tracer = Tracer(sinks=trace_sinks)
+            print(f"Starting research on: {query}")
+            if coordinator.checkpoint_store is not None:
+                print(f"Run ID: {tracer.run_id} (continue with --resume {tracer.run_id} if interrupted)")
+            results = coordinator.execute_research(query, tracer=tracer, on_chunk=writer,
+                                                  on_answer_start=on_answer_start)
+    finally:
+        if writer is not None:
+            writer.close()
+        coordinator.close()
 
     # Save results
-    save_results(results, args.output)
+    save_results(results, args.output, tracer=tracer, basename=basename)
 
     # Print completion message
     print("\nResearch complete!")
-    topic = results.get("topic", "")
+    final_answer = get_final_answer(results)
+    topic = final_answer.get("topic", "")
     print(f"Topic: {topic}")
 
-    sources_count = results.get("final_answer", {}).get("sources_count", 0)
+    sources_count = final_answer.get("sources_count", 0)
     print(f"Sources analyzed: {sources_count}")
 
+    refinements = final_answer.get("refinements", 0)
+    if "quality" in final_answer:
+        score = final_answer["quality"].get("score")
+        print(f"Quality score: {score if score is not None else 'n/a'}, refinements: {refinements}")
+    else:
+        # The last refinement is not analyzed again; only its draft was scored
+        score = final_answer.get("draft_quality", {}).get("score")
+        print(f"Draft quality score (before refinement): {score if score is not None else 'n/a'}, "
+              f"refinements: {refinements}")
+
+    cache_stats = llm_cache_stats()
+    if cache_stats.get("enabled"):
+        print(f"LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+
+    print_trace_summary(tracer)
+
     print("\nFinal answer has been saved to the output directory.")
 
 
@@ -0,0 +1,361 @@
+# src/service.py
+import argparse
+import json
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Jobs kept for status and result requests; the oldest finished ones are dropped beyond this
+MAX_FINISHED_JOBS = 1000
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a job is submitted while the job queue is full.
+    """
+
+
+@dataclass
+class Job:
+    """
+    A research query submitted to the service.
+    """
+    job_id: str
+    query: str
+    status: str = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    step: Optional[str] = None
+    steps: List[Dict[str, Any]] = field(default_factory=list)
+    results: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status of the job, without its results."""
+        return {
+            "job_id": self.job_id,
+            "query": self.query,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "step": self.step,
+            "steps": list(self.steps),
+            "error": self.error
+        }
+
+
+class ResearchService:
+    """
+    Runs research jobs on one long-lived coordinator.
+
+    The coordinator, its API clients and the compiled workflow are built once
+    and shared by every job. Jobs wait in a bounded queue and ``max_concurrency``
+    workers run them. A query identical to one that is still queued or running
+    is attached to that job instead of being researched twice.
+    """
+
+    def __init__(self, coordinator: Any, max_concurrency: int = 2, max_queue: int = 32,
+                 output_dir: Optional[str] = None):
+        """
+        Args:
+            coordinator: The ResearchCoordinator running every job
+            max_concurrency: Jobs researched at the same time
+            max_queue: Jobs that may wait for a worker before submissions are refused
+            output_dir: Directory to save each job's results to, like the CLI (None keeps them in memory only)
+        """
+        self.coordinator = coordinator
+        self.max_concurrency = max_concurrency
+        self.output_dir = output_dir
+        self.jobs: Dict[str, Job] = {}
+        self.coalesced = 0
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._inflight: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        self._stopping = threading.Event()
+
+    @staticmethod
+    def _query_key(query: str) -> str:
+        """Key under which identical queries are coalesced."""
+        return " ".join(query.lower().split())
+
+    def start(self) -> "ResearchService":
+        """Start the worker threads."""
+        for index in range(self.max_concurrency):
+            worker = threading.Thread(target=self._work, name=f"research-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        return self
+
+    def stop(self) -> None:
+        """
+        Let the workers exit once they finish their current job.
+
+        Jobs still waiting in the queue are failed rather than run. Never blocks,
+        even when the queue is full.
+        """
+        self._stopping.set()
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                self._cancel(job)
+            self._queue.task_done()
+
+        # Wake workers blocked on an empty queue; they check the stop event either way
+        for _ in self._workers:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        self._workers = []
+
+    def submit(self, query: str) -> Tuple[Job, bool]:
+        """
+        Queue a research query, or attach it to an identical job in flight.
+
+        Args:
+            query: The research query
+
+        Returns:
+            Tuple of (the job, whether the query was coalesced into an existing job)
+
+        Raises:
+            QueueFullError: If the queue is full
+        """
+        key = self._query_key(query)
+        with self._lock:
+            job_id = self._inflight.get(key)
+            if job_id is not None:
+                self.coalesced += 1
+                return self.jobs[job_id], True
+
+            job = Job(job_id=uuid.uuid4().hex[:12], query=query)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError(f"Job queue is full ({self._queue.maxsize} waiting)")
+
+            self.jobs[job.job_id] = job
+            self._inflight[key] = job.job_id
+            return job, False
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """Get a job by id."""
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue and job counters.
+
+        Returns:
+            Dictionary with queued, running and total jobs, coalesced submissions and the concurrency limit
+        """
+        with self._lock:
+            statuses = [job.status for job in self.jobs.values()]
+            return {
+                "queued": statuses.count("queued"),
+                "running": statuses.count("running"),
+                "jobs": len(statuses),
+                "coalesced": self.coalesced,
+                "max_concurrency": self.max_concurrency
+            }
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                if self._stopping.is_set():
+                    self._cancel(job)
+                else:
+                    self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _cancel(self, job: Job) -> None:
+        """Fail a job that was still queued when the service stopped."""
+        job.error = "Service stopped before the job started"
+        job.status = "failed"
+        job.finished_at = time.time()
+        with self._lock:
+            self._inflight.pop(self._query_key(job.query), None)
+
+    def _run(self, job: Job) -> None:
+        """Research a job's query, recording its progress and outcome."""
+        # Imported here so the module can be loaded without the CLI's dependencies
+        from src.agents.progress import RUN_COMPLETED, STEP_COMPLETED
+        from src.main import get_final_answer, save_results
+        from src.utils.tracing import Tracer
+
+        job.status = "running"
+        job.started_at = time.time()
+        tracer = Tracer(run_id=job.job_id)
+
+        try:
+            for event in self.coordinator.iter_research(job.query, tracer=tracer, run_id=job.job_id):
+                if event.kind == STEP_COMPLETED:
+                    job.step = event.step
+                    job.steps.append({"step": event.step, "duration_s": event.step_s})
+                elif event.kind == RUN_COMPLETED:
+                    job.results = event.data
+
+            if self.output_dir:
+                save_results(job.results, self.output_dir, label=job.job_id, tracer=tracer)
+            job.results = {"final_answer": get_final_answer(job.results), "last_event": job.results}
+            job.status = "succeeded"
+        except Exception as e:
+            print(f"Error running job {job.job_id}: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._inflight.pop(self._query_key(job.query), None)
+                self._forget_old_jobs()
+
+    def _forget_old_jobs(self) -> None:
+        """Drop the oldest finished jobs beyond MAX_FINISHED_JOBS (called with the lock held)."""
+        finished = [job for job in self.jobs.values() if job.finished_at is not None]
+        finished.sort(key=lambda job: job.finished_at)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.job_id]
+
+
+def make_server(service: ResearchService, host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+    """
+    Build the HTTP API of a research service.
+
+    Endpoints:
+        POST /jobs               {"query": "..."} -> 202 with the job id (429 when the queue is full)
+        GET  /jobs/<id>          Job status and completed steps
+        GET  /jobs/<id>/result   200 with the final answer, 202 while the job runs, 500 if it failed
+        GET  /health             Queue and job counters
+
+    Args:
+        service: The service running the jobs
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free one)
+
+    Returns:
+        The server, not yet serving
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+            data = json.dumps(body, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/jobs":
+                self._send_json(404, {"error": "Not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", "0"))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                query = str(payload.get("query", "")).strip()
+            except (ValueError, AttributeError):
+                self._send_json(400, {"error": "Body must be a JSON object"})
+                return
+            if not query:
+                self._send_json(400, {"error": "Missing query"})
+                return
+
+            try:
+                job, coalesced = service.submit(query)
+            except QueueFullError as e:
+                self._send_json(429, {"error": str(e)}, headers={"Retry-After": "5"})
+                return
+
+            self._send_json(202, dict(job.to_dict(), coalesced=coalesced),
+                            headers={"Location": f"/jobs/{job.job_id}"})
+
+        def do_GET(self):
+            parts = [part for part in self.path.split("?")[0].split("/") if part]
+            if parts == ["health"]:
+                self._send_json(200, dict(service.stats(), status="ok"))
+                return
+            if len(parts) not in (2, 3) or parts[0] != "jobs" or (len(parts) == 3 and parts[2] != "result"):
+                self._send_json(404, {"error": "Not found"})
+                return
+
+            job = service.get_job(parts[1])
+            if job is None:
+                self._send_json(404, {"error": f"Unknown job: {parts[1]}"})
+            elif len(parts) == 2:
+                self._send_json(200, job.to_dict())
+            elif job.status == "succeeded":
+                self._send_json(200, {"job_id": job.job_id, "query": job.query, **job.results})
+            elif job.status == "failed":
+                self._send_json(500, job.to_dict())
+            else:
+                self._send_json(202, job.to_dict())
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    """Run the research system as a local HTTP service."""
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='AI Deep Research System service')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', '-p', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--workers', '-w', type=int, default=2, help='Jobs researched at the same time')
+    parser.add_argument('--max-queue', type=int, default=32, help='Jobs that may wait before submissions are refused')
+    parser.add_argument('--output', '-o', type=str, default=None,
+                        help='Also save each job\'s results to this directory')
+    parser.add_argument('--pipeline', choices=['standard', 'fused'], default='standard',
+                        help='Pipeline mode; "fused" merges LLM steps to cut two round trips')
+    parser.add_argument('--depth', choices=['basic', 'advanced'], default='basic',
+                        help='Research depth; "advanced" searches deeper and reads the full text of every source')
+    args = parser.parse_args()
+
+    from src.agents.coordinator import ResearchCoordinator
+    from src.utils.checkpoints import default_checkpoint_store
+
+    # Built once: the clients and the compiled workflow stay warm for every job
+    coordinator = ResearchCoordinator(pipeline_mode=args.pipeline, research_depth=args.depth,
+                                      checkpoint_store=default_checkpoint_store())
+    service = ResearchService(coordinator, max_concurrency=args.workers, max_queue=args.max_queue,
+                              output_dir=args.output).start()
+    server = make_server(service, args.host, args.port)
+
+    host, port = server.server_address[:2]
+    print(f"Research service listening on http://{host}:{port} ({args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        coordinator.close()
+
+
+if __name__ == "__main__":
+    main()
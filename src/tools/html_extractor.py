@@ -0,0 +1,287 @@
+# src/tools/html_extractor.py
+import re
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+# Elements whose whole subtree is boilerplate or non-content. Forms are not among
+# them: some sites (ASP.NET WebForms) wrap the whole page in one; only the text of
+# their controls is dropped (<input> has none)
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "iframe", "nav", "footer",
+    "aside", "button", "select", "textarea"
+}
+
+# Elements that start a new block of text
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "table", "tr", "td", "th",
+    "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "dd", "dt", "figcaption", "br"
+}
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+# Elements marking the main content of a page; when a page has them, only their text is kept
+MAIN_TAGS = {"article", "main"}
+
+# Elements whose class/id/role can mark a boilerplate subtree. Only containers with a
+# required end tag qualify: an unclosed <p> or <li> would otherwise hide the rest of the page
+BOILERPLATE_CONTAINERS = {"div", "section", "nav", "aside", "header", "footer", "ul", "ol"}
+
+# class/id words that mark navigation, ads and other page chrome
+BOILERPLATE_WORDS = {
+    "nav", "navbar", "menu", "footer", "sidebar", "cookie", "banner", "advert", "ads", "promo",
+    "share", "social", "breadcrumb", "breadcrumbs", "comment", "comments", "related", "subscribe",
+    "newsletter", "popup", "modal"
+}
+
+
+class _TextCollector:
+    """
+    Blocks of text kept from one part of a page.
+    """
+
+    def __init__(self, max_link_density: float):
+        self.max_link_density = max_link_density
+        self.blocks: List[str] = []
+        self.chars = 0
+
+        self._parts: List[str] = []
+        self._link_chars = 0
+        self._is_heading = False
+
+    def add(self, data: str, in_link: bool) -> None:
+        self._parts.append(data)
+        if in_link:
+            self._link_chars += len(data.strip())
+
+    def start_block(self, is_heading: bool = False) -> None:
+        self.flush()
+        self._is_heading = is_heading
+
+    def flush(self) -> None:
+        text = " ".join("".join(self._parts).split())
+        link_chars = self._link_chars
+        is_heading = self._is_heading
+
+        self._parts = []
+        self._link_chars = 0
+        self._is_heading = False
+
+        if not text:
+            return
+
+        # Drop link lists and short fragments, but keep headings
+        if not is_heading:
+            if link_chars / len(text) > self.max_link_density:
+                return
+            if len(text.split()) < 4:
+                return
+
+        self.blocks.append(text)
+        self.chars += len(text) + 1
+
+
+class MainContentExtractor(HTMLParser):
+    """
+    Incremental HTML parser that keeps the main text of a page.
+
+    Text is collected block by block; subtrees that are boilerplate (scripts,
+    navigation, footers) are skipped, and blocks dominated by link text are
+    dropped. Text inside <article>/<main> is collected separately and, when
+    the page has any, is the content; otherwise the rest of the page is used,
+    also skipping containers whose class/id look like page chrome. Feeding can
+    stop as soon as ``done`` is set, i.e. once ``max_chars`` of text have been kept.
+    """
+
+    def __init__(self, max_chars: Optional[int] = None, max_link_density: float = 0.5):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.max_link_density = max_link_density
+
+        self.title: Optional[str] = None
+        self.done = False
+
+        self._in_title = False
+        self._title_parts: List[str] = []
+        self._skip_tag: Optional[str] = None
+        self._skip_depth = 0
+        self._chrome_tag: Optional[str] = None
+        self._chrome_depth = 0
+        self._main_depth = 0
+        self._link_depth = 0
+        self._page = _TextCollector(max_link_density)
+        self._main = _TextCollector(max_link_density)
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+
+        if tag == "title" and self.title is None:
+            self._in_title = True
+            return
+
+        if tag in SKIP_TAGS:
+            self._flush_block()
+            self._skip_tag = tag
+            self._skip_depth = 1
+            return
+
+        if self._chrome_tag is not None:
+            if tag == self._chrome_tag:
+                self._chrome_depth += 1
+        elif tag in BOILERPLATE_CONTAINERS and self._is_boilerplate(attrs):
+            # Page chrome is left out of the page text, but an <article> or <main>
+            # inside it is still collected
+            self._flush_block()
+            self._chrome_tag = tag
+            self._chrome_depth = 1
+
+        if tag in MAIN_TAGS:
+            self._main_depth += 1
+
+        if tag in BLOCK_TAGS:
+            self._flush_block(is_heading=tag in HEADING_TAGS)
+        elif tag == "a":
+            self._link_depth += 1
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+
+        if tag == "title" and self._in_title:
+            self._in_title = False
+            self.title = " ".join("".join(self._title_parts).split())
+            return
+
+        if tag in BLOCK_TAGS:
+            self._flush_block()
+        elif tag == "a" and self._link_depth > 0:
+            self._link_depth -= 1
+
+        if tag in MAIN_TAGS and self._main_depth > 0:
+            self._main_depth -= 1
+
+        if tag == self._chrome_tag:
+            self._chrome_depth -= 1
+            if self._chrome_depth == 0:
+                self._chrome_tag = None
+
+    def handle_data(self, data):
+        if self.done:
+            return
+
+        if self._in_title:
+            self._title_parts.append(data)
+            return
+
+        if self._skip_tag is not None:
+            return
+
+        in_link = self._link_depth > 0
+        if self._main_depth > 0:
+            self._main.add(data, in_link)
+        if self._chrome_tag is None:
+            self._page.add(data, in_link)
+
+    def close(self):
+        super().close()
+        if self._in_title:
+            self.title = " ".join("".join(self._title_parts).split())
+        self._flush_block()
+
+    @staticmethod
+    def _is_boilerplate(attrs) -> bool:
+        # Class names and ids must be boilerplate words as a whole ("sidebar",
+        # "cookie-banner"); "has-sidebar" or "main-menu-wrapper" are not chrome
+        for name, value in attrs:
+            if not value:
+                continue
+            if name in ("class", "id"):
+                for token in value.lower().split():
+                    if all(word in BOILERPLATE_WORDS for word in re.split(r"[-_]", token)):
+                        return True
+            if name == "role" and value in ("navigation", "banner", "contentinfo", "complementary"):
+                return True
+        return False
+
+    def _flush_block(self, is_heading: bool = False):
+        self._main.start_block(is_heading)
+        self._page.start_block(is_heading)
+
+        if self.max_chars is None:
+            return
+        # Stop once the main content reaches the limit, or the page text does
+        # before any <article>/<main> text has been found
+        if self._main.chars >= self.max_chars or (not self._main.blocks and self._page.chars >= self.max_chars):
+            self.done = True
+
+    @property
+    def blocks(self) -> List[str]:
+        """Blocks of the main content: <article>/<main> if the page has them, else the whole page."""
+        return self._main.blocks if self._main.blocks else self._page.blocks
+
+    @property
+    def content(self) -> str:
+        content = " ".join(self.blocks)
+        if self.max_chars is not None:
+            content = content[:self.max_chars]
+        return content
+
+
+def extract_main_content(html: str, max_chars: Optional[int] = None,
+                         chunk_size: int = 65536) -> Tuple[Optional[str], str]:
+    """
+    Extract the title and main text of an HTML document.
+
+    The document is fed to the parser in chunks and parsing stops as soon as
+    ``max_chars`` of text have been collected.
+
+    Args:
+        html: The HTML document
+        max_chars: Maximum characters of text to keep (None for all)
+        chunk_size: Characters fed to the parser at a time
+
+    Returns:
+        Tuple of (title, content); title is None if the page has no <title>
+    """
+    extractor = MainContentExtractor(max_chars=max_chars)
+    for start in range(0, len(html), chunk_size):
+        extractor.feed(html[start:start + chunk_size])
+        if extractor.done:
+            break
+    extractor.close()
+
+    return extractor.title, extractor.content
+
+
+def extract_page(mime_type: str, text: str, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Extract the title and main text of a downloaded document.
+
+    This is a module-level function so it can run in a process pool.
+
+    Args:
+        mime_type: Media type of the document ("text/plain" or an HTML type)
+        text: The decoded document
+        max_chars: Maximum characters of text to keep (None for all)
+
+    Returns:
+        List of [title, content]; the title is "No title found" if the page has none
+    """
+    if mime_type == "text/plain":
+        content = " ".join(text.split())
+        return ["No title found", content[:max_chars] if max_chars is not None else content]
+
+    title, content = extract_main_content(text, max_chars=max_chars)
+    return [title if title is not None else "No title found", content]
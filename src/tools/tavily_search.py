@@ -1,8 +1,13 @@
 # src/tools/tavily_search.py
+import json
 import os
 from typing import Dict, Any, Optional, List
 from dotenv import load_dotenv
 from tavily import TavilyClient
+from src.utils.cache import SQLiteCache, default_cache
+from src.utils.cassette import get_active_cassette
+from src.utils.resilience import get_guard
+from src.utils.tracing import trace_span
 
 load_dotenv()
 
@@ -12,7 +17,8 @@ class TavilySearchTool:
     A tool for performing web searches using the Tavily API.
     """
 
-    def __init__(self):
+    def __init__(self, cache: Optional[SQLiteCache] = None, use_cache: bool = True,
+                 include_raw_content: Optional[bool] = None, raw_content_max_chars: Optional[int] = None):
         # Get API key from environment variables
         api_key = os.getenv("TAVILY_API_KEY")
         if not api_key:
@@ -21,7 +27,26 @@ class TavilySearchTool:
         # Initialize the Tavily client
         self.client = TavilyClient(api_key=api_key)
 
-    def search(self, query: str, max_results: int = 5, search_depth: str = "basic") -> Dict[str, Any]:
+        # Cache search responses on disk so repeated queries skip the paid API call
+        if cache is None and use_cache:
+            cache = default_cache(
+                "tavily",
+                ttl=float(os.getenv("TAVILY_CACHE_TTL", "86400")),
+                max_entries=int(os.getenv("TAVILY_CACHE_MAX_ENTRIES", "5000"))
+            )
+        self.cache = cache if use_cache else None
+
+        # Full page text is large, so it is only requested when asked for and
+        # each result's copy is cut to raw_content_max_chars before being kept
+        if include_raw_content is None:
+            include_raw_content = os.getenv("TAVILY_INCLUDE_RAW_CONTENT", "").lower() in ("1", "true", "yes")
+        if raw_content_max_chars is None:
+            raw_content_max_chars = int(os.getenv("TAVILY_RAW_CONTENT_MAX_CHARS", "10000"))
+        self.include_raw_content = include_raw_content
+        self.raw_content_max_chars = raw_content_max_chars
+
+    def search(self, query: str, max_results: int = 5, search_depth: str = "basic",
+               include_raw_content: Optional[bool] = None) -> Dict[str, Any]:
         """
         Perform a search using Tavily API.
 
@@ -29,51 +54,101 @@ class TavilySearchTool:
             query: The search query
             max_results: Maximum number of results to return
             search_depth: How deep to search ("basic", "advanced")
+            include_raw_content: Also return each page's full text (None uses the tool's setting)
 
         Returns:
             Dictionary containing search results and related information
         """
-        try:
-            # Perform the search using Tavily
-            response = self.client.search(
-                query=query,
-                search_depth=search_depth,
-                max_results=max_results,
-                include_answer=True,
-                include_raw_content=True,
-                include_images=False
-            )
+        if include_raw_content is None:
+            include_raw_content = self.include_raw_content
+        raw_limit = self.raw_content_max_chars if include_raw_content else None
+
+        with trace_span("tavily.search", "search", query=query, search_depth=search_depth,
+                        max_results=max_results, raw_content=include_raw_content) as span:
+            # Recording or replaying bypasses the cache so every search lands on the cassette
+            cassette = get_active_cassette()
+            cache_key = None
+            if self.cache is not None and cassette is None:
+                cache_key = SQLiteCache.make_key(query, search_depth, max_results, raw_limit)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    span.set(cache_hit=True, results=len(cached.get("results", [])))
+                    return cached
+
+            span.set(cache_hit=False)
+            try:
+                # Perform the search using Tavily, rate limited and retried by the shared guard
+                def run_search():
+                    return get_guard("tavily").call(
+                        lambda: self.client.search(
+                            query=query,
+                            search_depth=search_depth,
+                            max_results=max_results,
+                            include_answer=True,
+                            include_raw_content=include_raw_content,
+                            include_images=False
+                        ),
+                        on_retry=lambda retry, delay, error: span.set(retries=retry)
+                    )
 
-            return response
-        except Exception as e:
-            print(f"Error during Tavily search: {e}")
-            return {
-                "query": query,
-                "answer": None,
-                "results": [],
-                "error": str(e)
-            }
-
-    def get_sources(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+                if cassette is not None:
+                    response = cassette.call(
+                        "tavily", [query, search_depth, max_results, raw_limit], run_search, label=query
+                    )
+                else:
+                    response = run_search()
+
+                if raw_limit is not None:
+                    for result in response.get("results", []):
+                        if result.get("raw_content"):
+                            result["raw_content"] = result["raw_content"][:raw_limit]
+
+                span.set(
+                    results=len(response.get("results", [])),
+                    bytes=len(json.dumps(response, default=str).encode("utf-8"))
+                )
+                if cache_key is not None:
+                    self.cache.set(cache_key, response)
+
+                return response
+            except Exception as e:
+                print(f"Error during Tavily search: {e}")
+                span.error = str(e)
+                return {
+                    "query": query,
+                    "answer": None,
+                    "results": [],
+                    "error": str(e)
+                }
+
+    def get_sources(self, query: str, max_results: int = 5, search_depth: str = "basic",
+                    include_raw_content: Optional[bool] = None) -> List[Dict[str, Any]]:
         """
         Get just the sources from a search.
 
         Args:
             query: The search query
             max_results: Maximum number of results to return
+            search_depth: How deep to search ("basic", "advanced")
+            include_raw_content: Also return each page's full text (None uses the tool's setting)
 
         Returns:
-            List of sources with title, url and content
+            List of sources with title, url, content and score, plus raw_content
+            when the page's full text was returned
         """
-        response = self.search(query, max_results)
+        response = self.search(query, max_results, search_depth, include_raw_content)
 
         sources = []
         if "results" in response:
             for result in response["results"]:
-                sources.append({
+                source = {
                     "title": result.get("title", ""),
                     "url": result.get("url", ""),
-                    "content": result.get("content", "")
-                })
+                    "content": result.get("content", ""),
+                    "score": result.get("score")
+                }
+                if result.get("raw_content"):
+                    source["raw_content"] = result["raw_content"]
+                sources.append(source)
 
         return sources
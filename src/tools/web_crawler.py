@@ -1,9 +1,38 @@
 # src/tools/web_crawler.py
-import requests
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional, Tuple
-import time
+import asyncio
+import codecs
+import multiprocessing
+import os
 import random
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.tools.html_extractor import MainContentExtractor, extract_page
+from src.utils.cache import SQLiteCache, default_cache
+from src.utils.cassette import get_active_cassette
+from src.utils.tracing import bind_context, trace_span
+
+# Content types worth downloading; anything else (PDFs, images, archives) is skipped
+ALLOWED_CONTENT_TYPES = {"text/html", "application/xhtml+xml", "text/plain"}
+
+
+class _HostSlot:
+    """
+    Per-host scheduling state used while crawling: a concurrency limit and the
+    earliest time the next request to the host may start.
+    """
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.lock = asyncio.Lock()
+        self.next_allowed = 0.0
 
 
 class WebCrawler:
@@ -11,50 +40,384 @@ class WebCrawler:
     A web crawler tool to extract information from websites.
     """
 
-    def __init__(self):
+    def __init__(self, max_concurrency: int = 8, per_host_concurrency: int = 1,
+                 min_host_delay: float = 1.0, max_host_delay: float = 3.0,
+                 respect_robots: bool = True, max_page_bytes: int = 2 * 1024 * 1024,
+                 max_content_chars: int = 10000, parse_workers: Optional[int] = None,
+                 min_pool_batch: int = 8, page_cache: Optional[SQLiteCache] = None,
+                 use_cache: bool = True):
         # Set up a session for making requests
         self.session = requests.Session()
         # Set a user agent to avoid being blocked
+        self.user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': self.user_agent
         })
 
-    def fetch_page(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+        # Size the connection pool so concurrent fetches can reuse connections
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Politeness settings: the delay only applies between requests to the same host
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.min_host_delay = min_host_delay
+        self.max_host_delay = max_host_delay
+        self.respect_robots = respect_robots
+
+        # Download limits: bodies are streamed and cut off after max_page_bytes,
+        # and extraction stops once max_content_chars of text have been kept
+        self.max_page_bytes = max_page_bytes
+        self.max_content_chars = max_content_chars
+
+        # Parsing is CPU-bound and holds the GIL; with parse_workers > 0, crawls of
+        # at least min_pool_batch URLs parse pages in a process pool instead
+        if parse_workers is None:
+            parse_workers = int(os.getenv("CRAWLER_PARSE_WORKERS", "0"))
+        self.parse_workers = parse_workers
+        self.min_pool_batch = min_pool_batch
+        self._parser_pool: Optional[ProcessPoolExecutor] = None
+        self._parser_pool_lock = threading.Lock()
+
+        # Extracted pages are cached with their validators so recrawls can be
+        # answered with 304 Not Modified instead of a full download and parse
+        if page_cache is None and use_cache:
+            page_cache = default_cache(
+                "pages",
+                ttl=float(os.getenv("PAGE_CACHE_TTL", str(7 * 86400))),
+                max_bytes=int(os.getenv("PAGE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+            )
+        self.page_cache = page_cache if use_cache else None
+
+        # robots.txt rules cached per host (None means everything is allowed)
+        self._robots: Dict[str, Optional[RobotFileParser]] = {}
+        self._robots_lock = threading.Lock()
+
+    def fetch_page(self, url: str, parser_pool: Optional[Executor] = None) -> Tuple[Optional[str], Optional[str]]:
         """
         Fetches a web page and returns its content.
 
         Args:
             url: The URL to fetch
+            parser_pool: Executor to parse the page in (None parses while downloading)
 
         Returns:
             Tuple of (title, content) if successful, (None, None) otherwise
         """
+        download = lambda: self._download_and_parse(url, parser_pool)
+
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()  # Raise exception for 4XX/5XX status codes
+            cassette = get_active_cassette()
+            if cassette is not None:
+                title, content = cassette.call("page", [url], download, label=url)
+            else:
+                title, content = download()
 
-            # Parse the HTML content
-            soup = BeautifulSoup(response.text, 'html.parser')
+            return title, content
 
-            # Extract title
-            title = soup.title.string if soup.title else "No title found"
+        except Exception as e:
+            print(f"Error fetching {url}: {str(e)}")
+            return None, None
 
-            # Extract main content (this is a simple approach; actual implementation may vary)
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.extract()
+    @contextmanager
+    def _open_page(self, url: str,
+                   headers: Optional[Dict[str, str]] = None) -> Iterator[Tuple[requests.Response, str, Iterator[str]]]:
+        """
+        Start streaming a page, checking its status and content type.
 
-            # Get text content
-            content = soup.get_text(separator=' ', strip=True)
+        Args:
+            url: The URL to fetch
+            headers: Extra request headers, such as conditional-request validators
 
-            # Clean up the content a bit
-            content = ' '.join(content.split())
+        Yields:
+            Tuple of (response, media type, iterator of decoded text chunks); the
+            chunks stop once ``max_page_bytes`` have been read, and are empty for
+            a 304 Not Modified response
+        """
+        with trace_span("http.get", "http", url=url) as span:
+            if headers:
+                response = self.session.get(url, timeout=10, stream=True, headers=headers)
+            else:
+                response = self.session.get(url, timeout=10, stream=True)
+            stats = {"bytes": 0, "truncated": False}
+            try:
+                span.set(status=response.status_code)
+                if response.status_code == 304:
+                    span.set(not_modified=True)
+                    yield response, "", iter(())
+                    return
+                response.raise_for_status()  # Raise exception for 4XX/5XX status codes
 
-            return title, content
+                content_type = response.headers.get("Content-Type", "")
+                mime_type = content_type.split(";")[0].strip().lower()
+                if mime_type and mime_type not in ALLOWED_CONTENT_TYPES:
+                    raise ValueError(f"Unsupported content type: {mime_type}")
+
+                decoder = codecs.getincrementaldecoder(self._charset(content_type))(errors="replace")
+
+                def chunks() -> Iterator[str]:
+                    for chunk in response.iter_content(chunk_size=16384):
+                        if stats["bytes"] + len(chunk) > self.max_page_bytes:
+                            chunk = chunk[:self.max_page_bytes - stats["bytes"]]
+                            stats["truncated"] = True
+                        stats["bytes"] += len(chunk)
+                        yield decoder.decode(chunk, final=stats["truncated"])
+                        if stats["truncated"]:
+                            return
+                    yield decoder.decode(b"", final=True)
+
+                yield response, mime_type, chunks()
+            finally:
+                response.close()
+                span.set(bytes=stats["bytes"], truncated=stats["truncated"])
+
+    def _download_and_parse(self, url: str, parser_pool: Optional[Executor] = None) -> List[str]:
+        """
+        Download a page and extract its title and main text.
+
+        A page in the page cache is revalidated with a conditional request and
+        its stored extraction is reused when the server answers 304. Otherwise
+        the body is streamed and, without a parser pool, fed to the extractor
+        chunk by chunk, so the download stops as soon as enough text has been
+        collected or the byte cap is reached.
+
+        Args:
+            url: The URL to fetch
+            parser_pool: Executor to parse the page in (None parses while downloading)
+
+        Returns:
+            List of [title, content]
+        """
+        # Recording or replaying bypasses the cache so every page lands on the cassette
+        cache = self.page_cache if get_active_cassette() is None else None
+        cache_key = cached = None
+        headers: Dict[str, str] = {}
+        if cache is not None:
+            cache_key = SQLiteCache.make_key(url, self.max_content_chars)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+
+        with self._open_page(url, headers) as (response, mime_type, chunks):
+            if response.status_code == 304:
+                if cached is None:
+                    raise ValueError("Unexpected 304 Not Modified for an uncached page")
+                return [cached["title"], cached["content"]]
+
+            if parser_pool is None:
+                page = self._extract_streaming(mime_type, chunks)
+            else:
+                document = "".join(chunks)
+
+        if parser_pool is not None:
+            with trace_span("html.parse", "parse", url=url, chars=len(document)):
+                page = parser_pool.submit(extract_page, mime_type, document, self.max_content_chars).result()
+
+        # Only pages the server can revalidate are worth keeping
+        validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+        if cache is not None and any(validators.values()):
+            cache.set(cache_key, {**validators, "title": page[0], "content": page[1]})
+
+        return page
+
+    def _extract_streaming(self, mime_type: str, chunks: Iterator[str]) -> List[str]:
+        """
+        Extract a page while it downloads, stopping once enough text is kept.
+
+        Args:
+            mime_type: Media type of the page
+            chunks: Decoded text chunks of the body
+
+        Returns:
+            List of [title, content]
+        """
+        if mime_type == "text/plain":
+            parts: List[str] = []
+            chars = 0
+            for text in chunks:
+                parts.append(text)
+                chars += len(text)
+                if chars >= self.max_content_chars:
+                    break
+            return extract_page(mime_type, "".join(parts), self.max_content_chars)
+
+        extractor = MainContentExtractor(max_chars=self.max_content_chars)
+        for text in chunks:
+            extractor.feed(text)
+            if extractor.done:
+                break
+        extractor.close()
 
+        title = extractor.title if extractor.title is not None else "No title found"
+        return [title, extractor.content]
+
+    def _get_parser_pool(self) -> ProcessPoolExecutor:
+        """Get the process pool used for parsing, starting it on first use."""
+        with self._parser_pool_lock:
+            if self._parser_pool is None:
+                # Spawned workers are safe to start from a process with running threads
+                self._parser_pool = ProcessPoolExecutor(
+                    max_workers=self.parse_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._parser_pool
+
+    def close(self) -> None:
+        """Shut down the parsing process pool, if one was started."""
+        with self._parser_pool_lock:
+            if self._parser_pool is not None:
+                self._parser_pool.shutdown()
+                self._parser_pool = None
+
+    @staticmethod
+    def _charset(content_type: str) -> str:
+        """
+        Get the charset declared in a Content-Type header, defaulting to UTF-8.
+
+        Args:
+            content_type: Value of the Content-Type header
+
+        Returns:
+            Name of a codec Python knows
+        """
+        for param in content_type.split(";")[1:]:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "charset":
+                charset = value.strip().strip('"\'')
+                try:
+                    return codecs.lookup(charset).name
+                except LookupError:
+                    break
+        return "utf-8"
+
+    def _get_robots(self, url: str) -> Optional[RobotFileParser]:
+        """
+        Get the robots.txt rules for the host of a URL, fetching them once per host.
+
+        Args:
+            url: Any URL on the host
+
+        Returns:
+            Parsed robots.txt rules, or None if the host places no restrictions
+        """
+        cassette = get_active_cassette()
+        if cassette is not None and cassette.replaying:
+            # Replays never touch the network, so there is nobody to be polite to
+            return None
+
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+
+        with self._robots_lock:
+            if host in self._robots:
+                return self._robots[host]
+
+        rules = None
+        try:
+            with trace_span("http.robots", "http", url=f"{host}/robots.txt") as span:
+                response = self.session.get(f"{host}/robots.txt", timeout=5)
+                span.set(status=response.status_code, bytes=len(response.content))
+            if response.status_code in (401, 403):
+                # Same convention as urllib.robotparser: access denied means disallow all
+                rules = RobotFileParser()
+                rules.disallow_all = True
+            elif response.status_code < 400:
+                rules = RobotFileParser()
+                rules.parse(response.text.splitlines())
         except Exception as e:
-            print(f"Error fetching {url}: {str(e)}")
-            return None, None
+            print(f"Error fetching robots.txt for {host}: {str(e)}")
+
+        with self._robots_lock:
+            self._robots[host] = rules
+        return rules
+
+    async def _crawl_one(self, url: str, host_slots: Dict[str, _HostSlot], global_limit: asyncio.Semaphore,
+                         parser_pool: Optional[Executor] = None) -> Optional[Dict[str, str]]:
+        """
+        Crawl a single URL, honouring robots.txt and the per-host delay.
+
+        Args:
+            url: The URL to crawl
+            host_slots: Scheduling state for each host in the current crawl
+            global_limit: Semaphore bounding the number of fetches in flight
+            parser_pool: Executor to parse pages in (None parses in this process)
+
+        Returns:
+            Dictionary with url, title and content, or None if the page was skipped
+        """
+        host = urlsplit(url).netloc.lower()
+        slot = host_slots.setdefault(host, _HostSlot(self.per_host_concurrency))
+        loop = asyncio.get_running_loop()
+
+        async with slot.semaphore:
+            async with slot.lock:
+                rules = None
+                if self.respect_robots:
+                    rules = await asyncio.to_thread(self._get_robots, url)
+                if rules is not None and not rules.can_fetch(self.user_agent, url):
+                    print(f"Skipping {url}: disallowed by robots.txt")
+                    return None
+
+                # Wait until the host is ready for another request
+                wait = slot.next_allowed - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+                cassette = get_active_cassette()
+                replaying = cassette is not None and cassette.replaying
+                delay = 0.0 if replaying else random.uniform(self.min_host_delay, self.max_host_delay)
+                crawl_delay = rules.crawl_delay(self.user_agent) if rules is not None else None
+                if crawl_delay:
+                    delay = max(delay, float(crawl_delay))
+                slot.next_allowed = loop.time() + delay
+
+            async with global_limit:
+                if parser_pool is None:
+                    title, content = await asyncio.to_thread(self.fetch_page, url)
+                else:
+                    title, content = await asyncio.to_thread(self.fetch_page, url, parser_pool)
+
+        if title and content:
+            return {
+                "url": url,
+                "title": title,
+                "content": content[:self.max_content_chars]  # Same limit as fetch_page
+            }
+        return None
+
+    async def crawl_urls_async(self, urls: List[str]) -> List[Dict[str, str]]:
+        """
+        Crawl a list of URLs concurrently and extract content from each.
+
+        Different hosts are fetched in parallel up to ``max_concurrency``;
+        requests to the same host are spaced by the politeness delay. Batches of
+        at least ``min_pool_batch`` URLs are parsed in a process pool when
+        ``parse_workers`` is set; smaller ones are parsed in this process.
+
+        Args:
+            urls: List of URLs to crawl
+
+        Returns:
+            List of dictionaries containing url, title, and content, in input order
+        """
+        host_slots: Dict[str, _HostSlot] = {}
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+
+        parser_pool = None
+        if self.parse_workers > 0 and len(urls) >= self.min_pool_batch:
+            parser_pool = self._get_parser_pool()
+
+        pages = await asyncio.gather(*[
+            self._crawl_one(url, host_slots, global_limit, parser_pool) for url in urls
+        ])
+
+        return [page for page in pages if page is not None]
 
     def crawl_urls(self, urls: List[str]) -> List[Dict[str, str]]:
         """
@@ -66,19 +429,14 @@ class WebCrawler:
         Returns:
             List of dictionaries containing url, title, and content
         """
-        results = []
+        if not urls:
+            return []
 
-        for url in urls:
-            # Add a small delay to avoid overwhelming servers
-            time.sleep(random.uniform(1.0, 3.0))
-
-            title, content = self.fetch_page(url)
-
-            if title and content:
-                results.append({
-                    "url": url,
-                    "title": title,
-                    "content": content[:10000]  # Limit content length
-                })
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.crawl_urls_async(urls))
 
-        return results
\ No newline at end of file
+        # Called from inside an event loop: run the crawl on its own loop in a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(bind_context(asyncio.run), self.crawl_urls_async(urls)).result()
@@ -5,13 +5,43 @@ Utility functions for the research system.
 from .helpers import (
     clean_text,
     extract_key_points,
+    parse_json_response,
+    estimate_tokens,
     save_research_data,
     load_research_data
 )
+from .cache import SQLiteCache, default_cache
+from .checkpoints import CheckpointStore, default_checkpoint_store
+from .context_packer import ContextPacker
+from .dedupe import canonicalize_url, dedupe_sources
+from .hedging import HedgingPolicy, default_hedging_policy
+from .resilience import CircuitOpenError, ProviderGuard, configure_guard, get_guard
+from .tracing import Tracer, TraceSink, JSONFileSink, OpenTelemetrySink, trace_span, use_tracer
 
 __all__ = [
     "clean_text",
     "extract_key_points",
+    "parse_json_response",
+    "estimate_tokens",
     "save_research_data",
-    "load_research_data"
+    "load_research_data",
+    "SQLiteCache",
+    "default_cache",
+    "CheckpointStore",
+    "default_checkpoint_store",
+    "ContextPacker",
+    "canonicalize_url",
+    "dedupe_sources",
+    "HedgingPolicy",
+    "default_hedging_policy",
+    "CircuitOpenError",
+    "ProviderGuard",
+    "configure_guard",
+    "get_guard",
+    "Tracer",
+    "TraceSink",
+    "JSONFileSink",
+    "OpenTelemetrySink",
+    "trace_span",
+    "use_tracer"
 ]
\ No newline at end of file
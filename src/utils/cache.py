@@ -0,0 +1,267 @@
+# src/utils/cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# Default location of the on-disk cache shared by all tools on this machine
+DEFAULT_CACHE_PATH = ".cache/research_cache.sqlite"
+
+
+class SQLiteCache:
+    """
+    A persistent key/value cache backed by SQLite with TTL expiry and LRU eviction
+    by entry count or total size.
+
+    Several caches can share one database file by using different namespaces.
+    Because the data lives in SQLite, the cache is shared between every process
+    on the same machine that points at the same file.
+    """
+
+    def __init__(self, path: str, namespace: str = "default", ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            path: Path to the SQLite database file
+            namespace: Name separating this cache's entries from others in the file
+            ttl: Seconds an entry stays valid (None keeps entries until evicted)
+            max_entries: Maximum number of entries in the namespace (None for no limit)
+            max_bytes: Maximum total size of the namespace's values (None for no limit)
+        """
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # Counters for this process
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            # Databases created before size-based eviction lack the size column
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(cache_entries)")]
+            if "size" not in columns:
+                conn.execute("ALTER TABLE cache_entries ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, accessed_at)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per operation keeps the cache safe across threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a stable cache key from JSON-serializable parts.
+
+        Args:
+            *parts: Values identifying the cached item
+
+        Returns:
+            Hex digest usable as a cache key
+        """
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a value, refreshing its LRU position on a hit.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None if it is missing or expired
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+
+                if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                        (self.namespace, key)
+                    )
+                    row = None
+
+                if row is not None:
+                    conn.execute(
+                        "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                        (now, self.namespace, key)
+                    )
+        except sqlite3.Error as e:
+            print(f"Error reading cache {self.path}: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a value and evict expired or least recently used entries.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value to store
+        """
+        now = time.time()
+        raw = json.dumps(value, ensure_ascii=False)
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, created_at, accessed_at, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.namespace, key, raw, now, now, len(raw.encode("utf-8")))
+                )
+                evicted = self._evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"Error writing cache {self.path}: {e}")
+            return
+
+        with self._lock:
+            self.evictions += evicted
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> int:
+        """
+        Remove expired entries, then the least recently used ones over the
+        entry and byte caps.
+
+        Returns:
+            Number of entries removed
+        """
+        removed = 0
+        if self.ttl is not None:
+            removed += conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?",
+                (self.namespace, now - self.ttl)
+            ).rowcount
+
+        if self.max_entries is not None:
+            count = conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                removed += conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                    "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY accessed_at LIMIT ?)",
+                    (self.namespace, self.namespace, excess)
+                ).rowcount
+
+        if self.max_bytes is not None:
+            total = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+            excess = total - self.max_bytes
+            if excess > 0:
+                stale = []
+                for key, size in conn.execute(
+                    "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY accessed_at",
+                    (self.namespace,)
+                ):
+                    stale.append((self.namespace, key))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", stale)
+                removed += len(stale)
+
+        return removed
+
+    def clear(self) -> None:
+        """Remove every entry in this cache's namespace."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters for this process and the current cache size.
+
+        Returns:
+            Dictionary with hits, misses, evictions, hit_rate, entries and bytes
+        """
+        with self._connect() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+                (self.namespace,)
+            ).fetchone()
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "bytes": size
+            }
+
+
+def default_cache(namespace: str, ttl: Optional[float] = None, max_entries: Optional[int] = None,
+                  max_bytes: Optional[int] = None) -> Optional[SQLiteCache]:
+    """
+    Open a namespace in the shared on-disk cache configured by the environment.
+
+    The database path comes from RESEARCH_CACHE_PATH; setting it to an empty
+    string disables caching.
+
+    Args:
+        namespace: Name of the cache namespace
+        ttl: Seconds an entry stays valid
+        max_entries: Maximum number of entries in the namespace
+        max_bytes: Maximum total size of the namespace's values
+
+    Returns:
+        The cache, or None if caching is disabled
+    """
+    path = os.getenv("RESEARCH_CACHE_PATH", DEFAULT_CACHE_PATH)
+    if not path:
+        return None
+
+    try:
+        return SQLiteCache(path, namespace=namespace, ttl=ttl, max_entries=max_entries,
+                           max_bytes=max_bytes)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Error opening cache {path}, continuing without it: {e}")
+        return None
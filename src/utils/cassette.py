@@ -0,0 +1,136 @@
+# src/utils/cassette.py
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Cassette shared by every tool and agent in the process (None when not recording/replaying)
+_active_cassette: Optional["Cassette"] = None
+
+
+class CassetteMissError(KeyError):
+    """
+    Raised in replay mode when a request was never recorded.
+    """
+
+
+class Cassette:
+    """
+    Records external interactions (Gemini, Tavily, web pages) of a run to a JSON
+    file and replays them deterministically without touching the network.
+
+    Interactions are keyed by their kind and request. Identical requests are
+    replayed in the order they were recorded.
+    """
+
+    def __init__(self, path: str, mode: str = "record", replay_latency: bool = False):
+        """
+        Args:
+            path: Path of the cassette file
+            mode: "record" to capture a live run, "replay" to serve a recorded one
+            replay_latency: In replay mode, sleep for each interaction's recorded latency
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if mode == "replay":
+            with open(path, "r", encoding="utf-8") as f:
+                self.interactions = json.load(f)["interactions"]
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @staticmethod
+    def _key(kind: str, request: Any) -> str:
+        raw = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return f"{kind}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    def call(self, kind: str, request: Any, fn: Callable[[], Any], label: str = "") -> Any:
+        """
+        Run an external call through the cassette.
+
+        In record mode the call is made, timed and stored; in replay mode the
+        stored result is returned instead.
+
+        Args:
+            kind: Kind of interaction ("gemini", "tavily", "page")
+            request: JSON-serializable description identifying the request
+            fn: Function performing the live call and returning a JSON-serializable result
+            label: Short human-readable description stored with the interaction
+
+        Returns:
+            The live or recorded result
+        """
+        key = self._key(kind, request)
+
+        if self.replaying:
+            with self._lock:
+                entries = self.interactions.get(key)
+                if not entries:
+                    raise CassetteMissError(f"No recorded {kind} interaction for {label or key}")
+                position = self._positions.get(key, 0)
+                # Requests made more often than recorded reuse the last recording
+                entry = entries[min(position, len(entries) - 1)]
+                self._positions[key] = position + 1
+
+            if self.replay_latency and entry.get("latency_s"):
+                time.sleep(entry["latency_s"])
+            return entry["response"]
+
+        started = time.perf_counter()
+        result = fn()
+        latency = time.perf_counter() - started
+
+        with self._lock:
+            self.interactions.setdefault(key, []).append({
+                "kind": kind,
+                "label": label,
+                "latency_s": round(latency, 4),
+                "response": result
+            })
+        return result
+
+    def save(self) -> None:
+        """Write recorded interactions to the cassette file."""
+        if self.replaying:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with self._lock:
+            data = {
+                "version": 1,
+                "recorded_at": datetime.now().isoformat(timespec="seconds"),
+                "interactions": self.interactions
+            }
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def use_cassette(cassette: Optional[Cassette]) -> None:
+    """
+    Make a cassette active for the whole process (None switches it off).
+
+    Args:
+        cassette: Cassette to use
+    """
+    global _active_cassette
+    _active_cassette = cassette
+
+
+def get_active_cassette() -> Optional[Cassette]:
+    """Get the cassette active in this process, if any."""
+    return _active_cassette
@@ -0,0 +1,130 @@
+# src/utils/checkpoints.py
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Default directory of the per-run workflow checkpoints
+DEFAULT_CHECKPOINT_DIR = ".cache/checkpoints"
+
+# Default number of runs whose checkpoints are kept
+DEFAULT_MAX_RUNS = 200
+
+
+class CheckpointStore:
+    """
+    Persists the workflow state of research runs, one JSON file per run id.
+
+    A checkpoint is written after every completed workflow step, so an
+    interrupted run can continue from the step after the last one that finished.
+    Beyond ``max_runs`` checkpoints, the least recently updated ones are removed
+    whenever ``prune`` is called.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CHECKPOINT_DIR, max_runs: Optional[int] = DEFAULT_MAX_RUNS):
+        """
+        Args:
+            directory: Directory holding the checkpoint files
+            max_runs: Number of runs whose checkpoints are kept (None keeps them all)
+        """
+        self.directory = directory
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, run_id: str) -> str:
+        if not re.fullmatch(r"[A-Za-z0-9_.-]+", run_id):
+            raise ValueError(f"Invalid run id: {run_id}")
+        return os.path.join(self.directory, f"{run_id}.json")
+
+    def save(self, run_id: str, checkpoint: Dict[str, Any]) -> None:
+        """
+        Write a run's checkpoint, replacing the previous one atomically.
+
+        Args:
+            run_id: Id of the run
+            checkpoint: JSON-serializable checkpoint data
+        """
+        path = self._path(run_id)
+        data = dict(checkpoint, run_id=run_id, updated_at=time.time())
+
+        with self._lock:
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, default=str)
+            os.replace(temp_path, path)
+
+    def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a run's checkpoint.
+
+        Args:
+            run_id: Id of the run
+
+        Returns:
+            The checkpoint, or None if the run has none
+        """
+        path = self._path(run_id)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def delete(self, run_id: str) -> None:
+        """Remove a run's checkpoint if it exists."""
+        path = self._path(run_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def list_runs(self) -> List[str]:
+        """List the ids of runs with a checkpoint, most recently updated first."""
+        files = [name for name in os.listdir(self.directory) if name.endswith(".json")]
+        files.sort(key=lambda name: os.path.getmtime(os.path.join(self.directory, name)), reverse=True)
+        return [name[:-len(".json")] for name in files]
+
+    def prune(self) -> int:
+        """
+        Remove the least recently updated checkpoints beyond max_runs.
+
+        Returns:
+            Number of checkpoints removed
+        """
+        if self.max_runs is None:
+            return 0
+
+        removed = 0
+        with self._lock:
+            for run_id in self.list_runs()[self.max_runs:]:
+                try:
+                    self.delete(run_id)
+                    removed += 1
+                except OSError as e:
+                    print(f"Error removing checkpoint {run_id}: {e}")
+        return removed
+
+
+def default_checkpoint_store() -> Optional[CheckpointStore]:
+    """
+    Open the checkpoint store configured by the environment.
+
+    The directory comes from RESEARCH_CHECKPOINT_DIR; setting it to an empty
+    string disables checkpoints. RESEARCH_CHECKPOINT_MAX_RUNS sets how many
+    runs' checkpoints are kept (empty or 0 keeps them all).
+
+    Returns:
+        The store, or None if checkpoints are disabled
+    """
+    directory = os.getenv("RESEARCH_CHECKPOINT_DIR", DEFAULT_CHECKPOINT_DIR)
+    if not directory:
+        return None
+
+    max_runs = int(os.getenv("RESEARCH_CHECKPOINT_MAX_RUNS", str(DEFAULT_MAX_RUNS)) or 0)
+
+    try:
+        return CheckpointStore(directory, max_runs=max_runs or None)
+    except OSError as e:
+        print(f"Error opening checkpoint directory {directory}, continuing without it: {e}")
+        return None
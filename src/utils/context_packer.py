@@ -0,0 +1,185 @@
+# src/utils/context_packer.py
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.utils.helpers import estimate_tokens
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+# Words too common to say anything about relevance
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "from", "by", "at", "as",
+    "is", "are", "was", "were", "be", "been", "it", "its", "this", "that", "these", "those", "what",
+    "which", "how", "about", "into", "their", "does", "do", "can", "will", "has", "have", "had"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms, dropping stopwords and single characters.
+
+    Args:
+        text: Input text
+
+    Returns:
+        List of terms
+    """
+    return [term for term in TOKEN_PATTERN.findall(text.lower()) if len(term) > 1 and term not in STOPWORDS]
+
+
+class ContextPacker:
+    """
+    Builds the source context of a prompt from the passages most relevant to the
+    research topic, within a token budget.
+
+    Source text (the search snippet and, when available, the page's full text)
+    is split into chunks of about ``chunk_tokens`` tokens, the chunks are ranked
+    against the topic and search queries with BM25, and the best ones are kept
+    until the budget is spent.
+    """
+
+    def __init__(self, token_budget: int = 3000, chunk_tokens: int = 150, max_chunks_per_source: int = 4,
+                 k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            token_budget: Approximate number of tokens the packed context may use
+            chunk_tokens: Approximate size of each chunk in tokens
+            max_chunks_per_source: Chunks kept per source at most, so every source gets a say
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.token_budget = token_budget
+        self.chunk_tokens = chunk_tokens
+        self.max_chunks_per_source = max_chunks_per_source
+        self.k1 = k1
+        self.b = b
+
+    def chunk_text(self, text: str) -> List[str]:
+        """
+        Split text into chunks of whole sentences of about ``chunk_tokens`` tokens.
+
+        Sentences longer than a chunk are split on words.
+
+        Args:
+            text: Text to split
+
+        Returns:
+            List of chunks
+        """
+        max_chars = self.chunk_tokens * 4
+        chunks = []
+        current = ""
+
+        for sentence in SENTENCE_PATTERN.split(" ".join(text.split())):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(sentence[:cut])
+                sentence = sentence[cut:].strip()
+
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def score(self, chunks: List[str], query: str) -> np.ndarray:
+        """
+        Score chunks against a query with BM25.
+
+        Args:
+            chunks: Texts to score
+            query: Query text
+
+        Returns:
+            Array with one score per chunk
+        """
+        terms = sorted(set(tokenize(query)))
+        if not chunks or not terms:
+            return np.zeros(len(chunks))
+
+        index = {term: i for i, term in enumerate(terms)}
+        frequencies = np.zeros((len(chunks), len(terms)))
+        lengths = np.zeros(len(chunks))
+        for row, chunk in enumerate(chunks):
+            tokens = tokenize(chunk)
+            lengths[row] = len(tokens)
+            for term, count in Counter(tokens).items():
+                column = index.get(term)
+                if column is not None:
+                    frequencies[row, column] = count
+
+        documents = len(chunks)
+        document_frequency = (frequencies > 0).sum(axis=0)
+        idf = np.log(1 + (documents - document_frequency + 0.5) / (document_frequency + 0.5))
+
+        average_length = lengths.mean() or 1.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / average_length)
+        weights = frequencies * (self.k1 + 1) / (frequencies + norm[:, None])
+        return weights @ idf
+
+    def pack(self, sources: List[Dict[str, Any]], topic: str, queries: Optional[List[str]] = None) -> str:
+        """
+        Build the context block of a prompt from the most relevant source passages.
+
+        Args:
+            sources: Sources with title, url and content, and optionally raw_content
+            topic: The research topic
+            queries: Search queries used for the research
+
+        Returns:
+            Text with the selected passages grouped by source, in source order
+        """
+        chunks = []
+        owners = []
+        for position, source in enumerate(sources):
+            seen = set()
+            for field in ("content", "raw_content"):
+                for chunk in self.chunk_text(source.get(field) or ""):
+                    if chunk not in seen:
+                        seen.add(chunk)
+                        chunks.append(chunk)
+                        owners.append(position)
+
+        if not chunks:
+            return ""
+
+        scores = self.score(chunks, " ".join([topic] + list(queries or [])))
+        # Highest score first; ties keep the original order so earlier passages win
+        ranking = np.lexsort((np.arange(len(chunks)), -scores))
+
+        selected: Dict[int, List[int]] = {}
+        used = 0
+        for chunk_index in ranking:
+            owner = owners[chunk_index]
+            if len(selected.get(owner, [])) >= self.max_chunks_per_source:
+                continue
+
+            header_cost = 0 if owner in selected else estimate_tokens(
+                f"Source: {sources[owner].get('title', '')}\nURL: {sources[owner].get('url', '')}\n"
+            )
+            cost = header_cost + estimate_tokens(chunks[chunk_index]) + 1
+            if used + cost > self.token_budget:
+                continue
+
+            selected.setdefault(owner, []).append(int(chunk_index))
+            used += cost
+
+        blocks = []
+        for owner in sorted(selected):
+            source = sources[owner]
+            passages = " ... ".join(chunks[i] for i in sorted(selected[owner]))
+            blocks.append(f"Source: {source.get('title', '')}\nURL: {source.get('url', '')}\n{passages}")
+
+        return "\n\n".join(blocks)
@@ -0,0 +1,169 @@
+# src/utils/dedupe.py
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import numpy as np
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_ga", "_gl",
+    "ref_src", "ref_url", "referrer", "spm", "cmpid", "ncid", "ocid", "amp", "outputtype"
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Reduce a URL to a key shared by the variants of the same page.
+
+    The scheme, "www." and "amp." host prefixes, default ports, fragments,
+    tracking parameters, trailing slashes and AMP path markers are dropped, the
+    remaining query parameters are sorted, and Google AMP cache URLs are mapped
+    back to the publisher's URL.
+
+    Args:
+        url: URL to canonicalize
+
+    Returns:
+        Canonical key of the URL (not itself a fetchable URL)
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    path = parts.path
+
+    # https://example-com.cdn.ampproject.org/c/s/example.com/article -> example.com/article
+    if host.endswith(".cdn.ampproject.org"):
+        match = re.match(r"^/[a-z]/(?:s/)?([^/]+)(/.*)?$", path)
+        if match:
+            host, path = match.group(1).lower(), match.group(2) or ""
+
+    for prefix in ("www.", "amp."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/amp/?$", "", path)
+    path = re.sub(r"^/amp/", "/", path)
+    path = re.sub(r"\.amp\.html$", ".html", path)
+    path = path.rstrip("/")
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+
+    key = f"{host}{path}"
+    if query:
+        key += f"?{urlencode(query)}"
+    return key
+
+
+def simhash(text: str, shingle_size: int = 3) -> Optional[int]:
+    """
+    Compute a 64-bit SimHash of a text from its word shingles.
+
+    Texts sharing most of their shingles get fingerprints that differ in only
+    a few bits.
+
+    Args:
+        text: Text to fingerprint
+        shingle_size: Number of consecutive words in each shingle
+
+    Returns:
+        The fingerprint, or None if the text has fewer words than one shingle
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        return None
+
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    digests = b"".join(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest() for shingle in shingles)
+
+    # One row of 64 bits per shingle; each bit position votes by majority
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+    votes = bits.sum(axis=0) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(votes).tobytes(), "big")
+
+
+def dedupe_sources(sources: List[Dict[str, Any]], max_distance: int = 3, min_words: int = 30,
+                   bands: int = 4) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Drop sources that are variants of the same URL or near-duplicate copies of the same text.
+
+    URLs are compared by their canonical form. Texts (the full text when
+    available, otherwise the snippet) of at least ``min_words`` words are
+    compared by SimHash: two sources are duplicates when their fingerprints
+    differ in at most ``max_distance`` bits. Fingerprints are bucketed by
+    ``bands`` slices so each source is only compared with candidates sharing a
+    slice, which keeps the pass linear in the number of sources.
+
+    The first occurrence is kept; it takes over a duplicate's full text if it
+    had none.
+
+    Args:
+        sources: Sources with url, content and optionally raw_content
+        max_distance: Maximum differing fingerprint bits for near-duplicates (below ``bands``)
+        min_words: Minimum words for a text to be fingerprinted
+        bands: Number of fingerprint slices used for bucketing
+
+    Returns:
+        Tuple of (kept sources, removed entries with url, duplicate_of, reason and distance)
+    """
+    band_bits = 64 // bands
+    band_mask = (1 << band_bits) - 1
+
+    kept: List[Dict[str, Any]] = []
+    removed: List[Dict[str, Any]] = []
+    by_url: Dict[str, Dict[str, Any]] = {}
+    buckets: Dict[Tuple[int, int], List[Tuple[int, Dict[str, Any]]]] = {}
+
+    for source in sources:
+        url_key = canonicalize_url(source.get("url") or "")
+        original = by_url.get(url_key) if url_key else None
+        if original is not None:
+            _absorb(original, source)
+            removed.append({"url": source.get("url"), "duplicate_of": original.get("url"),
+                            "reason": "url", "distance": 0})
+            continue
+
+        text = source.get("raw_content") or source.get("content") or ""
+        fingerprint = simhash(text) if len(WORD_PATTERN.findall(text)) >= min_words else None
+
+        if fingerprint is not None:
+            slices = [(band, (fingerprint >> (band * band_bits)) & band_mask) for band in range(bands)]
+            match = None
+            for bucket in slices:
+                for other_fingerprint, other in buckets.get(bucket, []):
+                    distance = bin(fingerprint ^ other_fingerprint).count("1")
+                    if distance <= max_distance:
+                        match = (other, distance)
+                        break
+                if match:
+                    break
+
+            if match:
+                _absorb(match[0], source)
+                removed.append({"url": source.get("url"), "duplicate_of": match[0].get("url"),
+                                "reason": "content", "distance": match[1]})
+                continue
+
+            for bucket in slices:
+                buckets.setdefault(bucket, []).append((fingerprint, source))
+
+        if url_key:
+            by_url[url_key] = source
+        kept.append(source)
+
+    return kept, removed
+
+
+def _absorb(original: Dict[str, Any], duplicate: Dict[str, Any]) -> None:
+    """Give the kept source its duplicate's full text if it has none."""
+    if not original.get("raw_content") and duplicate.get("raw_content"):
+        original["raw_content"] = duplicate["raw_content"]
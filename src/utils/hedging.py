@@ -0,0 +1,208 @@
+# src/utils/hedging.py
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from src.utils.tracing import Span, bind_context
+
+# Pipeline steps hedged when hedging is switched on without a step list
+DEFAULT_HEDGED_STEPS = ("draft_answer", "refine_answer", "refine_section")
+
+
+class HedgeCancelled(Exception):
+    """
+    Raised by a request that lost the race before it reached the model.
+    """
+
+
+class HedgingPolicy:
+    """
+    Sends a duplicate request when an LLM call is slower than usual.
+
+    Latencies are tracked per pipeline step. Once a step has ``min_samples``
+    observations, a call still running after the ``percentile`` of its recent
+    latencies gets a second, identical request; whichever answers first wins.
+    The loser is cancelled if it has not reached the model yet (e.g. while
+    waiting for the rate limiter) and its response is discarded otherwise.
+
+    Each step has a budget: the fraction of its calls that may be hedged,
+    so hedging cannot more than slightly increase the load on the provider.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, float]] = None, percentile: float = 95.0,
+                 min_samples: int = 10, window: int = 200, min_delay: float = 0.5, max_workers: int = 16):
+        """
+        Args:
+            budgets: Fraction of calls that may be hedged, per step; steps not listed are
+                never hedged (defaults to 10% for each of DEFAULT_HEDGED_STEPS)
+            percentile: Percentile of a step's observed latency after which to hedge
+            min_samples: Calls a step needs before it is hedged
+            window: Number of recent latencies kept per step
+            min_delay: Shortest wait in seconds before hedging
+            max_workers: Threads running hedged calls
+        """
+        self.budgets = dict(budgets) if budgets is not None else {step: 0.1 for step in DEFAULT_HEDGED_STEPS}
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+        self.max_workers = max_workers
+
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def applies(self, step: Optional[str]) -> bool:
+        """Whether calls of a step are hedged."""
+        return step in self.budgets
+
+    def hedge_delay(self, step: str) -> Optional[float]:
+        """
+        Seconds to wait before hedging a call of a step.
+
+        Returns:
+            The configured percentile of the step's recent latencies, or None if the
+            step has too few observations
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(step, ()))
+        if len(latencies) < self.min_samples:
+            return None
+
+        index = max(0, min(len(latencies) - 1, math.ceil(self.percentile / 100 * len(latencies)) - 1))
+        return max(self.min_delay, latencies[index])
+
+    def _step_stats(self, step: str) -> Dict[str, int]:
+        return self._stats.setdefault(step, {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_exhausted": 0})
+
+    def _reserve_hedge(self, step: str) -> bool:
+        """Count a hedge against the step's budget, or refuse it if the budget is spent."""
+        with self._lock:
+            stats = self._step_stats(step)
+            if stats["hedged"] + 1 > self.budgets[step] * (stats["calls"] + 1):
+                stats["budget_exhausted"] += 1
+                return False
+            stats["hedged"] += 1
+            return True
+
+    def _record(self, step: str, latency: float, hedge_won: bool = False) -> None:
+        with self._lock:
+            self._latencies.setdefault(step, deque(maxlen=self.window)).append(latency)
+            stats = self._step_stats(step)
+            stats["calls"] += 1
+            stats["hedge_wins"] += 1 if hedge_won else 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hedge")
+            return self._executor
+
+    def run(self, step: str, call: Callable[[threading.Event], Any], span: Optional[Span] = None) -> Any:
+        """
+        Run a call, hedging it if it is slower than the step's latency percentile.
+
+        Args:
+            step: Pipeline step making the call
+            call: Function making the request; it receives an event that is set once
+                the race is decided and should not start the request if it is set
+            span: Trace span of the call, marked when a hedge fires and wins
+
+        Returns:
+            The first successful response
+
+        Raises:
+            Exception: The error of the last request to fail if none succeeded
+        """
+        delay = self.hedge_delay(step)
+        started = time.monotonic()
+        if delay is None:
+            result = call(threading.Event())
+            self._record(step, time.monotonic() - started)
+            return result
+
+        decided = threading.Event()
+        executor = self._get_executor()
+
+        def timed():
+            request_started = time.monotonic()
+            result = call(decided)
+            return result, time.monotonic() - request_started
+
+        primary = executor.submit(bind_context(timed))
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._reserve_hedge(step):
+            result, latency = primary.result()
+            self._record(step, latency)
+            return result
+
+        hedge = executor.submit(bind_context(timed))
+        if span is not None:
+            span.set(hedged=True)
+
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result, _ = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+
+                decided.set()
+                for loser in pending:
+                    loser.cancel()
+                hedge_won = future is hedge
+                # Record the time since the original request started: the hedge's own
+                # latency would hide how slow the request it replaced was, pulling the
+                # percentile down and making hedges fire earlier and earlier
+                self._record(step, time.monotonic() - started, hedge_won=hedge_won)
+                if span is not None:
+                    span.set(hedge_won=hedge_won)
+                return result
+
+        self._record(step, time.monotonic() - started)
+        raise error
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get hedging counters per step.
+
+        Returns:
+            Dictionary of step to calls, hedged, hedge_wins and budget_exhausted
+        """
+        with self._lock:
+            return {step: dict(stats) for step, stats in self._stats.items()}
+
+
+def default_hedging_policy() -> Optional[HedgingPolicy]:
+    """
+    Build the hedging policy configured by the environment.
+
+    Hedging is off unless LLM_HEDGE_STEPS lists the steps to hedge, each
+    optionally with its budget (e.g. "draft_answer:0.1,refine_answer:0.05").
+    Steps without a budget use LLM_HEDGE_BUDGET (default 0.1), and
+    LLM_HEDGE_PERCENTILE (default 95) sets when a hedge fires.
+
+    Returns:
+        The policy, or None if hedging is disabled
+    """
+    steps = os.getenv("LLM_HEDGE_STEPS", "")
+    if not steps.strip():
+        return None
+
+    default_budget = float(os.getenv("LLM_HEDGE_BUDGET", "0.1"))
+    budgets = {}
+    for entry in steps.split(","):
+        step, _, budget = entry.strip().partition(":")
+        if step:
+            budgets[step] = float(budget) if budget else default_budget
+
+    return HedgingPolicy(budgets=budgets, percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")))
@@ -1,7 +1,7 @@
 # src/utils/helpers.py
 import os
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 import re
 
@@ -23,6 +23,77 @@ def clean_text(text: str) -> str:
     return text
 
 
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of model tokens in a text (about 4 characters per token).
+
+    Args:
+        text: Input text
+
+    Returns:
+        Estimated token count
+    """
+    return (len(text) + 3) // 4
+
+
+def parse_json_response(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse the JSON object embedded in a model response.
+
+    Handles responses that wrap the JSON in markdown code fences or surround
+    it with explanatory text.
+
+    Args:
+        text: Raw response text
+
+    Returns:
+        Parsed JSON object, or None if no valid object was found
+    """
+    json_match = re.search(r'\{.+\}', text, re.DOTALL)
+    if not json_match:
+        return None
+
+    # Clean up any markdown formatting
+    json_str = json_match.group(0).replace('```json', '').replace('```', '')
+    try:
+        parsed = json.loads(json_str)
+    except json.JSONDecodeError:
+        return None
+
+    return parsed if isinstance(parsed, dict) else None
+
+
+def split_markdown_sections(text: str) -> List[str]:
+    """
+    Split a markdown document into sections, each starting at a heading.
+
+    Text before the first heading forms its own section, and headings inside
+    code fences are ignored. Joining the sections gives back the exact input.
+
+    Args:
+        text: Markdown text
+
+    Returns:
+        List of sections in document order
+    """
+    sections = []
+    current: List[str] = []
+    in_fence = False
+
+    for line in text.splitlines(keepends=True):
+        stripped = line.lstrip()
+        if stripped.startswith("```") or stripped.startswith("~~~"):
+            in_fence = not in_fence
+        elif not in_fence and current and re.match(r'#{1,6}\s', line):
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+
+    if current:
+        sections.append("".join(current))
+    return sections
+
+
 def extract_key_points(text: str, num_points: int = 5) -> List[str]:
     """
     Extract key points from a longer text.
@@ -0,0 +1,356 @@
+# src/utils/llm.py
+import hashlib
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set
+
+from src.utils.cache import SQLiteCache, default_cache
+from src.utils.cassette import get_active_cassette
+from src.utils.hedging import HedgeCancelled, HedgingPolicy
+from src.utils.helpers import estimate_tokens
+from src.utils.resilience import get_guard
+from src.utils.tracing import Span, bind_context, trace_span
+
+# Shared response cache used by every LLMClient in the process
+_llm_cache: Optional[SQLiteCache] = None
+_llm_cache_configured = False
+_uncached_steps: Set[str] = set()
+_config_lock = threading.Lock()
+
+
+class CachedResponse:
+    """
+    Minimal stand-in for a Gemini response served from the cache.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.cached = True
+
+
+class RecordedResponse:
+    """
+    Response rebuilt from a record/replay cassette, with its original usage counts.
+    """
+
+    def __init__(self, record: Dict[str, Any]):
+        self.text = record["text"]
+        self.usage_metadata = _Usage(record.get("prompt_tokens"), record.get("response_tokens"))
+
+
+class StreamedResponse:
+    """
+    Response assembled from the chunks of a streamed generation.
+    """
+
+    def __init__(self, text: str, usage_metadata: Any = None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class StreamCancelled(Exception):
+    """
+    Raised inside a streamed call whose consumer stopped reading it.
+    """
+
+
+class _Usage:
+    def __init__(self, prompt_tokens: Optional[int], response_tokens: Optional[int]):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = response_tokens
+
+
+def configure_llm_cache(enabled: bool = True, path: Optional[str] = None, ttl: Optional[float] = None,
+                        max_entries: Optional[int] = None,
+                        uncached_steps: Optional[Iterable[str]] = None) -> Optional[SQLiteCache]:
+    """
+    Configure the process-wide cache for LLM responses.
+
+    Args:
+        enabled: Whether responses should be cached at all
+        path: SQLite database path (defaults to the shared research cache)
+        ttl: Seconds a cached response stays valid
+        max_entries: Maximum number of cached responses before LRU eviction
+        uncached_steps: Pipeline steps that always call the model (e.g. "refine_answer")
+
+    Returns:
+        The configured cache, or None if caching is disabled
+    """
+    global _llm_cache, _llm_cache_configured, _uncached_steps
+
+    cache = None
+    if enabled:
+        if path:
+            cache = SQLiteCache(path, namespace="gemini", ttl=ttl, max_entries=max_entries)
+        else:
+            cache = default_cache("gemini", ttl=ttl, max_entries=max_entries)
+
+    with _config_lock:
+        _llm_cache = cache
+        _uncached_steps = set(uncached_steps or [])
+        _llm_cache_configured = True
+
+    return cache
+
+
+def get_llm_cache() -> Optional[SQLiteCache]:
+    """
+    Get the process-wide LLM response cache, configuring it from the environment
+    on first use.
+
+    Caching is off unless GEMINI_CACHE is set to a true value. GEMINI_CACHE_TTL,
+    GEMINI_CACHE_MAX_ENTRIES and GEMINI_CACHE_SKIP_STEPS (comma separated) tune it.
+
+    Returns:
+        The shared cache, or None if caching is disabled
+    """
+    if not _llm_cache_configured:
+        enabled = os.getenv("GEMINI_CACHE", "").lower() in ("1", "true", "yes")
+        ttl = os.getenv("GEMINI_CACHE_TTL")
+        skip_steps = os.getenv("GEMINI_CACHE_SKIP_STEPS", "")
+        configure_llm_cache(
+            enabled=enabled,
+            ttl=float(ttl) if ttl else None,
+            max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "10000")),
+            uncached_steps=[step.strip() for step in skip_steps.split(",") if step.strip()]
+        )
+    return _llm_cache
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss statistics of the shared LLM response cache.
+
+    Returns:
+        Cache statistics, or {"enabled": False} if caching is disabled
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+class LLMClient:
+    """
+    Wrapper around a Gemini GenerativeModel that all agents call through.
+
+    Responses are looked up in the shared cache by model name and prompt hash,
+    so repeated or resumed runs do not pay for identical prompts again. Live
+    calls go through the process-wide guard of the model, which rate limits
+    them and retries transient failures.
+    """
+
+    def __init__(self, model: Any, model_name: str, hedging: Optional[HedgingPolicy] = None):
+        """
+        Args:
+            model: The underlying google.generativeai GenerativeModel
+            model_name: Name of the model, used as part of the cache key
+            hedging: Policy sending duplicate requests for slow calls of the steps it covers
+        """
+        self.model = model
+        self.model_name = model_name
+        self.hedging = hedging
+
+    def _cache_key(self, prompt: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return SQLiteCache.make_key(self.model_name, prompt_hash)
+
+    def generate_content(self, prompt: str, step: Optional[str] = None, use_cache: bool = True,
+                         on_chunk: Optional[Callable[[str], None]] = None) -> Any:
+        """
+        Generate a response for a prompt, serving it from the cache when possible.
+
+        With ``on_chunk``, the response is generated with Gemini's streaming API
+        and each piece of text is passed to the callback as soon as it arrives.
+        Cached and replayed responses are passed as a single chunk. Streamed
+        calls are not hedged, and only opening the stream is retried.
+
+        Args:
+            prompt: The prompt to send to the model
+            step: Name of the pipeline step making the call
+            use_cache: Set to False to always call the model for this request
+            on_chunk: Callback receiving the response text piece by piece
+
+        Returns:
+            Response object with a ``text`` attribute
+        """
+        with trace_span("gemini.generate_content", "llm", model=self.model_name, step=step) as span:
+            # Recording or replaying bypasses the cache so every call lands on the cassette
+            cassette = get_active_cassette()
+            cache = get_llm_cache() if cassette is None else None
+            if cache is not None and use_cache and step not in _uncached_steps:
+                key = self._cache_key(prompt)
+                cached = cache.get(key)
+                if cached is not None:
+                    span.set(cache_hit=True, prompt_tokens=0,
+                             response_tokens=0, bytes=len(cached["text"].encode("utf-8")))
+                    if on_chunk is not None:
+                        on_chunk(cached["text"])
+                    return CachedResponse(cached["text"])
+            else:
+                key = None
+
+            def call_model(decided=None):
+                def request():
+                    # A hedged request whose twin already answered is not sent
+                    if decided is not None and decided.is_set():
+                        raise HedgeCancelled()
+                    if on_chunk is not None:
+                        return self.model.generate_content(prompt, stream=True)
+                    return self.model.generate_content(prompt)
+
+                started = time.perf_counter()
+                response = get_guard("gemini", self.model_name).call(
+                    request, on_retry=lambda retry, delay, error: span.set(retries=retry)
+                )
+                if on_chunk is not None:
+                    response = self._consume_stream(response, on_chunk, span, started)
+                return response
+
+            if cassette is not None:
+                record = cassette.call(
+                    "gemini", [self.model_name, prompt],
+                    lambda: self._to_record(call_model()),
+                    label=step or ""
+                )
+                response = RecordedResponse(record)
+                span.set(replayed=cassette.replaying)
+                if cassette.replaying and on_chunk is not None:
+                    on_chunk(record["text"])
+            elif on_chunk is not None:
+                response = call_model()
+            elif self.hedging is not None and self.hedging.applies(step):
+                response = self.hedging.run(step, call_model, span)
+            else:
+                response = call_model()
+            span.set(cache_hit=False)
+
+            try:
+                text = response.text
+            except ValueError:
+                # Blocked or empty responses have no text; leave them uncached
+                return response
+
+            self._record_usage(span, response, prompt, text)
+            if key is not None:
+                cache.set(key, {"text": text, "step": step})
+
+            return response
+
+    def stream_content(self, prompt: str, step: Optional[str] = None, use_cache: bool = True) -> Iterator[str]:
+        """
+        Generate a response for a prompt, yielding its text as it arrives.
+
+        The call runs on a background thread. If the caller stops iterating
+        (e.g. breaks out of the loop or closes the generator), the thread stops
+        reading the model's stream at the next chunk.
+
+        Args:
+            prompt: The prompt to send to the model
+            step: Name of the pipeline step making the call
+            use_cache: Set to False to always call the model for this request
+
+        Yields:
+            Pieces of the response text, in order
+
+        Raises:
+            Exception: Any error of the underlying call, once the chunks before it are yielded
+        """
+        chunks: "queue.Queue" = queue.Queue()
+        done = object()
+        outcome: Dict[str, BaseException] = {}
+        cancelled = threading.Event()
+
+        def on_chunk(text: str) -> None:
+            # Stop pulling chunks from the model once nobody reads them
+            if cancelled.is_set():
+                raise StreamCancelled()
+            chunks.put(text)
+
+        def run():
+            try:
+                self.generate_content(prompt, step=step, use_cache=use_cache, on_chunk=on_chunk)
+            except StreamCancelled:
+                pass
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                chunks.put(done)
+
+        threading.Thread(target=bind_context(run), daemon=True).start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is done:
+                    break
+                yield chunk
+        finally:
+            cancelled.set()
+
+        if "error" in outcome:
+            raise outcome["error"]
+
+    @staticmethod
+    def _consume_stream(stream: Iterable[Any], on_chunk: Callable[[str], None], span: Span,
+                        started: float) -> StreamedResponse:
+        """
+        Pass the text of each streamed chunk to the callback and assemble the full response.
+
+        Args:
+            stream: Streamed response from the model
+            on_chunk: Callback receiving each piece of text
+            span: Span of the call, given the time to the first chunk
+            started: perf_counter() value when the request was sent
+
+        Returns:
+            The complete response, with the usage metadata of the last chunk that had any
+        """
+        parts = []
+        usage = None
+        for chunk in stream:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text (e.g. safety ratings only) carry nothing to show
+                text = ""
+            if text:
+                if not parts:
+                    span.set(first_chunk_ms=round((time.perf_counter() - started) * 1000, 3))
+                parts.append(text)
+                on_chunk(text)
+            usage = getattr(chunk, "usage_metadata", None) or usage
+
+        span.set(streamed=True)
+        return StreamedResponse("".join(parts), usage)
+
+    @staticmethod
+    def _to_record(response: Any) -> Dict[str, Any]:
+        """Turn a live response into the JSON form stored on a cassette."""
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        response_tokens = getattr(usage, "candidates_token_count", None)
+        return {
+            "text": response.text,
+            "prompt_tokens": prompt_tokens if isinstance(prompt_tokens, int) else None,
+            "response_tokens": response_tokens if isinstance(response_tokens, int) else None
+        }
+
+    @staticmethod
+    def _record_usage(span: Span, response: Any, prompt: str, text: str) -> None:
+        """
+        Record token and byte counts of a call, estimating tokens when the
+        response carries no usage metadata.
+        """
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        response_tokens = getattr(usage, "candidates_token_count", None)
+
+        if not isinstance(text, str):
+            text = ""
+        span.set(
+            prompt_tokens=prompt_tokens if isinstance(prompt_tokens, int) else estimate_tokens(prompt),
+            response_tokens=response_tokens if isinstance(response_tokens, int) else estimate_tokens(text),
+            bytes=len(prompt.encode("utf-8")) + len(text.encode("utf-8"))
+        )
@@ -0,0 +1,371 @@
+# src/utils/resilience.py
+import os
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+# HTTP statuses worth retrying: timeouts, rate limits and transient server errors
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Guards shared by every agent and tool in the process, keyed by provider and model
+_guards: Dict[str, "ProviderGuard"] = {}
+_guards_lock = threading.Lock()
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling a provider whose circuit breaker is open.
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the rate of requests to a provider.
+
+    A rate of 0 disables the limit, but the bucket can still be paused, e.g.
+    when the provider asks callers to retry after a delay.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second (0 for no limit)
+            capacity: Maximum burst size (defaults to one second of tokens, at least 1)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, waiting until one is available.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self.rate <= 0:
+                    return waited
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for the given number of seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a provider after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls
+    fail fast for ``reset_timeout`` seconds; then a single trial call is let
+    through, closing the circuit again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.opened = 0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """
+        Check whether a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError("Circuit open after repeated failures, not calling the provider")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """End a call that says nothing about the provider's health."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """
+    Find the HTTP status behind an exception raised by a provider client.
+
+    Args:
+        error: The exception
+
+    Returns:
+        The status code, or None if it cannot be determined
+    """
+    response = getattr(error, "response", None)
+    for value in (getattr(response, "status_code", None), getattr(error, "status_code", None),
+                  getattr(error, "code", None)):
+        if isinstance(value, int):
+            return value
+
+    match = re.search(r"\b(408|429|500|502|503|504)\b", str(error))
+    return int(match.group(1)) if match else None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Get the delay a provider asked for before retrying, if any.
+
+    Reads the Retry-After header (seconds or HTTP date) of the error's response,
+    or the retry delay Gemini includes in quota errors.
+
+    Args:
+        error: The exception
+
+    Returns:
+        Seconds to wait, or None if the provider did not say
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    match = re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", str(error))
+    return float(match.group(1)) if match else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is transient: a connection problem, timeout, rate limit or 5xx."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if type(error).__name__ in ("ConnectionError", "Timeout", "ReadTimeout", "ConnectTimeout"):
+        return True
+    return error_status(error) in RETRYABLE_STATUSES
+
+
+class ProviderGuard:
+    """
+    Rate limiting, retries and circuit breaking for calls to one provider and model.
+
+    Calls wait for a token from the shared bucket, transient failures are
+    retried with jittered exponential backoff (or after the delay the provider
+    asked for), and repeated failures open the circuit so callers fail fast
+    instead of piling onto a struggling provider.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float = 0, burst: Optional[float] = None,
+                 max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 20.0,
+                 max_retry_after: float = 60.0, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            name: Provider and model the guard protects, e.g. "gemini:gemini-1.5-pro"
+            requests_per_minute: Request quota to stay within (0 for no limit)
+            burst: Requests that may start at once (defaults to one second's worth)
+            max_attempts: Attempts per call, including the first
+            base_delay: Backoff before the first retry; doubled on every further retry
+            max_delay: Upper bound of the backoff
+            max_retry_after: Longest provider-requested delay honoured before giving up
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.name = name
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled_s = 0.0
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number ``attempt`` (from 0)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, fn: Callable[[], Any],
+             on_retry: Optional[Callable[[int, float, BaseException], None]] = None) -> Any:
+        """
+        Call the provider through the rate limiter, retries and circuit breaker.
+
+        Args:
+            fn: Function making the request
+            on_retry: Called with (retry number, delay, error) before each retry
+
+        Returns:
+            The function's result
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            Exception: The last error once retries are exhausted, or any non-transient error
+        """
+        with self._lock:
+            self.calls += 1
+
+        for attempt in range(self.max_attempts):
+            self.breaker.before_call()
+            waited = self.bucket.acquire()
+            if waited:
+                with self._lock:
+                    self.throttled_s += waited
+
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    if error_status(e) is not None:
+                        # The provider answered; the request itself was bad
+                        self.breaker.record_success()
+                    else:
+                        self.breaker.release()
+                    raise
+
+                self.breaker.record_failure()
+                delay = retry_after(e)
+                if attempt + 1 >= self.max_attempts or (delay is not None and delay > self.max_retry_after):
+                    with self._lock:
+                        self.failures += 1
+                    raise
+
+                if delay is not None:
+                    # Everyone sharing the quota waits, not just this caller
+                    self.bucket.pause(delay)
+                    delay += random.uniform(0, self.base_delay)
+                else:
+                    delay = self.backoff(attempt)
+
+                with self._lock:
+                    self.retries += 1
+                if on_retry is not None:
+                    on_retry(attempt + 1, delay, e)
+                time.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get call, retry and throttling counters for the guard.
+
+        Returns:
+            Dictionary with calls, retries, failures, throttled_s, circuit state and times opened
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+                "throttled_s": round(self.throttled_s, 3),
+                "circuit": self.breaker.state,
+                "circuit_opened": self.breaker.opened
+            }
+
+
+def configure_guard(provider: str, model: Optional[str] = None, **settings: Any) -> ProviderGuard:
+    """
+    Replace the process-wide guard of a provider (and model) with new settings.
+
+    Args:
+        provider: Provider name, e.g. "gemini" or "tavily"
+        model: Model name for providers with per-model quotas
+        **settings: ProviderGuard arguments
+
+    Returns:
+        The new guard
+    """
+    name = f"{provider}:{model}" if model else provider
+    guard = ProviderGuard(name, **settings)
+    with _guards_lock:
+        _guards[name] = guard
+    return guard
+
+
+def get_guard(provider: str, model: Optional[str] = None) -> ProviderGuard:
+    """
+    Get the process-wide guard of a provider (and model), creating it on first use.
+
+    New guards are configured from the environment, with the provider name as
+    prefix: {PROVIDER}_RPM (requests per minute, 0 for no limit), {PROVIDER}_BURST,
+    {PROVIDER}_MAX_ATTEMPTS, {PROVIDER}_CIRCUIT_THRESHOLD and {PROVIDER}_CIRCUIT_RESET.
+
+    Args:
+        provider: Provider name, e.g. "gemini" or "tavily"
+        model: Model name for providers with per-model quotas
+
+    Returns:
+        The shared guard
+    """
+    name = f"{provider}:{model}" if model else provider
+    with _guards_lock:
+        guard = _guards.get(name)
+        if guard is None:
+            prefix = provider.upper()
+            burst = os.getenv(f"{prefix}_BURST")
+            guard = ProviderGuard(
+                name,
+                requests_per_minute=float(os.getenv(f"{prefix}_RPM", "0")),
+                burst=float(burst) if burst else None,
+                max_attempts=int(os.getenv(f"{prefix}_MAX_ATTEMPTS", "4")),
+                failure_threshold=int(os.getenv(f"{prefix}_CIRCUIT_THRESHOLD", "5")),
+                reset_timeout=float(os.getenv(f"{prefix}_CIRCUIT_RESET", "30"))
+            )
+            _guards[name] = guard
+        return guard
+
+
+def guard_stats() -> Dict[str, Dict[str, Any]]:
+    """Get the statistics of every guard in the process, keyed by name."""
+    with _guards_lock:
+        guards = dict(_guards)
+    return {name: guard.stats() for name, guard in guards.items()}
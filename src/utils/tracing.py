@@ -0,0 +1,270 @@
+# src/utils/tracing.py
+import contextvars
+import itertools
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Tracer and span active in the current thread or task
+_current_tracer: contextvars.ContextVar = contextvars.ContextVar("current_tracer", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    A timed operation within a research run, such as a graph node or an external call.
+    """
+
+    def __init__(self, span_id: int, name: str, kind: str, parent_id: Optional[int] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.span_id = span_id
+        self.name = name
+        self.kind = kind
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self.duration_ms = 0.0
+        self.error: Optional[str] = None
+        self._started = time.perf_counter()
+
+    def set(self, **attributes: Any) -> None:
+        """Attach attributes (token counts, bytes, cache hits, ...) to the span."""
+        self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class TraceSink:
+    """
+    Destination for finished traces. Subclasses implement export().
+    """
+
+    def export(self, trace: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+
+class JSONFileSink(TraceSink):
+    """
+    Writes the trace as a JSON file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, trace: Dict[str, Any]) -> None:
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(trace, f, ensure_ascii=False, indent=2, default=str)
+
+
+class OpenTelemetrySink(TraceSink):
+    """
+    Replays finished spans into OpenTelemetry, keeping their timing and nesting.
+
+    Requires the optional ``opentelemetry-api`` package and a configured tracer provider.
+    """
+
+    def __init__(self, tracer_name: str = "deep-research"):
+        try:
+            from opentelemetry import trace as otel_trace
+        except ImportError:
+            raise ImportError("OpenTelemetrySink requires the opentelemetry-api package")
+
+        self._otel_trace = otel_trace
+        self._tracer = otel_trace.get_tracer(tracer_name)
+
+    def export(self, trace: Dict[str, Any]) -> None:
+        spans = trace["spans"]
+        children: Dict[Optional[int], List[Dict[str, Any]]] = {}
+        for span in spans:
+            children.setdefault(span["parent_id"], []).append(span)
+
+        def emit(span: Dict[str, Any], parent: Any) -> None:
+            start_ns = int(span["start_time"] * 1e9)
+            context = self._otel_trace.set_span_in_context(parent) if parent is not None else None
+            otel_span = self._tracer.start_span(
+                span["name"], context=context, start_time=start_ns,
+                attributes={
+                    "research.run_id": trace["run_id"],
+                    "research.kind": span["kind"],
+                    **{f"research.{key}": value for key, value in span["attributes"].items()
+                       if isinstance(value, (str, bool, int, float))}
+                }
+            )
+            for child in children.get(span["span_id"], []):
+                emit(child, otel_span)
+            otel_span.end(end_time=start_ns + int(span["duration_ms"] * 1e6))
+
+        for root in children.get(None, []):
+            emit(root, None)
+
+
+class Tracer:
+    """
+    Collects spans for one research run and exports them to sinks.
+
+    The tracer is made current with use_tracer(); instrumented code records
+    spans through trace_span() without the tracer being passed around.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, sinks: Optional[List[TraceSink]] = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.sinks = list(sinks or [])
+        self.spans: List[Span] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, kind: str, attributes: Optional[Dict[str, Any]] = None) -> Span:
+        parent = _current_span.get()
+        span = Span(next(self._ids), name, kind, parent.span_id if parent else None, attributes)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Aggregate the spans into per-node timings and per-kind totals.
+
+        Returns:
+            Dictionary with "total_ms" (end-to-end wall time), "nodes" (wall time
+            per graph node) and "calls" (count, time, tokens, bytes and cache hits
+            per kind of external call)
+        """
+        nodes: Dict[str, float] = {}
+        calls: Dict[str, Dict[str, Any]] = {}
+        total_ms = 0.0
+
+        with self._lock:
+            spans = list(self.spans)
+
+        for span in spans:
+            if span.kind == "run":
+                total_ms += span.duration_ms
+                continue
+            if span.kind == "node":
+                nodes[span.name] = round(nodes.get(span.name, 0.0) + span.duration_ms, 3)
+                continue
+
+            totals = calls.setdefault(span.kind, {
+                "count": 0, "duration_ms": 0.0, "prompt_tokens": 0,
+                "response_tokens": 0, "bytes": 0, "cache_hits": 0, "retries": 0, "errors": 0
+            })
+            totals["count"] += 1
+            totals["duration_ms"] = round(totals["duration_ms"] + span.duration_ms, 3)
+            totals["prompt_tokens"] += span.attributes.get("prompt_tokens", 0)
+            totals["response_tokens"] += span.attributes.get("response_tokens", 0)
+            totals["bytes"] += span.attributes.get("bytes", 0)
+            totals["cache_hits"] += 1 if span.attributes.get("cache_hit") else 0
+            totals["retries"] += span.attributes.get("retries", 0)
+            totals["errors"] += 1 if span.error else 0
+
+        return {"total_ms": round(total_ms, 3), "nodes": nodes, "calls": calls}
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [span.to_dict() for span in self.spans]
+        return {"run_id": self.run_id, "summary": self.summary(), "spans": spans}
+
+    def export(self, extra_sinks: Optional[List[TraceSink]] = None) -> Dict[str, Any]:
+        """
+        Send the trace to every configured sink.
+
+        Args:
+            extra_sinks: Additional sinks for this export only
+
+        Returns:
+            The exported trace
+        """
+        trace = self.to_dict()
+        for sink in self.sinks + list(extra_sinks or []):
+            try:
+                sink.export(trace)
+            except Exception as e:
+                print(f"Error exporting trace to {type(sink).__name__}: {e}")
+        return trace
+
+
+def get_current_tracer() -> Optional[Tracer]:
+    """Get the tracer active in the current context, if any."""
+    return _current_tracer.get()
+
+
+@contextmanager
+def use_tracer(tracer: Optional[Tracer]) -> Iterator[Optional[Tracer]]:
+    """
+    Make a tracer current for the duration of the block.
+
+    Args:
+        tracer: Tracer to activate (None disables tracing in the block)
+    """
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+@contextmanager
+def trace_span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[Span]:
+    """
+    Record a span on the current tracer.
+
+    When no tracer is active the span is still yielded, so call sites can set
+    attributes unconditionally, but nothing is recorded.
+
+    Args:
+        name: Name of the operation
+        kind: Category such as "node", "llm", "search" or "http"
+        **attributes: Initial span attributes
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        span = Span(0, name, kind, attributes=attributes)
+    else:
+        span = tracer.start_span(name, kind, attributes)
+
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        span.finish()
+
+
+def bind_context(fn: Callable) -> Callable:
+    """
+    Wrap a function so it runs with the caller's tracing context on worker threads.
+
+    Each call gets its own copy of the context, so the wrapper is safe to use
+    with thread pools running many calls at once.
+
+    Args:
+        fn: Function to wrap
+
+    Returns:
+        Wrapped function
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
@@ -0,0 +1,33 @@
+# tests/test_benchmarks.py
+import unittest
+import os
+import sys
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.run_benchmarks import run_benchmarks
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_run_benchmarks_smoke(self):
+        # Run a tiny benchmark with no artificial latency
+        results = run_benchmarks(
+            runs=1, concurrency=2, concurrent_queries=2,
+            gemini_latency=0, tavily_latency=0,
+            page_bytes=2000, page_latency=0, crawl_pages=2
+        )
+
+        # Assert every section was measured
+        self.assertEqual(results["pipeline"]["runs"], 1)
+        # Three queries of five distinct results each all survive deduplication
+        self.assertEqual(results["pipeline"]["sources_per_run"], 15)
+        self.assertIn("refine_answer", results["pipeline"]["steps_s"])
+        self.assertEqual(results["concurrency"]["queries"], 2)
+        self.assertEqual(results["crawler"]["crawled"], 2)
+        self.assertGreater(results["peak_memory_mb"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
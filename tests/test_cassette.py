@@ -0,0 +1,65 @@
+# tests/test_cassette.py
+import unittest
+import os
+import sys
+import tempfile
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.fakes import fake_environment
+from src.agents.coordinator import ResearchCoordinator
+from src.utils.cassette import Cassette, CassetteMissError, use_cassette
+
+
+class TestCassette(unittest.TestCase):
+
+    def tearDown(self):
+        use_cassette(None)
+
+    def _run(self, cassette):
+        with fake_environment() as created:
+            coordinator = ResearchCoordinator()
+        use_cassette(cassette)
+        results = coordinator.execute_research("Tell me about AI")
+        use_cassette(None)
+        return results, created
+
+    def test_record_then_replay_without_network(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "run.json")
+
+            # Record a run against the fakes
+            recorder = Cassette(path, mode="record")
+            recorded, created = self._run(recorder)
+            recorder.save()
+            self.assertGreater(sum(model.calls for model in created["models"]), 0)
+
+            # Replay it: the fake clients are never called
+            replayed, created = self._run(Cassette(path, mode="replay"))
+
+        self.assertEqual(replayed, recorded)
+        self.assertEqual(sum(model.calls for model in created["models"]), 0)
+        self.assertEqual(sum(client.calls for client in created["tavily_clients"]), 0)
+
+    def test_replay_latency_and_misses(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "run.json")
+
+            recorder = Cassette(path, mode="record")
+            recorder.call("tavily", ["query"], lambda: (time.sleep(0.05), {"results": []})[1])
+            recorder.save()
+
+            player = Cassette(path, mode="replay", replay_latency=True)
+            started = time.perf_counter()
+            result = player.call("tavily", ["query"], lambda: self.fail("live call during replay"))
+            self.assertEqual(result, {"results": []})
+            self.assertGreaterEqual(time.perf_counter() - started, 0.04)
+
+            with self.assertRaises(CassetteMissError):
+                player.call("tavily", ["another query"], lambda: None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# tests/test_context_packer.py
+import unittest
+import os
+import sys
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.context_packer import ContextPacker
+from src.utils.helpers import estimate_tokens
+
+FILLER = "The weather was mild and the town held its yearly market on the square. "
+
+
+class TestContextPacker(unittest.TestCase):
+
+    def test_bm25_ranks_relevant_chunks_first(self):
+        packer = ContextPacker()
+        chunks = [
+            FILLER,
+            "Solar panels convert sunlight into electricity for homes.",
+            "Solar energy adoption grew as solar panel prices fell."
+        ]
+
+        scores = packer.score(chunks, "solar energy adoption")
+
+        # Assert the chunk matching most query terms wins and filler scores zero
+        self.assertEqual(int(scores.argmax()), 2)
+        self.assertEqual(scores[0], 0)
+        self.assertGreater(scores[1], 0)
+
+    def test_pack_keeps_relevant_passages_within_budget(self):
+        # Create a packer with a small budget
+        packer = ContextPacker(token_budget=120, chunk_tokens=30)
+        relevant = "Battery storage costs dropped sharply, making grid storage viable."
+        sources = [
+            {"title": "Long page", "url": "https://example.com/long", "content": "Intro snippet.",
+             "raw_content": FILLER * 20 + relevant},
+            {"title": "Unrelated", "url": "https://example.com/other", "content": FILLER * 5}
+        ]
+
+        packed = packer.pack(sources, "battery storage costs", ["grid storage"])
+
+        # Assert a passage far past the start of the page made it in, within budget
+        self.assertIn(relevant, packed)
+        self.assertTrue(packed.startswith("Source: Long page\nURL: https://example.com/long\n"))
+        self.assertLessEqual(estimate_tokens(packed), 120 + 10)
+
+    def test_chunk_text_respects_chunk_size(self):
+        packer = ContextPacker(chunk_tokens=20)
+
+        chunks = packer.chunk_text(FILLER * 10 + "word " * 200)
+
+        # Assert every chunk fits and no text was lost
+        self.assertTrue(all(len(chunk) <= 80 for chunk in chunks))
+        self.assertEqual(" ".join(chunks).split(), (FILLER * 10 + "word " * 200).split())
+
+
+if __name__ == '__main__':
+    unittest.main()
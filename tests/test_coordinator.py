@@ -0,0 +1,393 @@
+# tests/test_coordinator.py
+import unittest
+from unittest.mock import patch, MagicMock
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.coordinator import ResearchCoordinator
+from src.utils.checkpoints import CheckpointStore
+from src.utils.tracing import Tracer
+
+
+class TestCoordinator(unittest.TestCase):
+
+    def _setup_agents(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model = MagicMock()
+        mock_response = MagicMock()
+        mock_response.text = "Coordinator response"
+        mock_model.generate_content.return_value = mock_response
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        researcher = MagicMock()
+        researcher.plan_research.return_value = {"topic": "AI", "queries": ["AI uses", "AI risks"]}
+        researcher.research.return_value = {"topic": "AI", "queries": ["AI uses", "AI risks"], "sources": []}
+        mock_researcher.return_value = researcher
+
+        drafter = MagicMock()
+        drafter.draft_answer.return_value = {"topic": "AI", "answer": "Draft"}
+        drafter.refine_answer.return_value = {"topic": "AI", "answer": "Final", "refined": True}
+        mock_drafter.return_value = drafter
+
+        return mock_model, researcher, drafter
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_fused_pipeline(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+
+        # Create coordinator in fused mode
+        coordinator = ResearchCoordinator(pipeline_mode="fused")
+
+        # Test the workflow
+        results = coordinator.execute_research("Tell me about AI")
+
+        # Planned queries are passed to research, which runs fused
+        researcher.plan_research.assert_called_once_with("Tell me about AI")
+        researcher.research.assert_called_once_with("AI", queries=["AI uses", "AI risks"], fused=True)
+
+        # Only analyze_draft used the coordinator model; parse_query did not
+        mock_model.generate_content.assert_called_once()
+
+        # Final event keeps the same shape
+        self.assertEqual(results["refine_answer"]["final_answer"]["answer"], "Final")
+        self.assertTrue(results["refine_answer"]["complete"])
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_speculative_search(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+        researcher.search_tool.get_sources.return_value = [
+            {"title": "AI overview", "url": "https://example.com/ai", "content": "About AI"}
+        ]
+
+        # Create coordinator with speculative search
+        coordinator = ResearchCoordinator(speculative_search=True)
+
+        # Test the workflow
+        coordinator.execute_research("Tell me about AI")
+
+        # The raw query was searched and its sources handed to research
+        researcher.search_tool.get_sources.assert_called_once_with("Tell me about AI")
+        args, kwargs = researcher.research.call_args
+        self.assertEqual(args, ("Coordinator response",))
+        self.assertEqual(kwargs["extra_sources"][0]["url"], "https://example.com/ai")
+        self.assertEqual(kwargs["extra_sources"][0]["query"], "Tell me about AI")
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_speculative_search_threads_are_shared(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+        researcher.search_tool.get_sources.return_value = []
+
+        # Test the workflow: one coordinator per run, as in batch mode
+        for _ in range(6):
+            ResearchCoordinator(speculative_search=True).execute_research("Tell me about AI")
+
+        # Assert results: the runs reused one small pool of search threads
+        threads = [t for t in threading.enumerate() if t.name.startswith("speculative-search")]
+        self.assertLessEqual(len(threads), 4)
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_close_releases_researcher_resources(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+
+        # Test the workflow inside the coordinator's context
+        with ResearchCoordinator() as coordinator:
+            coordinator.execute_research("Tell me about AI")
+            researcher.close.assert_not_called()
+
+        # Leaving the block closed the researcher (and its crawler's process pool)
+        researcher.close.assert_called_once()
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_execute_research_records_trace(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+
+        # Create coordinator
+        coordinator = ResearchCoordinator()
+
+        # Test the workflow with a tracer
+        tracer = Tracer()
+        coordinator.execute_research("Tell me about AI", tracer=tracer)
+        trace = tracer.to_dict()
+
+        # One span per node, nested under the run span
+        spans = {span["name"]: span for span in trace["spans"]}
+        run_span = spans["execute_research"]
+        for node in ["parse_query", "conduct_research", "generate_draft", "analyze_draft", "refine_answer"]:
+            self.assertEqual(spans[node]["kind"], "node")
+            self.assertEqual(spans[node]["parent_id"], run_span["span_id"])
+
+        # The coordinator's own LLM calls are recorded inside their nodes
+        llm_spans = [span for span in trace["spans"] if span["kind"] == "llm"]
+        self.assertEqual([span["attributes"]["step"] for span in llm_spans], ["parse_query", "analyze_draft"])
+        self.assertEqual(llm_spans[0]["parent_id"], spans["parse_query"]["span_id"])
+        self.assertGreater(llm_spans[0]["attributes"]["prompt_tokens"], 0)
+
+        summary = trace["summary"]
+        self.assertEqual(summary["calls"]["llm"]["count"], 2)
+        self.assertIn("refine_answer", summary["nodes"])
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_good_draft_skips_refinement(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+        mock_model.generate_content.return_value = MagicMock(
+            text='{"score": 9, "issues": [], "feedback": "Minor wording only."}'
+        )
+
+        # Create coordinator
+        coordinator = ResearchCoordinator()
+
+        # Test the workflow
+        results = coordinator.execute_research("Tell me about AI")
+
+        # The draft is the final answer and refine_answer never ran
+        drafter.refine_answer.assert_not_called()
+        final_answer = results["analyze_draft"]["final_answer"]
+        self.assertEqual(final_answer["answer"], "Draft")
+        self.assertEqual(final_answer["refinements"], 0)
+        self.assertEqual(final_answer["quality"]["score"], 9.0)
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_refine_loop_until_threshold(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+        scores = iter([4, 6, 9])
+        mock_model.generate_content.side_effect = lambda prompt, **kwargs: MagicMock(
+            text="AI" if "extract the main research topic" in prompt else
+            f'{{"score": {next(scores)}, "issues": ["Missing data"], "feedback": "Add data."}}'
+        )
+        drafter.refine_answer.side_effect = lambda draft, feedback: dict(draft, answer=draft["answer"] + "+")
+
+        # Create coordinator allowing up to three refinements
+        coordinator = ResearchCoordinator(max_refinements=3)
+
+        # Test the workflow
+        results = coordinator.execute_research("Tell me about AI")
+
+        # Two refinements brought the score over the threshold
+        self.assertEqual(drafter.refine_answer.call_count, 2)
+        self.assertEqual(drafter.refine_answer.call_args.args[1], "Add data.\n- Missing data")
+        final_answer = results["analyze_draft"]["final_answer"]
+        self.assertEqual(final_answer["answer"], "Draft++")
+        self.assertEqual(final_answer["refinements"], 2)
+        self.assertEqual(final_answer["quality"]["score"], 9.0)
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_last_refinement_reports_draft_quality(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+        mock_model.generate_content.return_value = MagicMock(
+            text='{"score": 4, "issues": [], "feedback": "Add data."}'
+        )
+
+        # Create coordinator allowing one refinement
+        coordinator = ResearchCoordinator(max_refinements=1)
+
+        # Test the workflow
+        results = coordinator.execute_research("Tell me about AI")
+
+        # The refinement was not scored: only the draft's score is reported, under its own key
+        final_answer = results["refine_answer"]["final_answer"]
+        self.assertEqual(final_answer["answer"], "Final")
+        self.assertNotIn("quality", final_answer)
+        self.assertEqual(final_answer["draft_quality"]["score"], 4.0)
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_answers_stream_to_run_callback(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+
+        def draft_answer(research_results, on_chunk=None):
+            on_chunk("Dra")
+            on_chunk("ft")
+            return {"topic": "AI", "answer": "Draft"}
+
+        def refine_answer(draft, feedback, on_chunk=None):
+            on_chunk("Final")
+            return {"topic": "AI", "answer": "Final", "refined": True}
+
+        drafter.draft_answer.side_effect = draft_answer
+        drafter.refine_answer.side_effect = refine_answer
+
+        # Create coordinator
+        coordinator = ResearchCoordinator()
+
+        # Test the workflow
+        chunks = []
+        coordinator.execute_research("Tell me about AI", on_chunk=lambda step, text: chunks.append((step, text)))
+
+        # Assert chunks arrived tagged with their step
+        self.assertEqual(chunks, [("draft_answer", "Dra"), ("draft_answer", "ft"), ("refine_answer", "Final")])
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_iter_research_yields_progress_events(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+        researcher.research.return_value = {
+            "topic": "AI", "sources": [{"title": "AI overview", "url": "https://example.com/ai"}]
+        }
+
+        # Create coordinator
+        coordinator = ResearchCoordinator()
+
+        # Test the iterator
+        events = list(coordinator.iter_research("Tell me about AI", run_id="run-1"))
+
+        # Assert events arrive in order with partial state and timing
+        self.assertEqual([event.kind for event in events],
+                         ["started"] + ["step_completed"] * 5 + ["completed"])
+        self.assertEqual([event.step for event in events[1:6]],
+                         ["parse_query", "conduct_research", "generate_draft", "analyze_draft", "refine_answer"])
+        sources = events[2].data["research_results"]["sources"]
+        self.assertEqual(sources[0]["url"], "https://example.com/ai")
+        self.assertEqual(events[3].data["draft_answer"]["answer"], "Draft")
+        self.assertTrue(all(event.run_id == "run-1" for event in events))
+        self.assertGreaterEqual(events[-1].elapsed_s, events[1].elapsed_s)
+        self.assertIsNotNone(events[2].step_s)
+        self.assertEqual(events[-1].data["refine_answer"]["final_answer"]["answer"], "Final")
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_closing_iterator_cancels_run(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+        proceed = threading.Event()
+        researched = threading.Event()
+
+        def research(topic, **kwargs):
+            proceed.wait(5)
+            researched.set()
+            return {"topic": "AI", "sources": []}
+
+        researcher.research.side_effect = research
+
+        # Create coordinator
+        coordinator = ResearchCoordinator()
+
+        # Stop listening while research is running
+        events = coordinator.iter_research("Tell me about AI")
+        self.assertEqual(next(events).kind, "started")
+        self.assertEqual(next(events).step, "parse_query")
+        events.close()
+        proceed.set()
+
+        # Assert research finished but no later step started
+        self.assertTrue(researched.wait(5))
+        time.sleep(0.2)
+        drafter.draft_answer.assert_not_called()
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_aiter_research(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+
+        # Create coordinator
+        coordinator = ResearchCoordinator()
+
+        # Test the async generator
+        async def collect():
+            return [event async for event in coordinator.aiter_research("Tell me about AI")]
+
+        events = asyncio.run(collect())
+
+        # Assert results
+        self.assertEqual(events[0].kind, "started")
+        self.assertEqual(events[-1].kind, "completed")
+        self.assertEqual(events[-1].data["refine_answer"]["final_answer"]["answer"], "Final")
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_unknown_pipeline_mode(self, mock_researcher, mock_drafter, mock_genai):
+        with self.assertRaises(ValueError):
+            ResearchCoordinator(pipeline_mode="turbo")
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_resume_after_crash(self, mock_researcher, mock_drafter, mock_genai):
+        mock_model, researcher, drafter = self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+        drafter.refine_answer.side_effect = [
+            RuntimeError("process killed"),
+            {"topic": "AI", "answer": "Final", "refined": True}
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = CheckpointStore(temp_dir)
+
+            # The first run dies in refine_answer
+            coordinator = ResearchCoordinator(checkpoint_store=store)
+            with self.assertRaises(RuntimeError):
+                coordinator.execute_research("Tell me about AI", run_id="run-1")
+
+            checkpoint = store.load("run-1")
+            self.assertEqual(checkpoint["completed_step"], "analyze_draft")
+            self.assertEqual(checkpoint["next_node"], "refine_answer")
+            calls_before_resume = mock_model.generate_content.call_count
+
+            # A new coordinator resumes at refine_answer
+            results = ResearchCoordinator(checkpoint_store=store).resume_research("run-1")
+
+            # Resuming the finished run returns its results without running anything
+            again = ResearchCoordinator(checkpoint_store=store).resume_research("run-1")
+
+        # Assert completed steps were not repeated
+        researcher.research.assert_called_once()
+        drafter.draft_answer.assert_called_once()
+        self.assertEqual(mock_model.generate_content.call_count, calls_before_resume)
+        self.assertEqual(drafter.refine_answer.call_count, 2)
+        self.assertEqual(drafter.refine_answer.call_args.args[1], "Coordinator response")
+        self.assertEqual(results["refine_answer"]["final_answer"]["answer"], "Final")
+        self.assertEqual(again, results)
+
+    @patch('src.agents.coordinator.genai')
+    @patch('src.agents.coordinator.DrafterAgent')
+    @patch('src.agents.coordinator.ResearcherAgent')
+    def test_completed_runs_keep_compact_checkpoints(self, mock_researcher, mock_drafter, mock_genai):
+        self._setup_agents(mock_researcher, mock_drafter, mock_genai)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = CheckpointStore(temp_dir, max_runs=2)
+            coordinator = ResearchCoordinator(checkpoint_store=store)
+
+            # Test the workflow: three finished runs, older ones updated first
+            for index in range(3):
+                coordinator.execute_research("Tell me about AI", run_id=f"run-{index}")
+                path = os.path.join(temp_dir, f"run-{index}.json")
+                os.utime(path, (1000 + index, 1000 + index))
+                store.prune()
+
+            checkpoint = store.load("run-2")
+            runs = store.list_runs()
+
+        # Assert results: only the results are kept, and only for the newest runs
+        self.assertIsNone(checkpoint["next_node"])
+        self.assertNotIn("state", checkpoint)
+        self.assertEqual(checkpoint["last_event"]["refine_answer"]["final_answer"]["answer"], "Final")
+        self.assertEqual(runs, ["run-2", "run-1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
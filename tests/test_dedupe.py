@@ -0,0 +1,95 @@
+# tests/test_dedupe.py
+import unittest
+import os
+import random
+import sys
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.dedupe import canonicalize_url, dedupe_sources, simhash
+
+ARTICLE = (
+    "The city council approved a new transit plan on Tuesday that expands bus service to the northern "
+    "suburbs, adds two light rail stations and funds protected bike lanes along the river. Officials said "
+    "construction will begin next spring and the first routes should open within eighteen months, while "
+    "critics questioned whether the budget accounts for rising material costs. The plan was drafted over "
+    "two years of public meetings in which residents asked for more frequent service at night and on "
+    "weekends. Under the approved version, buses on the busiest corridors will arrive every ten minutes "
+    "from early morning until midnight, and a new fare card will let riders transfer between buses and "
+    "trains without paying twice. The council also set aside money for a study of a ferry link across the "
+    "bay, which supporters say could relieve congestion on the two existing bridges. Business groups "
+    "welcomed the expansion but urged the city to keep roadwork from blocking shop entrances during "
+    "construction, and the mayor promised a liaison office to handle complaints from merchants."
+)
+
+
+class TestDedupe(unittest.TestCase):
+
+    def test_canonicalize_url_merges_variants(self):
+        canonical = canonicalize_url("https://example.com/news/transit-plan")
+
+        # Assert scheme, www, tracking parameters, fragments and AMP variants collapse
+        for variant in [
+            "http://www.example.com/news/transit-plan/",
+            "https://example.com/news/transit-plan?utm_source=feed&utm_medium=rss#comments",
+            "https://example.com/news/transit-plan/amp",
+            "https://amp.example.com/news/transit-plan?fbclid=abc",
+            "https://example-com.cdn.ampproject.org/c/s/example.com/news/transit-plan"
+        ]:
+            self.assertEqual(canonicalize_url(variant), canonical, variant)
+
+        # Meaningful query parameters still tell pages apart
+        self.assertNotEqual(canonicalize_url("https://example.com/list?page=2"),
+                            canonicalize_url("https://example.com/list?page=3"))
+
+    def test_simhash_is_close_for_near_duplicates(self):
+        original = simhash(ARTICLE)
+        syndicated = simhash("Reuters - " + ARTICLE.replace("Tuesday", "Tuesday evening"))
+        unrelated = simhash("Scientists sequenced the genome of a deep sea fish that glows in the dark "
+                            "and found genes that help it survive crushing pressure and cold water.")
+
+        self.assertLessEqual(bin(original ^ syndicated).count("1"), 3)
+        self.assertGreater(bin(original ^ unrelated).count("1"), 10)
+
+    def test_dedupe_sources_reports_removals(self):
+        sources = [
+            {"url": "https://example.com/transit", "content": ARTICLE},
+            {"url": "http://www.example.com/transit/?utm_campaign=x", "content": "Snippet", "raw_content": "Full"},
+            {"url": "https://news.example.org/story-123", "content": "Reuters - " + ARTICLE},
+            {"url": "https://example.net/other", "content": "A short unrelated snippet."}
+        ]
+
+        kept, removed = dedupe_sources(sources)
+
+        # Assert the URL variant and the syndicated copy were removed
+        self.assertEqual([source["url"] for source in kept],
+                         ["https://example.com/transit", "https://example.net/other"])
+        self.assertEqual([(entry["reason"], entry["duplicate_of"]) for entry in removed], [
+            ("url", "https://example.com/transit"),
+            ("content", "https://example.com/transit")
+        ])
+
+        # The kept source took over the variant's full text
+        self.assertEqual(kept[0]["raw_content"], "Full")
+
+    def test_dedupe_scales_linearly(self):
+        vocabulary = [f"word{i}" for i in range(2000)]
+        rng = random.Random(0)
+        sources = [
+            {"url": f"https://site{i}.example.com/page", "content": " ".join(rng.choices(vocabulary, k=80))}
+            for i in range(500)
+        ]
+
+        started = time.perf_counter()
+        kept, removed = dedupe_sources(sources)
+
+        # Assert distinct sources survive and the pass stays fast
+        self.assertEqual(len(kept), 500)
+        self.assertEqual(removed, [])
+        self.assertLess(time.perf_counter() - started, 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
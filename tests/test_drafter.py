@@ -3,11 +3,14 @@ import unittest
 from unittest.mock import patch, MagicMock
 import os
 import sys
+import tempfile
+import time
 
 # Add src to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.agents.drafter import DrafterAgent
+from src.utils.llm import configure_llm_cache
 
 
 class TestDrafter(unittest.TestCase):
@@ -86,6 +89,163 @@ class TestDrafter(unittest.TestCase):
         # Verify method calls
         mock_model.generate_content.assert_called_once()
 
+    @patch('src.agents.drafter.genai')
+    def test_refine_sections_rewrites_only_affected_sections(self, mock_genai):
+        # Setup mocks: each section prompt gets its heading back with new text
+        def generate_content(prompt):
+            heading = prompt.split('unchanged heading line "')[1].split('"')[0]
+            return MagicMock(text=f"{heading}\n\nRewritten {heading.lstrip('# ').lower()} text.\n")
+
+        mock_model = MagicMock()
+        mock_model.generate_content.side_effect = generate_content
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        # Create drafter agent in section mode
+        drafter = DrafterAgent(refine_mode="sections")
+
+        draft = (
+            "# Solar Power\n\nIntro text.\n\n"
+            "## Costs\n\nPanel costs fell sharply over the decade.\n\n"
+            "## Storage\n\nBattery storage smooths evening demand.\n\n"
+            "## References\n\n1. [Report](https://example.com)\n"
+        )
+        draft_answer = {"topic": "solar power", "answer": draft, "format": "markdown"}
+
+        # Test the method
+        feedback = "- Add recent figures on panel costs\n- Explain battery storage capacity limits"
+        with patch.object(drafter.model, "generate_content", wraps=drafter.model.generate_content) as spy:
+            result = drafter.refine_answer(draft_answer, feedback)
+
+        # Assert results: two sections rewritten in place, the rest byte-identical
+        self.assertEqual(mock_model.generate_content.call_count, 2)
+        self.assertEqual(result["refined_sections"], ["Costs", "Storage"])
+        # Section rewrites have their own step for cache opt-outs and hedging
+        self.assertEqual({call.kwargs["step"] for call in spy.call_args_list}, {"refine_section"})
+        self.assertEqual(result["answer"], (
+            "# Solar Power\n\nIntro text.\n\n"
+            "## Costs\n\nRewritten costs text.\n\n"
+            "## Storage\n\nRewritten storage text.\n\n"
+            "## References\n\n1. [Report](https://example.com)\n"
+        ))
+
+    @patch('src.agents.drafter.genai')
+    def test_refine_sections_falls_back_to_full(self, mock_genai):
+        # Setup mocks
+        mock_model = MagicMock()
+        mock_model.generate_content.return_value = MagicMock(text="Fully refined")
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        # Create drafter agent in section mode
+        drafter = DrafterAgent(refine_mode="sections")
+        draft_answer = {"topic": "solar power", "answer": "# Solar\n\nText.\n\n## Costs\n\nCheap.\n"}
+
+        # Test the method: the feedback matches no section
+        result = drafter.refine_answer(draft_answer, "Be more engaging")
+
+        # Assert results
+        self.assertEqual(result["answer"], "Fully refined")
+        self.assertNotIn("refined_sections", result)
+        mock_model.generate_content.assert_called_once()
+
+    @patch('src.agents.drafter.genai')
+    def test_draft_answer_streams_chunks(self, mock_genai):
+        # Setup mocks: the model streams the answer in three chunks
+        mock_model = MagicMock()
+        mock_model.generate_content.return_value = iter(
+            [MagicMock(text="# AI\n"), MagicMock(text="\nFirst part. "), MagicMock(text="Second part.")]
+        )
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        # Create drafter agent
+        drafter = DrafterAgent()
+
+        # Test the method
+        chunks = []
+        result = drafter.draft_answer({"topic": "AI", "sources": []}, on_chunk=chunks.append)
+
+        # Assert results
+        self.assertEqual(chunks, ["# AI\n", "\nFirst part. ", "Second part."])
+        self.assertEqual(result["answer"], "# AI\n\nFirst part. Second part.")
+        self.assertTrue(mock_model.generate_content.call_args.kwargs["stream"])
+
+    @patch('src.agents.drafter.genai')
+    def test_stream_content_iterator(self, mock_genai):
+        # Setup mocks
+        mock_model = MagicMock()
+        mock_model.generate_content.return_value = iter([MagicMock(text="Hello "), MagicMock(text="world")])
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        # Create drafter agent
+        drafter = DrafterAgent()
+
+        # Test the method
+        chunks = list(drafter.model.stream_content("Say hello", step="draft_answer"))
+
+        # Assert results
+        self.assertEqual(chunks, ["Hello ", "world"])
+
+    @patch('src.agents.drafter.genai')
+    def test_stream_content_stops_when_consumer_stops(self, mock_genai):
+        # Setup mocks: a long stream that records how many chunks were pulled
+        pulled = []
+
+        def stream():
+            for index in range(50):
+                pulled.append(index)
+                time.sleep(0.01)
+                yield MagicMock(text=f"part {index} ")
+
+        mock_model = MagicMock()
+        mock_model.generate_content.return_value = stream()
+        mock_genai.GenerativeModel.return_value = mock_model
+        drafter = DrafterAgent()
+
+        # Test the method: read one chunk, then stop
+        chunks = drafter.model.stream_content("Say a lot", step="draft_answer")
+        self.assertEqual(next(chunks), "part 0 ")
+        chunks.close()
+        time.sleep(0.2)
+
+        # Assert the producer stopped pulling soon after
+        self.assertLess(len(pulled), 5)
+
+    @patch('src.agents.drafter.genai')
+    def test_llm_cache_with_step_opt_out(self, mock_genai):
+        # Setup mocks
+        mock_model = MagicMock()
+        mock_response = MagicMock()
+        mock_response.text = "Cached text"
+        mock_model.generate_content.return_value = mock_response
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = configure_llm_cache(
+                path=os.path.join(temp_dir, "cache.sqlite"),
+                uncached_steps=["refine_answer"]
+            )
+            try:
+                # Create drafter agent
+                drafter = DrafterAgent()
+                research_data = {"topic": "artificial intelligence", "sources": []}
+
+                # Identical prompts are answered from the cache
+                first = drafter.draft_answer(research_data)
+                second = drafter.draft_answer(research_data)
+                self.assertEqual(first["answer"], "Cached text")
+                self.assertEqual(second["answer"], "Cached text")
+                self.assertEqual(mock_model.generate_content.call_count, 1)
+
+                # The refine step opted out of caching
+                drafter.refine_answer(first, "Add detail")
+                drafter.refine_answer(first, "Add detail")
+                self.assertEqual(mock_model.generate_content.call_count, 3)
+
+                stats = cache.stats()
+                self.assertEqual(stats["hits"], 1)
+                self.assertEqual(stats["misses"], 1)
+            finally:
+                configure_llm_cache(enabled=False)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
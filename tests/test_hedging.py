@@ -0,0 +1,124 @@
+# tests/test_hedging.py
+import unittest
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.hedging import HedgingPolicy
+from src.utils.llm import LLMClient
+
+
+def warm_up(policy, step, calls=3):
+    """Give the policy a few fast observations of a step."""
+    for _ in range(calls):
+        policy.run(step, lambda decided: "fast")
+
+
+class TestHedging(unittest.TestCase):
+
+    def test_slow_call_is_hedged_and_hedge_wins(self):
+        policy = HedgingPolicy(budgets={"draft_answer": 1.0}, min_samples=3, min_delay=0.02)
+        warm_up(policy, "draft_answer")
+
+        # The first request hangs, the duplicate answers at once
+        calls = []
+        lock = threading.Lock()
+
+        def call(decided):
+            with lock:
+                calls.append(decided)
+                first = len(calls) == 1
+            if first:
+                time.sleep(0.5)
+                return "slow"
+            return "hedged"
+
+        # Test the method
+        started = time.perf_counter()
+        result = policy.run("draft_answer", call)
+        elapsed = time.perf_counter() - started
+
+        # Assert results
+        self.assertEqual(result, "hedged")
+        self.assertLess(elapsed, 0.4)
+        self.assertTrue(calls[0].is_set())
+        stats = policy.stats()["draft_answer"]
+        self.assertEqual(stats["hedged"], 1)
+        self.assertEqual(stats["hedge_wins"], 1)
+
+    def test_hedge_win_records_time_since_original_request(self):
+        policy = HedgingPolicy(budgets={"draft_answer": 1.0}, min_samples=3, min_delay=0.05)
+        warm_up(policy, "draft_answer")
+        first = threading.Event()
+
+        def call(decided):
+            # The original request hangs, the hedge answers at once
+            if not first.is_set():
+                first.set()
+                time.sleep(0.3)
+                return "slow"
+            return "hedged"
+
+        # Test the method
+        result = policy.run("draft_answer", call)
+
+        # Assert the observation covers the wait before hedging, not just the hedge
+        self.assertEqual(result, "hedged")
+        self.assertGreaterEqual(policy._latencies["draft_answer"][-1], 0.05)
+
+    def test_budget_limits_hedges(self):
+        policy = HedgingPolicy(budgets={"refine_answer": 0.0}, min_samples=3, min_delay=0.01)
+        warm_up(policy, "refine_answer")
+
+        # Test the method
+        call = MagicMock(side_effect=lambda decided: time.sleep(0.05) or "slow")
+        result = policy.run("refine_answer", call)
+
+        # Assert results
+        self.assertEqual(result, "slow")
+        self.assertEqual(call.call_count, 1)
+        stats = policy.stats()["refine_answer"]
+        self.assertEqual(stats["hedged"], 0)
+        self.assertEqual(stats["budget_exhausted"], 1)
+
+    def test_section_rewrites_keep_their_own_window_and_budget(self):
+        policy = HedgingPolicy(min_samples=3)
+        warm_up(policy, "refine_section", calls=5)
+
+        # Assert the fast section calls neither touch the refine_answer window nor its budget
+        self.assertEqual(policy.budgets["refine_section"], 0.1)
+        self.assertNotIn("refine_answer", policy._latencies)
+        self.assertEqual(policy.stats()["refine_section"]["calls"], 5)
+        self.assertNotIn("refine_answer", policy.stats())
+
+    def test_llm_client_hedges_covered_steps_only(self):
+        # Setup mocks
+        policy = HedgingPolicy(budgets={"draft_answer": 1.0}, min_samples=3, min_delay=0.02)
+        delays = iter([0, 0, 0, 0.5])
+
+        def generate_content(prompt):
+            time.sleep(next(delays, 0))
+            return MagicMock(text="answer")
+
+        model = MagicMock()
+        model.generate_content.side_effect = generate_content
+        client = LLMClient(model, "hedge-model", hedging=policy)
+
+        # Test the method
+        for _ in range(4):
+            client.generate_content("prompt", step="draft_answer")
+        client.generate_content("prompt", step="analyze_draft")
+
+        # Assert results: one hedge for the slow draft, none for the other step
+        self.assertEqual(model.generate_content.call_count, 6)
+        self.assertEqual(policy.stats()["draft_answer"]["hedged"], 1)
+        self.assertNotIn("analyze_draft", policy.stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# tests/test_main.py
+import unittest
+from unittest.mock import MagicMock
+import os
+import sys
+import tempfile
+import glob
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.fakes import build_fake_coordinator
+from src.main import AnswerStreamWriter, read_batch_file, run_batch, save_results
+
+
+class TestBatchMode(unittest.TestCase):
+
+    def test_read_batch_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "queries.txt")
+            with open(path, "w") as f:
+                f.write('quantum computing in healthcare\n\n{"query": "AI ethics"}\n')
+
+            queries = read_batch_file(path)
+
+        self.assertEqual(queries, ["quantum computing in healthcare", "AI ethics"])
+
+    def test_run_batch_saves_each_result(self):
+        # Setup a shared coordinator mock; one query fails
+        coordinator = MagicMock()
+
+        def execute_research(query, tracer=None):
+            if query == "bad":
+                raise RuntimeError("boom")
+            return {"refine_answer": {"final_answer": {"answer": f"Answer for {query}"}}}
+
+        coordinator.execute_research.side_effect = execute_research
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            summary = run_batch(coordinator, ["one", "bad", "two", "three"], temp_dir, workers=2)
+            md_files = glob.glob(os.path.join(temp_dir, "*.md"))
+            trace_files = glob.glob(os.path.join(temp_dir, "*.trace.json"))
+
+        # Assert results
+        self.assertEqual(summary["completed"], 3)
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(summary["failures"][0]["query"], "bad")
+        self.assertEqual(len(md_files), 3)
+        self.assertEqual(len(trace_files), 3)
+        self.assertGreater(summary["throughput_per_min"], 0)
+        self.assertLessEqual(summary["latency_s"]["p50"], summary["latency_s"]["max"])
+
+    def test_save_results_without_refinement(self):
+        # The run ended at analyze_draft because the draft was good enough
+        results = {"analyze_draft": {"final_answer": {"answer": "Unrefined answer", "refinements": 0}}}
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            _, md_filename = save_results(results, temp_dir)
+            with open(md_filename) as f:
+                markdown = f.read()
+
+        # Assert results
+        self.assertEqual(markdown, "Unrefined answer")
+
+    def test_stream_writer_keeps_only_the_last_refinement(self):
+        # Drafts score 6 by default, so both refinement rounds run
+        coordinator = build_fake_coordinator(max_refinements=2)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            writer = AnswerStreamWriter(os.path.join(temp_dir, "answer.md"))
+            results = coordinator.execute_research("Benchmark topic", on_chunk=writer,
+                                                   on_answer_start=writer.start_answer)
+            writer.close()
+            with open(writer.md_filename) as f:
+                markdown = f.read()
+
+        # Assert the file holds the final answer once, not every round appended
+        final_answer = results["refine_answer"]["final_answer"]
+        self.assertEqual(final_answer["refinements"], 2)
+        self.assertEqual(writer.answers, 3)
+        self.assertEqual(markdown, final_answer["answer"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,8 @@ import unittest
 from unittest.mock import patch, MagicMock
 import os
 import sys
+import time
+import json
 
 # Add src to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -12,6 +14,12 @@ from src.agents.researcher import ResearcherAgent
 
 class TestResearcher(unittest.TestCase):
 
+    def setUp(self):
+        # Keep the suite hermetic: no shared on-disk cache between runs
+        env = patch.dict(os.environ, {"RESEARCH_CACHE_PATH": ""})
+        env.start()
+        self.addCleanup(env.stop)
+
     @patch('src.agents.researcher.genai')
     @patch('src.agents.researcher.TavilySearchTool')
     def test_generate_search_queries(self, mock_tavily, mock_genai):
@@ -71,6 +79,240 @@ class TestResearcher(unittest.TestCase):
         self.assertTrue(mock_tavily_instance.get_sources.called)
         self.assertTrue(mock_model.generate_content.called)
 
+    @patch('src.agents.researcher.genai')
+    @patch('src.agents.researcher.TavilySearchTool')
+    @patch('src.agents.researcher.WebCrawler')
+    def test_concurrent_search_keeps_order(self, mock_crawler, mock_tavily, mock_genai):
+        # Setup mocks
+        mock_model = MagicMock()
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        # Earlier queries answer last so completion order differs from query order
+        delays = {"query 1": 0.05, "query 2": 0.02, "query 3": 0.0}
+
+        def get_sources(query):
+            time.sleep(delays[query])
+            return [
+                {"title": f"{query} shared", "url": "https://example.com/shared", "content": query},
+                {"title": f"{query} own", "url": f"https://example.com/{query[-1]}", "content": query}
+            ]
+
+        mock_tavily_instance = MagicMock()
+        mock_tavily_instance.get_sources.side_effect = get_sources
+        mock_tavily.return_value = mock_tavily_instance
+
+        # Create researcher agent
+        researcher = ResearcherAgent(max_search_workers=3)
+        researcher._generate_search_queries = MagicMock(return_value=["query 1", "query 2", "query 3"])
+        researcher._extract_relevant_info = MagicMock(return_value={})
+
+        # Test the research method
+        result = researcher.research("artificial intelligence")
+
+        # Assert results
+        urls = [source["url"] for source in result["sources"]]
+        self.assertEqual(urls, [
+            "https://example.com/shared",
+            "https://example.com/1",
+            "https://example.com/2",
+            "https://example.com/3"
+        ])
+        self.assertEqual(result["sources"][0]["query"], "query 1")
+        self.assertEqual(result["sources"][3]["query"], "query 3")
+        self.assertEqual(mock_tavily_instance.get_sources.call_count, 3)
+
+    @patch('src.agents.researcher.genai')
+    @patch('src.agents.researcher.TavilySearchTool')
+    @patch('src.agents.researcher.WebCrawler')
+    def test_advanced_research_only_crawls_sources_without_raw_content(self, mock_crawler, mock_tavily, mock_genai):
+        # Setup mocks
+        mock_genai.GenerativeModel.return_value = MagicMock()
+
+        mock_tavily_instance = MagicMock()
+        mock_tavily_instance.get_sources.return_value = [
+            {"title": "Full", "url": "https://example.com/full", "content": "Snippet", "raw_content": "Full text"},
+            {"title": "Partial", "url": "https://example.com/partial", "content": "Snippet"}
+        ]
+        mock_tavily.return_value = mock_tavily_instance
+
+        mock_crawler_instance = MagicMock()
+        mock_crawler_instance.crawl_urls.return_value = [
+            {"url": "https://example.com/partial", "title": "Partial", "content": "Crawled text"}
+        ]
+        mock_crawler.return_value = mock_crawler_instance
+
+        # Create researcher agent
+        researcher = ResearcherAgent()
+        researcher._extract_relevant_info = MagicMock(return_value={})
+
+        # Test the research method
+        result = researcher.research("artificial intelligence", depth="advanced", queries=["ai"])
+
+        # Assert raw content was requested and only the missing page was crawled
+        mock_tavily_instance.get_sources.assert_called_once_with(
+            "ai", search_depth="advanced", include_raw_content=True
+        )
+        mock_crawler_instance.crawl_urls.assert_called_once_with(["https://example.com/partial"])
+        self.assertEqual([source["raw_content"] for source in result["sources"]], ["Full text", "Crawled text"])
+        self.assertIn("Crawled text", researcher._format_sources(result["sources"], "artificial intelligence"))
+
+    @patch('src.agents.researcher.genai')
+    @patch('src.agents.researcher.TavilySearchTool')
+    @patch('src.agents.researcher.WebCrawler')
+    def test_advanced_research_map_reduces_extraction(self, mock_crawler, mock_tavily, mock_genai):
+        # Setup mocks
+        mock_model = MagicMock()
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        sources = [
+            {"title": f"Source {i}", "url": f"https://example.com/{i}", "content": "Text", "raw_content": "Text"}
+            for i in range(20)
+        ]
+        mock_tavily_instance = MagicMock()
+        mock_tavily_instance.get_sources.return_value = sources
+        mock_tavily.return_value = mock_tavily_instance
+
+        partials = [
+            {"main_findings": ["Costs fell sharply in 2023", "Adoption is rising"], "data_points": ["40% drop"],
+             "perspectives": [], "information_gaps": ["Long-term effects"]},
+            {"main_findings": ["costs fell sharply in 2023!", "Regulation lags behind"], "data_points": ["40% drop"],
+             "perspectives": ["Industry view"], "information_gaps": []},
+            {"main_findings": ["adoption is rising."], "data_points": [], "perspectives": [],
+             "information_gaps": ["Long-term effects"]}
+        ]
+
+        # Create researcher agent extracting eight sources per call
+        researcher = ResearcherAgent(extraction_batch_size=8)
+        researcher._extract_relevant_info = MagicMock(side_effect=partials)
+        researcher._generate_search_queries = MagicMock(return_value=["query"])
+        researcher.model = MagicMock()
+        researcher.model.generate_content.return_value = MagicMock(text="Summary")
+
+        # Test the research method
+        result = researcher.research("energy costs", depth="advanced")
+
+        # Assert one extraction per batch and a locally merged result
+        batch_sizes = [len(call.args[0]) for call in researcher._extract_relevant_info.call_args_list]
+        self.assertEqual(sorted(batch_sizes), [4, 8, 8])
+        self.assertEqual(result["extracted_info"], {
+            "main_findings": ["Costs fell sharply in 2023", "Adoption is rising", "Regulation lags behind"],
+            "data_points": ["40% drop"],
+            "perspectives": ["Industry view"],
+            "information_gaps": ["Long-term effects"]
+        })
+
+        # Only the summary called the model; nothing needed consolidating
+        steps = [call.kwargs.get("step") for call in researcher.model.generate_content.call_args_list]
+        self.assertEqual(steps, ["summarize_research"])
+
+    @patch('src.agents.researcher.genai')
+    @patch('src.agents.researcher.TavilySearchTool')
+    def test_long_merged_lists_are_consolidated(self, mock_tavily, mock_genai):
+        # Setup mocks
+        mock_genai.GenerativeModel.return_value = MagicMock()
+
+        # Create researcher agent with a low item limit
+        researcher = ResearcherAgent(extraction_batch_size=1, max_merged_items=2)
+        researcher.model = MagicMock()
+        researcher.model.generate_content.return_value = MagicMock(text=json.dumps({
+            "main_findings": ["Combined finding"], "data_points": [], "perspectives": [], "information_gaps": []
+        }))
+        researcher._extract_relevant_info = MagicMock(side_effect=[
+            {"main_findings": [f"Distinct finding number {i} about topic {i}"]} for i in range(3)
+        ])
+
+        # Test the method
+        result = researcher._map_reduce_extract([{"title": str(i)} for i in range(3)], "topic")
+
+        # Assert the consolidation call replaced the merged lists
+        self.assertEqual(result["main_findings"], ["Combined finding"])
+        self.assertEqual(researcher.model.generate_content.call_args.kwargs["step"], "consolidate_findings")
+
+    @patch('src.agents.researcher.genai')
+    @patch('src.agents.researcher.TavilySearchTool')
+    def test_plan_research(self, mock_tavily, mock_genai):
+        # Setup mocks
+        mock_model = MagicMock()
+        mock_response = MagicMock()
+        mock_response.text = '```json\n{"topic": "AI in healthcare", "search_queries": ["AI diagnosis", "AI drug discovery"]}\n```'
+        mock_model.generate_content.return_value = mock_response
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        # Create researcher agent
+        researcher = ResearcherAgent()
+
+        # Test the method
+        plan = researcher.plan_research("How is AI used in healthcare?")
+
+        # Assert results
+        self.assertEqual(plan["topic"], "AI in healthcare")
+        self.assertEqual(plan["queries"], ["AI diagnosis", "AI drug discovery"])
+        mock_model.generate_content.assert_called_once()
+
+    @patch('src.agents.researcher.genai')
+    @patch('src.agents.researcher.TavilySearchTool')
+    @patch('src.agents.researcher.WebCrawler')
+    def test_fused_research_flow(self, mock_crawler, mock_tavily, mock_genai):
+        # Setup mocks
+        mock_model = MagicMock()
+        mock_response = MagicMock()
+        mock_response.text = (
+            '{"main_findings": ["Finding 1"], "data_points": [], "perspectives": [], '
+            '"information_gaps": [], "summary": "Short summary"}'
+        )
+        mock_model.generate_content.return_value = mock_response
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        mock_tavily_instance = MagicMock()
+        mock_tavily_instance.get_sources.return_value = [
+            {"title": "Test Title", "url": "https://example.com", "content": "Test content"}
+        ]
+        mock_tavily.return_value = mock_tavily_instance
+
+        # Create researcher agent
+        researcher = ResearcherAgent()
+
+        # Test the research method with planned queries
+        result = researcher.research("artificial intelligence", queries=["query 1"], fused=True)
+
+        # Assert results
+        self.assertEqual(result["queries"], ["query 1"])
+        self.assertEqual(result["extracted_info"]["main_findings"], ["Finding 1"])
+        self.assertNotIn("summary", result["extracted_info"])
+        self.assertEqual(result["summary"], "Short summary")
+
+        # Query generation and the separate summary call were skipped
+        mock_model.generate_content.assert_called_once()
+
+    @patch('src.agents.researcher.genai')
+    @patch('src.agents.researcher.TavilySearchTool')
+    def test_filter_relevant(self, mock_tavily, mock_genai):
+        # Create researcher agent
+        researcher = ResearcherAgent()
+
+        sources = [
+            {"title": "Quantum computing in hospitals", "url": "https://a.com", "content": "Healthcare uses"},
+            {"title": "Celebrity news", "url": "https://b.com", "content": "Nothing relevant here"}
+        ]
+
+        # Test the method
+        relevant = researcher._filter_relevant(sources, "Quantum computing applications in healthcare")
+
+        # Assert results
+        self.assertEqual([source["url"] for source in relevant], ["https://a.com"])
+
+    @patch('src.agents.researcher.genai')
+    @patch('src.agents.researcher.TavilySearchTool')
+    @patch('src.agents.researcher.WebCrawler')
+    def test_close_shuts_down_crawler_pool(self, mock_crawler, mock_tavily, mock_genai):
+        researcher = ResearcherAgent()
+
+        # Test the method
+        researcher.close()
+
+        # Assert the crawler released its parsing process pool
+        mock_crawler.return_value.close.assert_called_once()
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,115 @@
+# tests/test_resilience.py
+import unittest
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.llm import LLMClient
+from src.utils.resilience import (
+    CircuitOpenError, ProviderGuard, TokenBucket, configure_guard, get_guard, retry_after
+)
+
+
+class HTTPError(Exception):
+    """Error carrying a response like the ones raised by requests."""
+
+    def __init__(self, status, headers=None):
+        super().__init__(f"{status} Error")
+        self.response = MagicMock(status_code=status, headers=headers or {})
+
+
+class TestResilience(unittest.TestCase):
+
+    @patch('src.utils.resilience.time.sleep')
+    def test_retries_transient_errors_and_honours_retry_after(self, mock_sleep):
+        # Setup mocks
+        fn = MagicMock(side_effect=[HTTPError(503), HTTPError(429, {"Retry-After": "2"}), "ok"])
+        guard = ProviderGuard("test", base_delay=0.1)
+
+        # Test the method
+        result = guard.call(fn)
+
+        # Assert results
+        self.assertEqual(result, "ok")
+        self.assertEqual(fn.call_count, 3)
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        self.assertLessEqual(delays[0], 0.1)
+        self.assertGreaterEqual(delays[1], 2.0)
+        self.assertEqual(guard.stats()["retries"], 2)
+
+    @patch('src.utils.resilience.time.sleep')
+    def test_does_not_retry_bad_requests(self, mock_sleep):
+        # Setup mocks
+        fn = MagicMock(side_effect=HTTPError(400))
+        guard = ProviderGuard("test")
+
+        # Test the method
+        with self.assertRaises(HTTPError):
+            guard.call(fn)
+
+        # Assert results
+        self.assertEqual(fn.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    def test_circuit_opens_and_recovers(self):
+        guard = ProviderGuard("test", max_attempts=1, failure_threshold=2, reset_timeout=30)
+        failing = MagicMock(side_effect=HTTPError(500))
+
+        # Two failures open the circuit, so the next call is not made
+        for _ in range(2):
+            with self.assertRaises(HTTPError):
+                guard.call(failing)
+        with self.assertRaises(CircuitOpenError):
+            guard.call(failing)
+        self.assertEqual(failing.call_count, 2)
+        self.assertEqual(guard.stats()["circuit"], "open")
+
+        # After the reset timeout a trial call goes through and closes it
+        guard.breaker._opened_at -= 30
+        self.assertEqual(guard.call(lambda: "ok"), "ok")
+        self.assertEqual(guard.stats()["circuit"], "closed")
+        self.assertEqual(guard.stats()["circuit_opened"], 1)
+
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+
+        # Test the method
+        started = time.perf_counter()
+        for _ in range(5):
+            bucket.acquire()
+        elapsed = time.perf_counter() - started
+
+        # Assert results: the first token is free, the other four take 50ms each
+        self.assertGreaterEqual(elapsed, 0.18)
+
+    def test_retry_after_sources(self):
+        self.assertEqual(retry_after(HTTPError(429, {"Retry-After": "7"})), 7.0)
+        self.assertEqual(retry_after(Exception("429 Quota exceeded retry_delay { seconds: 12 }")), 12.0)
+        self.assertIsNone(retry_after(Exception("boom")))
+
+    def test_guards_are_shared_per_provider_and_model(self):
+        self.assertIs(get_guard("gemini", "model-a"), get_guard("gemini", "model-a"))
+        self.assertIsNot(get_guard("gemini", "model-a"), get_guard("gemini", "model-b"))
+
+    @patch('src.utils.resilience.time.sleep')
+    def test_llm_client_retries_through_guard(self, mock_sleep):
+        # Setup mocks
+        configure_guard("gemini", "retry-model", base_delay=0)
+        response = MagicMock(text="answer")
+        model = MagicMock()
+        model.generate_content.side_effect = [HTTPError(503), response]
+
+        # Test the method
+        result = LLMClient(model, "retry-model").generate_content("prompt")
+
+        # Assert results
+        self.assertEqual(result.text, "answer")
+        self.assertEqual(model.generate_content.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+# tests/test_service.py
+import unittest
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.fakes import build_fake_coordinator
+from src.service import ResearchService, make_server
+
+
+def request(base_url, path, body=None):
+    """Send a request to the service, returning (status, JSON body)."""
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method="POST" if data else "GET")
+    try:
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestResearchService(unittest.TestCase):
+
+    def start_service(self, gemini_latency=0.0, **options):
+        coordinator = build_fake_coordinator(gemini_latency=gemini_latency)
+        service = ResearchService(coordinator, **options).start()
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(service.stop)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address[:2]
+        return service, f"http://{host}:{port}"
+
+    def wait_for_result(self, base_url, job_id, timeout=20):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            status, body = request(base_url, f"/jobs/{job_id}/result")
+            if status != 202:
+                return status, body
+            time.sleep(0.05)
+        self.fail(f"Job {job_id} did not finish")
+
+    def test_job_runs_to_completion(self):
+        service, base_url = self.start_service()
+
+        # Test the method
+        status, job = request(base_url, "/jobs", {"query": "quantum computing in healthcare"})
+        result_status, result = self.wait_for_result(base_url, job["job_id"])
+
+        # Assert results
+        self.assertEqual(status, 202)
+        self.assertFalse(job["coalesced"])
+        self.assertEqual(result_status, 200)
+        self.assertTrue(result["final_answer"]["answer"])
+        self.assertIn("last_event", result)
+
+        _, finished = request(base_url, f"/jobs/{job['job_id']}")
+        self.assertEqual(finished["status"], "succeeded")
+        self.assertIn("conduct_research", [step["step"] for step in finished["steps"]])
+
+    def test_identical_queries_are_coalesced(self):
+        service, base_url = self.start_service(gemini_latency=0.1)
+
+        # Test the method
+        _, first = request(base_url, "/jobs", {"query": "Quantum computing in healthcare"})
+        _, second = request(base_url, "/jobs", {"query": "  quantum computing   in healthcare "})
+
+        # Assert results
+        self.assertEqual(second["job_id"], first["job_id"])
+        self.assertTrue(second["coalesced"])
+        self.assertEqual(service.stats()["coalesced"], 1)
+        self.wait_for_result(base_url, first["job_id"])
+
+    def test_full_queue_is_refused(self):
+        service, base_url = self.start_service(gemini_latency=0.2, max_concurrency=1, max_queue=1)
+
+        # Test the method: one job running, one waiting, the third has no room
+        statuses = []
+        for query in ["first topic", "second topic", "third topic"]:
+            status, _ = request(base_url, "/jobs", {"query": query})
+            statuses.append(status)
+            time.sleep(0.05)
+
+        # Assert results
+        self.assertEqual(statuses, [202, 202, 429])
+
+    def test_stop_with_full_queue_returns_at_once(self):
+        coordinator = build_fake_coordinator(gemini_latency=0.2)
+        service = ResearchService(coordinator, max_concurrency=1, max_queue=1).start()
+
+        # Setup: one job running, one waiting in the full queue
+        running, _ = service.submit("first topic")
+        while running.status == "queued":
+            time.sleep(0.01)
+        waiting, _ = service.submit("second topic")
+
+        # Test the method
+        started = time.monotonic()
+        service.stop()
+        elapsed = time.monotonic() - started
+
+        # Assert results: stop did not block and the waiting job was not run
+        self.assertLess(elapsed, 0.1)
+        self.assertEqual(waiting.status, "failed")
+        self.assertIsNone(waiting.started_at)
+        self.assertNotIn("second topic", service._inflight)
+
+    def test_unknown_job_and_bad_request(self):
+        service, base_url = self.start_service()
+
+        # Test the method
+        missing_status, _ = request(base_url, "/jobs/nope")
+        bad_status, _ = request(base_url, "/jobs", {"topic": "no query"})
+        health_status, health = request(base_url, "/health")
+
+        # Assert results
+        self.assertEqual(missing_status, 404)
+        self.assertEqual(bad_status, 400)
+        self.assertEqual(health_status, 200)
+        self.assertEqual(health["jobs"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+# tests/test_tavily_search.py
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+import tempfile
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools.tavily_search import TavilySearchTool
+from src.utils.cache import SQLiteCache
+
+
+class TestTavilySearch(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.temp_dir.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    @patch('src.tools.tavily_search.TavilyClient')
+    def test_get_sources_uses_cache(self, mock_client_class):
+        # Setup mocks
+        mock_client = MagicMock()
+        mock_client.search.return_value = {
+            "results": [{"title": "Test Title", "url": "https://example.com", "content": "Test content"}]
+        }
+        mock_client_class.return_value = mock_client
+
+        # Create search tool with a private cache
+        cache = SQLiteCache(self.cache_path, namespace="tavily", ttl=60)
+        search_tool = TavilySearchTool(cache=cache)
+
+        # Test the method twice with the same arguments
+        first = search_tool.get_sources("artificial intelligence")
+        second = search_tool.get_sources("artificial intelligence")
+
+        # Assert results
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]["url"], "https://example.com")
+        mock_client.search.assert_called_once()
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+        # A different result count is a different cache entry
+        search_tool.get_sources("artificial intelligence", max_results=3)
+        self.assertEqual(mock_client.search.call_count, 2)
+
+    @patch('src.tools.tavily_search.TavilyClient')
+    def test_errors_are_not_cached(self, mock_client_class):
+        # Setup mocks
+        mock_client = MagicMock()
+        mock_client.search.side_effect = [Exception("rate limited"), {"results": []}]
+        mock_client_class.return_value = mock_client
+
+        # Create search tool with a private cache
+        search_tool = TavilySearchTool(cache=SQLiteCache(self.cache_path, namespace="tavily"))
+
+        # Test the method
+        failed = search_tool.search("artificial intelligence")
+        retried = search_tool.search("artificial intelligence")
+
+        # Assert results
+        self.assertIn("error", failed)
+        self.assertEqual(retried, {"results": []})
+        self.assertEqual(mock_client.search.call_count, 2)
+
+    @patch('src.utils.resilience.time.sleep')
+    @patch('src.tools.tavily_search.TavilyClient')
+    def test_transient_errors_are_retried(self, mock_client_class, mock_sleep):
+        # Setup mocks
+        mock_client = MagicMock()
+        mock_client.search.side_effect = [Exception("503 Service Unavailable"), {"results": []}]
+        mock_client_class.return_value = mock_client
+
+        # Create search tool without a cache
+        search_tool = TavilySearchTool(use_cache=False)
+
+        # Test the method
+        result = search_tool.search("artificial intelligence")
+
+        # Assert results
+        self.assertEqual(result, {"results": []})
+        self.assertEqual(mock_client.search.call_count, 2)
+        mock_sleep.assert_called_once()
+
+    @patch('src.tools.tavily_search.TavilyClient')
+    def test_raw_content_is_opt_in_and_truncated(self, mock_client_class):
+        # Setup mocks
+        mock_client = MagicMock()
+        mock_client.search.return_value = {
+            "results": [{"title": "Test Title", "url": "https://example.com", "content": "Snippet",
+                         "score": 0.9, "raw_content": "Full page text " * 100}]
+        }
+        mock_client_class.return_value = mock_client
+
+        # Create search tool with a private cache and a small raw content limit
+        search_tool = TavilySearchTool(cache=SQLiteCache(self.cache_path, namespace="tavily"),
+                                       raw_content_max_chars=50)
+
+        # Raw content is not requested by default
+        search_tool.get_sources("artificial intelligence")
+        self.assertFalse(mock_client.search.call_args.kwargs["include_raw_content"])
+
+        # When requested it is truncated and kept on the source with the score
+        sources = search_tool.get_sources("artificial intelligence", include_raw_content=True)
+        self.assertTrue(mock_client.search.call_args.kwargs["include_raw_content"])
+        self.assertEqual(mock_client.search.call_count, 2)
+        self.assertEqual(len(sources[0]["raw_content"]), 50)
+        self.assertEqual(sources[0]["score"], 0.9)
+
+
+class TestSQLiteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.temp_dir.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_lru_eviction(self):
+        cache = SQLiteCache(self.cache_path, max_entries=2)
+
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # Touch "a" so "b" becomes the least recently used entry
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_size_based_eviction(self):
+        # Create cache holding at most about two values
+        cache = SQLiteCache(self.cache_path, max_bytes=250)
+
+        cache.set("a", "x" * 100)
+        cache.set("b", "y" * 100)
+        self.assertIsNotNone(cache.get("a"))
+        cache.set("c", "z" * 100)
+
+        # Assert the least recently used value made room
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertLessEqual(cache.stats()["bytes"], 250)
+
+    def test_ttl_expiry_and_shared_file(self):
+        writer = SQLiteCache(self.cache_path, namespace="shared", ttl=60)
+        reader = SQLiteCache(self.cache_path, namespace="shared", ttl=60)
+
+        writer.set("key", {"value": 1})
+        self.assertEqual(reader.get("key"), {"value": 1})
+
+        # An entry older than the TTL is treated as missing
+        with patch('src.utils.cache.time.time', return_value=10 ** 12):
+            self.assertIsNone(reader.get("key"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,294 @@
+# tests/test_web_crawler.py
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+import tempfile
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools.html_extractor import extract_main_content
+from src.tools.web_crawler import WebCrawler
+from src.utils.cache import SQLiteCache
+
+
+def _streamed_response(body, content_type="text/html; charset=utf-8"):
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {"Content-Type": content_type}
+    chunks = [body[i:i + 1024] for i in range(0, len(body), 1024)]
+    response.iter_content = MagicMock(return_value=iter(chunks))
+    return response
+
+
+class TestWebCrawler(unittest.TestCase):
+
+    def setUp(self):
+        # Keep the suite hermetic: no shared on-disk cache between runs
+        env = patch.dict(os.environ, {"RESEARCH_CACHE_PATH": ""})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_crawl_urls_spaces_requests_per_host(self):
+        # Create crawler with a fixed per-host delay and no robots.txt lookups
+        crawler = WebCrawler(min_host_delay=0.2, max_host_delay=0.2, respect_robots=False)
+
+        started = {}
+
+        def fetch_page(url):
+            started[url] = time.monotonic()
+            return f"Title {url}", "Some content"
+
+        urls = [
+            "https://a.example.com/1",
+            "https://b.example.com/1",
+            "https://a.example.com/2",
+            "https://c.example.com/1"
+        ]
+
+        with patch.object(crawler, "fetch_page", side_effect=fetch_page):
+            begin = time.monotonic()
+            results = crawler.crawl_urls(urls)
+
+        # Assert results keep input order and shape
+        self.assertEqual([result["url"] for result in results], urls)
+        self.assertEqual(set(results[0].keys()), {"url", "title", "content"})
+
+        # Different hosts are not delayed, the same host is
+        self.assertLess(started["https://b.example.com/1"] - begin, 0.15)
+        self.assertLess(started["https://c.example.com/1"] - begin, 0.15)
+        self.assertGreaterEqual(
+            started["https://a.example.com/2"] - started["https://a.example.com/1"], 0.19
+        )
+
+    def test_robots_txt_fetched_once_per_host(self):
+        # Create crawler with no politeness delay
+        crawler = WebCrawler(min_host_delay=0, max_host_delay=0)
+
+        robots_response = MagicMock()
+        robots_response.status_code = 200
+        robots_response.text = "User-agent: *\nDisallow: /private\n"
+        crawler.session.get = MagicMock(return_value=robots_response)
+
+        with patch.object(crawler, "fetch_page", return_value=("Title", "Content")) as mock_fetch:
+            results = crawler.crawl_urls([
+                "https://example.com/public",
+                "https://example.com/private/page",
+                "https://example.com/other"
+            ])
+
+        # Assert the disallowed page was skipped
+        self.assertEqual(
+            [result["url"] for result in results],
+            ["https://example.com/public", "https://example.com/other"]
+        )
+        self.assertEqual(mock_fetch.call_count, 2)
+
+        # robots.txt was only requested once for the host
+        crawler.session.get.assert_called_once()
+
+    def test_crawl_urls_respects_max_content_chars(self):
+        # Create crawler with a small content limit
+        crawler = WebCrawler(min_host_delay=0, max_host_delay=0, respect_robots=False,
+                             max_content_chars=60, use_cache=False)
+
+        with patch.object(crawler, "fetch_page", return_value=("Title", "word " * 5000)):
+            results = crawler.crawl_urls(["https://example.com/long"])
+
+        # Assert the async crawl path kept only the configured number of characters
+        self.assertEqual(len(results[0]["content"]), 60)
+
+    def test_fetch_page_extracts_main_content(self):
+        # Create crawler with a small content limit
+        crawler = WebCrawler(max_content_chars=200, use_cache=False)
+
+        html = (
+            "<html><head><title>Main Title</title><script>var x = 1;</script></head><body>"
+            "<nav><a href='/'>Home</a> <a href='/about'>About us and the team</a></nav>"
+            "<div class='cookie-banner'>We use cookies to improve your experience here.</div>"
+            "<article><h1>Heading</h1>"
+            + "<p>This paragraph holds the actual article text of the page.</p>" * 200 +
+            "</article><footer><p>Copyright notice for the whole site.</p></footer></body></html>"
+        ).encode("utf-8")
+        response = _streamed_response(html)
+        crawler.session.get = MagicMock(return_value=response)
+
+        title, content = crawler.fetch_page("https://example.com/article")
+
+        # Assert boilerplate was dropped and only the limit was kept
+        self.assertEqual(title, "Main Title")
+        self.assertTrue(content.startswith("Heading This paragraph holds"))
+        self.assertNotIn("var x", content)
+        self.assertNotIn("About us", content)
+        self.assertNotIn("cookies", content)
+        self.assertEqual(len(content), 200)
+
+        # The download stopped early and the response was released
+        crawler.session.get.assert_called_once_with("https://example.com/article", timeout=10, stream=True)
+        self.assertGreater(len(list(response.iter_content.return_value)), 0)
+        response.close.assert_called_once()
+
+    def test_fetch_page_skips_unsupported_content_types(self):
+        # Create crawler and serve a PDF
+        crawler = WebCrawler(use_cache=False)
+        response = _streamed_response(b"%PDF-1.7", content_type="application/pdf")
+        crawler.session.get = MagicMock(return_value=response)
+
+        title, content = crawler.fetch_page("https://example.com/report.pdf")
+
+        # Assert nothing was read
+        self.assertIsNone(title)
+        self.assertIsNone(content)
+        response.iter_content.assert_not_called()
+        response.close.assert_called_once()
+
+    def test_fetch_page_caps_downloaded_bytes(self):
+        # Create crawler with a tiny byte cap and serve a large page
+        crawler = WebCrawler(max_page_bytes=2048, max_content_chars=100000, use_cache=False)
+        paragraph = "<p>Text from the early part of this very long page.</p>"
+        html = ("<html><head><title>Big</title></head><body>" + paragraph * 1000 + "</body></html>").encode("latin-1")
+        crawler.session.get = MagicMock(return_value=_streamed_response(html, "text/html; charset=ISO-8859-1"))
+
+        title, content = crawler.fetch_page("https://example.com/big")
+
+        # Assert only the first bytes were parsed
+        self.assertEqual(title, "Big")
+        self.assertLess(len(content), 2048)
+        self.assertIn("Text from the early part", content)
+
+    def test_crawl_urls_parses_in_process_pool(self):
+        # Create crawler parsing batches of two or more pages in worker processes
+        crawler = WebCrawler(min_host_delay=0, max_host_delay=0, respect_robots=False,
+                             parse_workers=2, min_pool_batch=2, use_cache=False)
+
+        def get(url, **kwargs):
+            slug = url.rsplit("/", 1)[-1]
+            html = f"<title>{slug}</title><p>Article text about {slug} with enough words.</p>"
+            return _streamed_response(html.encode("utf-8"))
+
+        crawler.session.get = MagicMock(side_effect=get)
+        urls = [f"https://host{i}.example.com/page-{i}" for i in range(4)]
+
+        try:
+            pooled = crawler.crawl_urls(urls)
+            self.assertIsNotNone(crawler._parser_pool)
+        finally:
+            crawler.close()
+
+        # Assert results keep input order and match in-process parsing
+        self.assertEqual([page["url"] for page in pooled], urls)
+        self.assertEqual(pooled[2]["title"], "page-2")
+        self.assertEqual(pooled[2]["content"], "Article text about page-2 with enough words.")
+        self.assertEqual(crawler.fetch_page(urls[2]), (pooled[2]["title"], pooled[2]["content"]))
+
+    def test_crawl_urls_small_batches_parse_in_process(self):
+        # Create crawler whose pool threshold is above the batch size
+        crawler = WebCrawler(min_host_delay=0, max_host_delay=0, respect_robots=False,
+                             parse_workers=2, min_pool_batch=5)
+
+        with patch.object(crawler, "fetch_page", return_value=("Title", "Content")) as mock_fetch:
+            results = crawler.crawl_urls(["https://example.com/1", "https://example.com/2"])
+
+        # Assert no pool was started and pages were fetched without one
+        self.assertEqual(len(results), 2)
+        self.assertIsNone(crawler._parser_pool)
+        mock_fetch.assert_called_with("https://example.com/2")
+
+    def test_recrawl_reuses_cached_page_on_not_modified(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Create crawler with a private page cache
+            cache = SQLiteCache(os.path.join(temp_dir, "cache.sqlite"), namespace="pages")
+            crawler = WebCrawler(page_cache=cache)
+
+            html = b"<title>Docs</title><p>Documentation text that rarely changes at all.</p>"
+            first = _streamed_response(html)
+            first.headers["ETag"] = '"v1"'
+            first.headers["Last-Modified"] = "Wed, 01 Jan 2025 00:00:00 GMT"
+            not_modified = MagicMock()
+            not_modified.status_code = 304
+            not_modified.headers = {"ETag": '"v1"'}
+            crawler.session.get = MagicMock(side_effect=[first, not_modified])
+
+            page = crawler.fetch_page("https://docs.example.com/guide")
+            again = crawler.fetch_page("https://docs.example.com/guide")
+            stats = cache.stats()
+
+        # Assert the second fetch was conditional and reused the stored extraction
+        self.assertEqual(page, ("Docs", "Documentation text that rarely changes at all."))
+        self.assertEqual(again, page)
+        _, kwargs = crawler.session.get.call_args
+        self.assertEqual(kwargs["headers"], {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"
+        })
+        not_modified.iter_content.assert_not_called()
+        self.assertEqual(stats["hits"], 1)
+
+    def test_extract_main_content_drops_link_lists(self):
+        html = (
+            "<title>Links</title><div><a href='/1'>One link here</a> <a href='/2'>Two links here</a></div>"
+            "<p>A paragraph with <a href='/x'>one link</a> inside plenty of ordinary text.</p>"
+        )
+
+        title, content = extract_main_content(html)
+
+        self.assertEqual(title, "Links")
+        self.assertEqual(content, "A paragraph with one link inside plenty of ordinary text.")
+
+    def test_extract_main_content_unclosed_boilerplate_paragraph(self):
+        # An unclosed <p class="share"> must not hide the paragraphs after it
+        html = ("<p>Hello there my good friend here.<p class=\"share\">share on twitter"
+                "<p>Another paragraph here with words.")
+
+        title, content = extract_main_content(html)
+
+        self.assertEqual(content, "Hello there my good friend here. Another paragraph here with words.")
+
+    def test_extract_main_content_matches_whole_class_tokens(self):
+        html = (
+            "<div id='main-menu-wrapper'><p>The article body lives inside this wrapper.</p>"
+            "<ul class='menu'><li>Home page link list</li></ul></div>"
+        )
+
+        title, content = extract_main_content(html)
+
+        self.assertEqual(content, "The article body lives inside this wrapper.")
+
+    def test_extract_main_content_keeps_form_wrapped_page(self):
+        # ASP.NET WebForms pages wrap everything in one <form>
+        html = (
+            "<form id='aspnetForm'><input type='hidden' name='__VIEWSTATE' value='abc'>"
+            "<div><p>The article text of this web forms page.</p></div>"
+            "<button>Submit this form right now</button></form>"
+        )
+
+        title, content = extract_main_content(html)
+
+        self.assertEqual(content, "The article text of this web forms page.")
+
+    def test_extract_main_content_keeps_has_sidebar_wrapper(self):
+        html = (
+            "<div class='container has-sidebar'><p>The article body lives in this container.</p>"
+            "<div class='sidebar'><p>Sidebar text that is not wanted here.</p></div></div>"
+        )
+
+        title, content = extract_main_content(html)
+
+        self.assertEqual(content, "The article body lives in this container.")
+
+    def test_extract_main_content_prefers_article(self):
+        # The article is kept even inside chrome-looking markup, and the rest of the page is not
+        html = (
+            "<div><p>Welcome to the site, please enjoy your visit.</p></div>"
+            "<div class='related'><article><p>The actual story of this page is here.</p></article></div>"
+        )
+
+        title, content = extract_main_content(html)
+
+        self.assertEqual(content, "The actual story of this page is here.")
+
+
+if __name__ == '__main__':
+    unittest.main()